@@ -1,14 +1,29 @@
 from django.contrib import admin
 
-from blog.models import Post, Category
+from blog.models import Post, Category, OutgoingMessage
 
 
 class PostAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
+    actions = ['render_content']
+
+    def render_content(self, request, queryset):
+        """Re-render the stored HTML of the selected posts."""
+        for post in queryset:
+            post.save()
+        self.message_user(
+            request, "Rendered {0} post(s).".format(len(queryset)))
+    render_content.short_description = "Re-render selected posts"
 
 
 class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("name",)}
 
+
+class OutgoingMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'from_email', 'created', 'sent', 'attempts')
+    list_filter = ('sent',)
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Category, CategoryAdmin)
+admin.site.register(OutgoingMessage, OutgoingMessageAdmin)
@@ -0,0 +1,90 @@
+"""
+Precomputed month counts for the date-based archive.
+
+Grouping the posts by the month they were created in on every page view
+means truncating every date, so the number of published posts per month
+is kept in the ArchiveMonth table instead. Only the months touched by a
+change are recounted (see blog.signals), each with a range scan of the
+``(published, created)`` index; ``manage.py rebuild_archive`` recounts
+them all.
+
+Months are those of the site's time zone, like the dates on the pages.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchiveMonth, Post
+
+
+def post_month(created):
+    """The ``(year, month)`` a post created at `created` is archived in."""
+    if timezone.is_aware(created):
+        created = timezone.localtime(created)
+    return created.year, created.month
+
+
+def month_range(year, month=None):
+    """The ``(start, end)`` of a year or one of its months, `end`
+    excluded."""
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    elif month == 12:
+        start, end = datetime(year, 12, 1), datetime(year + 1, 1, 1)
+    else:
+        start, end = datetime(year, month, 1), datetime(year, month + 1, 1)
+    tz = timezone.get_current_timezone()
+    return timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+
+
+def published_between(start, end):
+    return Post.objects.filter(
+        published=True, created__gte=start, created__lt=end)
+
+
+def recount_months(months):
+    """Recount the published posts of the given ``(year, month)`` pairs."""
+    months = set(months)
+    if not months:
+        return
+
+    counts = dict(
+        (key, published_between(*month_range(*key)).count())
+        for key in months)
+
+    with transaction.atomic():
+        existing = set(ArchiveMonth.objects.filter(
+            year__in=set(year for year, month in months)).values_list(
+            'year', 'month'))
+        for year, month in months & existing:
+            ArchiveMonth.objects.filter(year=year, month=month).update(
+                count=counts[year, month])
+        ArchiveMonth.objects.bulk_create(
+            ArchiveMonth(year=year, month=month, count=counts[year, month])
+            for year, month in months - existing)
+
+
+def rebuild_archive():
+    """Recount every month from scratch."""
+    counts = Counter(
+        post_month(created) for created in Post.objects.filter(
+            published=True).values_list('created', flat=True).iterator())
+    with transaction.atomic():
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create(
+            ArchiveMonth(year=year, month=month, count=count)
+            for (year, month), count in counts.items())
+
+
+def archive_years():
+    """The months with published posts, newest first, grouped by year:
+    ``[{'year': 2014, 'count': 3, 'months': [ArchiveMonth, ...]}, ...]``."""
+    years = []
+    for month in ArchiveMonth.objects.filter(count__gt=0):
+        if not years or years[-1]['year'] != month.year:
+            years.append({'year': month.year, 'count': 0, 'months': []})
+        years[-1]['count'] += month.count
+        years[-1]['months'].append(month)
+    return years
@@ -0,0 +1,247 @@
+"""
+Bundling of the site's CSS and JavaScript.
+
+``manage.py build_assets`` joins the stylesheets and scripts named in
+BUNDLES into one minified, content-hashed file each under ASSETS_ROOT
+(inside a STATICFILES_DIRS entry, so collectstatic picks them up), and
+works out the critical CSS of every template in CRITICAL_TEMPLATES: the
+rules of the CSS bundle that style the navigation and page header, which
+is what a reader sees first. Both are recorded in a manifest.
+
+The template tags in blog.templatetags.blog_assets read the manifest:
+critical CSS is inlined, the full stylesheet is loaded without blocking
+rendering and the scripts are deferred. Without a manifest (e.g. in
+development) the tags fall back to the individual source files.
+"""
+import hashlib
+import json
+import os
+import re
+import warnings
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import render_to_string
+from django.utils.encoding import force_bytes
+
+ASSETS_ROOT = getattr(settings, 'BLOG_ASSETS_ROOT', os.path.join(
+    settings.BASE_DIR, 'staticfiles', 'bundles'))
+
+# Where ASSETS_ROOT's files are found under STATIC_URL
+ASSETS_PREFIX = 'bundles'
+
+MANIFEST_NAME = 'manifest.json'
+
+# Bundle name: source files in the order they are joined. Files that
+# come minified upstream are used as they are.
+BUNDLES = {
+    'site.css': ['css/bootstrap.min.css', 'css/clean-blog.min.css'],
+    'site.js': [
+        'js/jquery.min.js', 'js/clean-blog.min.js', 'js/bootstrap.min.js',
+        'js/relative-time.js'],
+}
+
+CRITICAL_TEMPLATES = [
+    'blog/index.html', 'blog/category.html', 'blog/post.html',
+    'blog/tag.html', 'blog/tags.html', 'blog/archive.html',
+    'blog/search.html', 'blog/about.html', 'blog/about-this-site.html',
+    'blog/contact.html',
+]
+
+# The above-the-fold markup of a page ends with its header
+FOLD_RE = re.compile(r'</header>', re.IGNORECASE)
+
+# Elements, classes and ids that are always considered present
+ALWAYS_PRESENT = set(['html', 'body', '*'])
+
+
+class AssetError(Exception):
+    pass
+
+
+def minify_css(css):
+    """Remove the comments and the whitespace that is not needed."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # Only in declarations, a space before a colon in a selector matters
+    css = re.sub(r'\s*:\s*(?=[^{}]*[;}])', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+SOURCE_MAP_COMMENT = re.compile(
+    r'^[ \t]*(//[#@] sourceMappingURL=.*|/\*[#@] sourceMappingURL=.*?\*/)$',
+    re.MULTILINE)
+
+
+def strip_source_maps(js):
+    """Remove the source map comments, which only hold for the file they
+    came from."""
+    return SOURCE_MAP_COMMENT.sub('', js)
+
+
+def read_source(path):
+    filename = finders.find(path)
+    if filename is None:
+        raise AssetError('Static file %s not found.' % path)
+    with open(filename, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+def build_bundle(name, sources):
+    """Return the joined and minified contents of a bundle."""
+    contents = [read_source(path) for path in sources]
+    if name.endswith('.css'):
+        # The bundles live one directory deep, like css/, so relative
+        # url()s keep working
+        return minify_css('\n'.join(contents))
+    # Guard against sources that do not end their last statement
+    return ';\n'.join(
+        strip_source_maps(content).strip().rstrip(';')
+        for content in contents)
+
+
+def hashed_name(name, content):
+    digest = hashlib.md5(force_bytes(content)).hexdigest()[:12]
+    base, ext = os.path.splitext(name)
+    return '%s.%s%s' % (base, digest, ext)
+
+
+def parse_css(css):
+    """Split minified CSS into ``(prelude, body)`` pairs.
+
+    `body` is a list of pairs again for at-rules holding rules (such as
+    @media), and the declarations as a string otherwise.
+    """
+    rules, position = [], 0
+    while position < len(css):
+        start = css.find('{', position)
+        if start == -1:
+            break
+        prelude = css[position:start].strip()
+        # Statements like @charset end with a semicolon, not a block
+        while ';' in prelude and prelude.startswith('@'):
+            prelude = prelude.split(';', 1)[1].strip()
+        depth, end = 1, start + 1
+        while depth and end < len(css):
+            depth += {'{': 1, '}': -1}.get(css[end], 0)
+            end += 1
+        body = css[start + 1:end - 1]
+        if prelude.startswith(('@media', '@supports')):
+            body = parse_css(body)
+        rules.append((prelude, body))
+        position = end
+    return rules
+
+
+def serialize_css(rules):
+    parts = []
+    for prelude, body in rules:
+        if not isinstance(body, list):
+            parts.append('%s{%s}' % (prelude, body))
+        elif body:
+            parts.append('%s{%s}' % (prelude, serialize_css(body)))
+    return ''.join(parts)
+
+
+SIMPLE_SELECTOR_RE = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+
+
+def selector_names(selector):
+    """The element names, ``.classes`` and ``#ids`` a selector needs."""
+    # Attribute selectors, pseudo-classes and pseudo-elements only
+    # narrow down elements that are matched by the rest
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    selector = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+    return set(
+        prefix + name for prefix, name in SIMPLE_SELECTOR_RE.findall(selector))
+
+
+def page_names(html):
+    """The element names, classes and ids used in `html`."""
+    names = set(ALWAYS_PRESENT)
+    names.update(tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', html))
+    for classes in re.findall(r'class\s*=\s*["\']([^"\']*)', html):
+        names.update('.' + name for name in classes.split())
+    names.update('#' + name for name in re.findall(
+        r'id\s*=\s*["\']([^"\']+)', html))
+    return names
+
+
+def critical_css(rules, html):
+    """The rules styling the part of `html` above the fold."""
+    match = FOLD_RE.search(html)
+    names = page_names(html[:match.end()] if match else html)
+
+    def keep(rules):
+        kept = []
+        for prelude, body in rules:
+            if isinstance(body, list):
+                kept.append((prelude, keep(body)))
+            elif prelude.startswith('@'):
+                # Fonts and animations are not needed for the first paint
+                continue
+            else:
+                selectors = [
+                    selector for selector in prelude.split(',')
+                    if selector_names(selector) <= names]
+                if selectors:
+                    kept.append((','.join(selectors), body))
+        return kept
+
+    return serialize_css(keep(rules))
+
+
+def build_assets():
+    """Write the bundles and the manifest, returning the manifest."""
+    if not os.path.isdir(ASSETS_ROOT):
+        os.makedirs(ASSETS_ROOT)
+
+    manifest = {'bundles': {}, 'critical': {}}
+    written = set([MANIFEST_NAME])
+    for name, sources in sorted(BUNDLES.items()):
+        content = build_bundle(name, sources)
+        filename = hashed_name(name, content)
+        with open(os.path.join(ASSETS_ROOT, filename), 'wb') as f:
+            f.write(content.encode('utf-8'))
+        manifest['bundles'][name] = '%s/%s' % (ASSETS_PREFIX, filename)
+        written.add(filename)
+
+    rules = parse_css(build_bundle('site.css', BUNDLES['site.css']))
+    for template_name in CRITICAL_TEMPLATES:
+        with warnings.catch_warnings():
+            # Rendered without a request, the forms have no CSRF token
+            warnings.simplefilter('ignore')
+            html = render_to_string(template_name, {})
+        manifest['critical'][template_name] = critical_css(rules, html)
+
+    with open(os.path.join(ASSETS_ROOT, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    # Bundles of earlier builds are no longer referenced
+    for filename in os.listdir(ASSETS_ROOT):
+        if filename not in written:
+            os.remove(os.path.join(ASSETS_ROOT, filename))
+
+    reset_manifest()
+    return manifest
+
+
+_manifest = None
+
+
+def get_manifest():
+    """The manifest of the last build, or None if there is none."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(ASSETS_ROOT, MANIFEST_NAME)) as f:
+                _manifest = json.load(f)
+        except (IOError, ValueError):
+            _manifest = {}
+    return _manifest or None
+
+
+def reset_manifest():
+    global _manifest
+    _manifest = None
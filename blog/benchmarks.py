@@ -0,0 +1,350 @@
+"""
+Benchmarks of the public views.
+
+Seeds the database with datasets of increasing size built from the test
+factories, then measures latency, queries per request and memory of
+each public page through both Django's test client and the full WSGI
+stack. Run it with ``manage.py benchmark``, which uses a throwaway test
+database; results are written as JSON and can be compared between runs.
+
+The templates are also measured on their own, loaded and rendered as
+the views do, with the default loaders and with the cached loader used
+in production. ``cold_ms`` is the first render after the loaders are
+reset, which is what a worker's first request pays unless the templates
+are warmed at boot.
+"""
+import gc
+import resource
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.template import RequestContext
+from django.template.loader import get_template
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .archive import archive_years, rebuild_archive
+from .metrics import percentile
+from .models import ArchiveMonth, Category, Post, render_post_fields
+from .pagination import CursorPage
+from .search import index_post
+from .tags import recount_tags, tag_cloud
+
+SCENARIOS = [
+    'index', 'category', 'tag', 'archive', 'show_post', 'deep_page',
+    'deep_cursor']
+
+TEMPLATE_LOADERS = {
+    'default': (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ),
+    'cached': (
+        ('django.template.loaders.cached.Loader', (
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        )),
+    ),
+}
+
+# Paragraphs the post bodies are assembled from, so that Markdown has
+# headings, lists, links, emphasis and code to deal with.
+PARAGRAPHS = [
+    "## Getting started\n\nWriting *Django* apps is mostly about "
+    "**models**, views and templates. See the [docs]"
+    "(https://docs.djangoproject.com/) for the details.",
+    "Some things worth remembering:\n\n* keep views thin\n"
+    "* push queries into managers\n* measure before optimising\n",
+    "    def index(request):\n        posts = Post.objects.all()\n"
+    "        return render(request, 'index.html', {'posts': posts})\n",
+    "> Premature optimization is the root of all evil.\n\n"
+    "That said, an `OFFSET` of a few hundred thousand rows is not "
+    "premature, it is just slow.",
+    "1. Install the requirements\n2. Run the migrations\n"
+    "3. Start the development server\n",
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim "
+    "ad minim veniam, quis nostrud exercitation ullamco laboris.",
+]
+
+# Number of distinct post bodies; rendering is shared between posts
+# with the same body to keep seeding large datasets fast.
+BODY_VARIANTS = 20
+
+# Each seeded post gets two of these, in turn
+TAGS = ['django', 'python', 'performance', 'postgresql', 'heroku']
+
+
+def markdown_body(n):
+    """Return a Markdown post body of 6 to 16 paragraphs."""
+    count = 6 + n % 11
+    return '\n\n'.join(
+        PARAGRAPHS[(n + i) % len(PARAGRAPHS)] for i in range(count))
+
+
+@contextmanager
+def preserve_timestamps():
+    """Let seeded posts keep the created/updated times they are given."""
+    created = Post._meta.get_field('created')
+    updated = Post._meta.get_field('updated')
+    saved = created.auto_now_add, updated.auto_now
+    created.auto_now_add = updated.auto_now = False
+    try:
+        yield
+    finally:
+        created.auto_now_add, updated.auto_now = saved
+
+
+def seed(size, batch_size=500):
+    """Top up the published posts to `size`, spread over a few years.
+
+    The posts are bulk created, which sends no signals, so their tags,
+    archive months and search terms are filled in afterwards like the
+    signals would have.
+    """
+    from .tests.factories import CategoryFactory, PublishedPostFactory
+    from django_libs.tests.factories import UserFactory
+
+    existing = Post.objects.count()
+    if existing >= size:
+        return
+    last_pk = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+
+    categories = list(Category.objects.all()) or [
+        CategoryFactory() for n in range(10)]
+    author = User.objects.first() or UserFactory()
+    bodies = [markdown_body(n) for n in range(BODY_VARIANTS)]
+    rendered = [render_post_fields(body) for body in bodies]
+    start = timezone.now() - timedelta(days=3 * 365)
+    step = timedelta(days=3 * 365) / size
+
+    with preserve_timestamps():
+        batch = []
+        for n in range(existing, size):
+            created = start + step * n
+            post = PublishedPostFactory.build(
+                title='Benchmark post %d' % n,
+                slug='benchmark-post-%d' % n,
+                subtitle='Subtitle of post %d' % n,
+                content=bodies[n % BODY_VARIANTS],
+                category=categories[n % len(categories)],
+                author=author, created=created, updated=created)
+            for field, value in rendered[n % BODY_VARIANTS].items():
+                setattr(post, field, value)
+            batch.append(post)
+            if len(batch) == batch_size:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+
+    tag_posts(Post.objects.filter(pk__gt=last_pk).order_by('pk'))
+    recount_tags(Tag.objects.values_list('pk', flat=True))
+    rebuild_archive()
+    for post in Post.objects.filter(pk__gt=last_pk).prefetch_related(
+            'tags').iterator():
+        index_post(post)
+
+
+def tag_posts(posts):
+    """Tag each post with two of TAGS."""
+    tags = [Tag.objects.get_or_create(name=name, slug=name)[0]
+            for name in TAGS]
+    content_type = ContentType.objects.get_for_model(Post)
+    TaggedItem.objects.bulk_create(
+        TaggedItem(tag=tags[(n + i) % len(tags)], content_type=content_type,
+                   object_id=pk)
+        for n, pk in enumerate(posts.values_list('pk', flat=True))
+        for i in range(2))
+
+
+def scenario_urls(size):
+    """The URL requested by each scenario for a dataset of `size` posts."""
+    from .pagination import encode_cursor
+
+    newest = Post.objects.filter(published=True).order_by('-created').first()
+    middle = Post.objects.filter(published=True).order_by(
+        '-created')[size // 2]
+    return {
+        'index': '/',
+        'category': newest.category.get_absolute_url(),
+        'tag': '/tag/%s/' % TAGS[0],
+        'archive': ArchiveMonth.objects.filter(
+            count__gt=0).first().get_absolute_url(),
+        'show_post': newest.get_absolute_url(),
+        'deep_page': '/?page=%d' % max(size // 10, 1),
+        'deep_cursor': '/?before=%s' % encode_cursor(middle),
+    }
+
+
+def max_rss_kb():
+    """Peak resident memory of this process so far."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def wsgi_get(application, url):
+    """Request `url` from a WSGI application and read the whole body."""
+    path, _, query = url.partition('?')
+    environ = {
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'REQUEST_METHOD': 'GET',
+        'wsgi.input': BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(status_line)
+
+    body = application(environ, start_response)
+    try:
+        b''.join(body)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return int(status[0].split()[0])
+
+
+def measure(get, url, repeat):
+    """Time `repeat` requests of `url` made with `get`."""
+    get(url)  # Warm up
+    gc.collect()
+    rss_before = max_rss_kb()
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for n in range(repeat):
+            start = time.time()
+            status = get(url)
+            timings.append((time.time() - start) * 1000)
+    if status != 200:
+        raise RuntimeError('%s returned %s' % (url, status))
+
+    timings.sort()
+    return {
+        'mean_ms': sum(timings) / len(timings),
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'queries': len(queries) // repeat,
+        'max_rss_kb': max_rss_kb(),
+        'rss_growth_kb': max_rss_kb() - rss_before,
+    }
+
+
+def template_contexts():
+    """The context each template is rendered with, as its view builds it.
+
+    Querysets are evaluated up front so that only rendering is timed.
+    """
+    posts = list(Post.objects.listing()[:5])
+    post = Post.objects.published().prefetch_related('tags').first()
+    category = post.category
+    in_category = list(Post.objects.listing().filter(category=category)[:5])
+    archive = archive_years()
+    return {
+        'blog/index.html': {
+            'posts': CursorPage(posts, True, False), 'archive': archive},
+        'blog/category.html': {
+            'category': category,
+            'posts': CursorPage(in_category, True, False)},
+        'blog/post.html': {'post': post},
+        'blog/tags.html': {'tags': tag_cloud()},
+        'blog/archive.html': {
+            'year': archive[0]['year'], 'months': archive[0]['months'],
+            'count': archive[0]['count'],
+            'posts': CursorPage(posts, True, False), 'archive': archive},
+        'blog/about.html': {},
+        'blog/about-this-site.html': {},
+        'blog/contact.html': {},
+    }
+
+
+def render_template(request, name, context):
+    get_template(name).render(RequestContext(request, context))
+    return 200
+
+
+def measure_templates(repeat=20, stdout=None):
+    """Time loading and rendering each template with each loader."""
+    request = RequestFactory().get('/')
+    contexts = template_contexts()
+    results = {}
+    for name, context in sorted(contexts.items()):
+        results[name] = {}
+        for loader, loaders in sorted(TEMPLATE_LOADERS.items()):
+            # Changing the setting resets the loaders and their cache
+            with override_settings(TEMPLATE_LOADERS=loaders):
+                start = time.time()
+                render_template(request, name, context)
+                cold_ms = (time.time() - start) * 1000
+                result = measure(
+                    lambda name: render_template(request, name, context),
+                    name, repeat)
+            result['cold_ms'] = cold_ms
+            results[name][loader] = result
+            if stdout:
+                stdout.write('%-26s %-8s %8.2f ms (first %.2f ms)' % (
+                    name, loader, result['p50_ms'], cold_ms))
+    return results
+
+
+def run_benchmarks(sizes, repeat=20, stdout=None):
+    """Seed each dataset size in turn and measure every scenario."""
+    client = Client()
+    application = WSGIHandler()
+    results = {}
+
+    for size in sorted(sizes):
+        seed(size)
+        urls = scenario_urls(size)
+        results[str(size)] = {}
+        for name in SCENARIOS:
+            results[str(size)][name] = {
+                'client': measure(
+                    lambda url: client.get(url).status_code,
+                    urls[name], repeat),
+                'wsgi': measure(
+                    lambda url: wsgi_get(application, url),
+                    urls[name], repeat),
+            }
+            if stdout:
+                stdout.write('%7d posts %-12s %8.2f ms %3d queries' % (
+                    size, name, results[str(size)][name]['wsgi']['p50_ms'],
+                    results[str(size)][name]['wsgi']['queries']))
+
+    # Shaped like a dataset size, so compare_results covers it too
+    results['templates'] = measure_templates(repeat, stdout)
+    return results
+
+
+def compare_results(baseline, current, max_slowdown=1.25, max_new_queries=0):
+    """List the measurements of `current` that regressed from `baseline`.
+
+    A regression is a median latency more than `max_slowdown` times the
+    baseline's, or more than `max_new_queries` extra queries per request.
+    """
+    regressions = []
+    for size, scenarios in current.items():
+        for name, harnesses in scenarios.items():
+            for harness, result in harnesses.items():
+                try:
+                    before = baseline[size][name][harness]
+                except KeyError:
+                    continue
+                label = '%s posts %s (%s)' % (size, name, harness)
+                if result['p50_ms'] > before['p50_ms'] * max_slowdown:
+                    regressions.append('%s: %.2f ms, was %.2f ms' % (
+                        label, result['p50_ms'], before['p50_ms']))
+                if result['queries'] > before['queries'] + max_new_queries:
+                    regressions.append('%s: %d queries, was %d' % (
+                        label, result['queries'], before['queries']))
+    return regressions
@@ -0,0 +1,133 @@
+"""
+Full-page caching of the public views for anonymous readers.
+
+Every cached page belongs to a namespace such as ``index``,
+``category:<slug>`` or ``post:<slug>``. The cache key of a page combines
+the namespace, the namespace's current generation, the host and scheme
+(feeds and sitemaps hold absolute URLs), the path and the query string
+(which carries the page cursor). Saving a post or category replaces the
+generation of the namespaces it affects, so their pages are never served
+again and everything else stays cached.
+
+A page with an Expires header (see blog.relativetime) is kept no longer
+than that, and its max-age counts down to it when served from cache.
+"""
+import hashlib
+import time
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.decorators import available_attrs
+from django.utils.cache import patch_cache_control
+from django.utils.encoding import force_bytes
+from django.utils.http import parse_http_date_safe
+
+PAGE_CACHE_ALIAS = getattr(settings, 'BLOG_PAGE_CACHE_ALIAS', 'pages')
+PAGE_CACHE_TIMEOUT = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 60 * 60)
+# Generations outlive the pages stored under them. One that expires early
+# only means its pages are rendered again, and requests for made up slugs
+# do not leave keys behind for good.
+GENERATION_TIMEOUT = 2 * PAGE_CACHE_TIMEOUT
+
+
+def get_page_cache():
+    return caches[PAGE_CACHE_ALIAS]
+
+
+def _generation_key(namespace):
+    return 'blog:generation:%s' % namespace
+
+
+def get_generation(namespace):
+    """Return the current generation of `namespace`, creating one if needed.
+
+    Returns None if the cache cannot hold on to values (e.g. DummyCache).
+    """
+    cache = get_page_cache()
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid4().hex, GENERATION_TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate(*namespaces):
+    """Stop serving every cached page in the given namespaces."""
+    get_page_cache().set_many(
+        dict((_generation_key(ns), uuid4().hex) for ns in namespaces),
+        GENERATION_TIMEOUT)
+
+
+def page_cache_key(namespace, generation, request):
+    # Several views may share a namespace, e.g. the RSS and Atom feeds.
+    # Pages with absolute URLs differ by host, and a forged Host header
+    # must not put its links in pages served to others.
+    query = (
+        request.get_host(), request.is_secure(), request.path,
+        sorted(request.GET.lists()))
+    digest = hashlib.md5(force_bytes(repr(query))).hexdigest()
+    return 'blog:page:%s:%s:%s' % (namespace, generation, digest)
+
+
+def seconds_until_expiry(response):
+    """Seconds until the response's Expires time, or None if it has none."""
+    if not response.has_header('Expires'):
+        return None
+    expires = parse_http_date_safe(response['Expires'])
+    if expires is None:
+        return None
+    return max(int(expires - time.time()), 0)
+
+
+def refresh_max_age(response):
+    """Make the response's max-age agree with its Expires header."""
+    remaining = seconds_until_expiry(response)
+    if remaining is not None:
+        patch_cache_control(response, public=True, max_age=remaining)
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    user = getattr(request, 'user', None)
+    return user is None or not user.is_authenticated()
+
+
+def cache_public_page(namespace):
+    """Cache a view's pages for anonymous readers under `namespace`.
+
+    `namespace` may refer to the view's keyword arguments, e.g.
+    ``'post:{slug}'``.
+    """
+    def decorator(view_func):
+        @wraps(view_func, assigned=available_attrs(view_func))
+        def _wrapped_view(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            page_namespace = namespace.format(**kwargs)
+            generation = get_generation(page_namespace)
+            if generation is None:
+                return view_func(request, *args, **kwargs)
+
+            cache = get_page_cache()
+            key = page_cache_key(page_namespace, generation, request)
+            response = cache.get(key)
+            if response is not None:
+                refresh_max_age(response)
+                return response
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                timeout = PAGE_CACHE_TIMEOUT
+                remaining = seconds_until_expiry(response)
+                if remaining is not None:
+                    timeout = min(timeout, remaining)
+                if timeout > 0:
+                    cache.set(key, response, timeout)
+            return response
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,47 @@
+"""
+Conditional GET support for the public views.
+
+The validators are worked out from a single cheap query before the view
+runs, so a client holding an up to date copy gets a 304 without any
+template rendering.
+"""
+import hashlib
+
+from django.utils.encoding import force_bytes
+from django.views.decorators.http import condition
+
+
+def conditional_page(last_modified_func):
+    """Answer conditional GETs using `last_modified_func` for validators.
+
+    `last_modified_func` takes the view's arguments and returns the time
+    the page last changed, or None if there is nothing to validate. It
+    may also return a ``(time, version)`` pair, where `version` is
+    anything else that changes with the page, such as the number of
+    posts on a listing (deleting a post leaves no later time behind).
+    The ETag is derived from those plus the query string, since listing
+    pages share a path but differ by page cursor.
+    """
+    def get_validators(request, *args, **kwargs):
+        # condition() asks for each validator separately, query only once
+        if not hasattr(request, '_page_validators'):
+            value = last_modified_func(request, *args, **kwargs)
+            if not isinstance(value, tuple):
+                value = (value, None)
+            request._page_validators = value
+        return request._page_validators
+
+    def get_last_modified(request, *args, **kwargs):
+        return get_validators(request, *args, **kwargs)[0]
+
+    def get_etag(request, *args, **kwargs):
+        last_modified, version = get_validators(request, *args, **kwargs)
+        if last_modified is None:
+            return None
+        key = repr((
+            request.path, last_modified.isoformat(), version,
+            sorted(request.GET.lists())))
+        return hashlib.md5(force_bytes(key)).hexdigest()
+
+    return condition(
+        etag_func=get_etag, last_modified_func=get_last_modified)
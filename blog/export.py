@@ -0,0 +1,311 @@
+"""
+Export of the public pages as a static site.
+
+Every public URL is rendered through Django's test client and written to
+``<output>/<path>/index.html``, so the result can be served by any static
+file host. Only the contact form still needs Django. Documents whose URL
+already ends in a file name (the sitemaps, robots.txt) keep it. Static
+hosts only serve ``index.html`` for a directory, so the feeds are written
+to ``<path>.xml`` instead, e.g. ``feed/rss.xml``, and every link to them
+is rewritten to match.
+
+Static hosts know nothing of query strings, so each listing is exported
+by following its "Older Posts" links from the first page; page N is
+written to ``<listing>/page/N/`` and the cursor links in every page are
+rewritten to point at those files.
+
+A state file in the output directory records when the export ran and
+which posts it contained. An incremental export then only renders the
+posts that changed since, the listings and feeds they appear in and the
+sitemap, and removes the pages of posts that are gone.
+"""
+import errno
+import json
+import os
+import re
+import shutil
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test import Client
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from taggit.models import TaggedItem
+
+from .models import ArchiveMonth, Category, Post, TagCount
+from .sitemaps import post_chunks
+
+STATE_FILE = '.export.json'
+
+# Pages rendered on every full export
+STATIC_PAGES = ['about', 'about_site', 'robots_txt']
+
+# Pages that list every post, rendered whenever any post changes
+SITE_WIDE_PAGES = [
+    'feed_rss', 'feed_atom', 'sitemap', 'sitemap_pages', 'tags']
+
+CURSOR_LINK = r'%s\?(before|after)=([\w-]+)'
+
+# Links to the feeds, relative or absolute, up to their trailing slash
+FEED_LINK = re.compile(r'(/feed/(?:rss|atom))/(?=[\'"<])')
+
+
+class ExportError(Exception):
+    pass
+
+
+def output_file(output_dir, path, content_type):
+    """Where the page at `path` is written in the export."""
+    relative = path.lstrip('/')
+    if os.path.splitext(relative)[1]:
+        return os.path.join(output_dir, relative)
+    if content_type.startswith('text/html'):
+        return os.path.join(output_dir, relative, 'index.html')
+    return os.path.join(output_dir, relative.rstrip('/') + '.xml')
+
+
+def static_feed_links(content):
+    """Point the links to the feeds in `content` at their exported
+    files."""
+    return FEED_LINK.sub(r'\1.xml', content)
+
+
+def write_file(filename, content):
+    directory = os.path.dirname(filename)
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        # Another worker may have just made it
+        if e.errno != errno.EEXIST:
+            raise
+    with open(filename, 'wb') as f:
+        f.write(content)
+
+
+_client = None
+
+
+def get(path, request_options):
+    global _client
+    if _client is None:
+        _client = Client()
+    response = _client.get(path, **request_options)
+    if response.status_code != 200:
+        raise ExportError('%s returned %s' % (path, response.status_code))
+    return response
+
+
+def export_page(args):
+    """Render the page at `path` and write it, returning the file."""
+    output_dir, path, request_options = args
+    response = get(path, request_options)
+    filename = output_file(output_dir, path, response['Content-Type'])
+    content = static_feed_links(response.content.decode('utf-8'))
+    write_file(filename, content.encode('utf-8'))
+    return [filename]
+
+
+def listing_page_path(path, number):
+    if number == 1:
+        return path
+    return '%spage/%d/' % (path, number)
+
+
+def export_listing(args):
+    """Render every page of the listing at `path`, following its cursor
+    links, and write them with the links made static."""
+    output_dir, path, request_options = args
+    cursor_link = re.compile(CURSOR_LINK % re.escape(path))
+    url, number, written = path, 1, []
+
+    while url is not None:
+        content = get(url, request_options).content.decode('utf-8')
+        older = [cursor for direction, cursor in
+                 cursor_link.findall(content) if direction == 'before']
+        url = '%s?before=%s' % (path, older[0]) if older else None
+
+        def static_link(match):
+            if match.group(1) == 'before':
+                return listing_page_path(path, number + 1)
+            return listing_page_path(path, number - 1)
+
+        content = static_feed_links(cursor_link.sub(static_link, content))
+        filename = output_file(
+            output_dir, listing_page_path(path, number), 'text/html')
+        write_file(filename, content.encode('utf-8'))
+        written.append(filename)
+        number += 1
+
+    # Drop the pages left over from a longer listing
+    stale = os.path.join(output_dir, path.lstrip('/'), 'page', str(number))
+    while os.path.isdir(stale):
+        shutil.rmtree(stale)
+        number += 1
+        stale = os.path.join(
+            output_dir, path.lstrip('/'), 'page', str(number))
+    return written
+
+
+def copy_static(output_dir):
+    """Copy the collected static files, skipping unchanged ones."""
+    if not settings.STATIC_ROOT or not os.path.isdir(settings.STATIC_ROOT):
+        raise ExportError(
+            'No static files in %s, run collectstatic first.'
+            % settings.STATIC_ROOT)
+    target_root = os.path.join(output_dir, settings.STATIC_URL.strip('/'))
+    copied = 0
+    for root, dirs, files in os.walk(settings.STATIC_ROOT):
+        target_dir = os.path.join(
+            target_root, os.path.relpath(root, settings.STATIC_ROOT))
+        if not os.path.isdir(target_dir):
+            os.makedirs(target_dir)
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_dir, name)
+            stat = os.stat(source)
+            if os.path.exists(target):
+                existing = os.stat(target)
+                if (existing.st_size == stat.st_size and
+                        existing.st_mtime >= stat.st_mtime):
+                    continue
+            shutil.copy2(source, target)
+            copied += 1
+    return copied
+
+
+def read_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE)) as f:
+            state = json.load(f)
+    except (IOError, ValueError):
+        return None
+    state['exported_at'] = parse_datetime(state['exported_at'])
+    return state
+
+
+def write_state(output_dir, started, posts):
+    with open(os.path.join(output_dir, STATE_FILE), 'w') as f:
+        json.dump({
+            'exported_at': started.isoformat(),
+            'posts': posts,
+        }, f, indent=2, sort_keys=True)
+
+
+def published_posts():
+    """``{slug: {'category': slug, 'tags': [slug, ...]}}`` of every
+    published post."""
+    tags = {}
+    tagged = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post)).values_list(
+        'object_id', 'tag__slug')
+    for post_id, tag in tagged.iterator():
+        tags.setdefault(post_id, []).append(tag)
+
+    posts = {}
+    for pk, slug, category in Post.objects.filter(
+            published=True).values_list(
+            'pk', 'slug', 'category__slug').iterator():
+        posts[slug] = {'category': category, 'tags': sorted(tags.get(pk, []))}
+    return posts
+
+
+def plan(state, posts):
+    """Return the ``(pages, listings, removed)`` to export.
+
+    Everything is exported when there is no `state` from an earlier run.
+    """
+    all_categories = set(Category.objects.values_list('slug', flat=True))
+    all_tags = set(TagCount.objects.filter(
+        count__gt=0).values_list('slug', flat=True))
+
+    if state is None:
+        pages = [reverse(name) for name in STATIC_PAGES]
+        changed, removed = set(posts), []
+        categories, tags = all_categories, all_tags
+    else:
+        since, previous = state['exported_at'], state['posts']
+        changed = set(Post.objects.filter(
+            published=True, updated__gt=since).values_list('slug', flat=True))
+        changed.update(slug for slug in posts if slug not in previous)
+        removed = [slug for slug in previous if slug not in posts]
+        categories = set(Category.objects.filter(
+            updated__gt=since).values_list('slug', flat=True))
+        if not (changed or removed or categories):
+            return [], [], []
+
+        pages, tags = [], set()
+        for slug in changed.union(removed):
+            for entry in (posts.get(slug), previous.get(slug)):
+                if entry:
+                    categories.add(entry['category'])
+                    tags.update(entry['tags'])
+        categories &= all_categories
+        tags &= all_tags
+
+    pages += [reverse(name) for name in SITE_WIDE_PAGES]
+    pages += [reverse('sitemap_posts', args=[chunk])
+              for chunk, lastmod in post_chunks()]
+    pages += [reverse('blog:post', args=[slug]) for slug in changed]
+    pages += [reverse('category_feed_%s' % kind, args=[slug])
+              for slug in categories for kind in ('rss', 'atom')]
+    listings = ['/']
+    listings += [reverse('category', args=[slug]) for slug in categories]
+    listings += [reverse('tag', args=[slug]) for slug in tags]
+    # Every archive page carries the month counts, so any change to the
+    # posts changes them all
+    months = list(ArchiveMonth.objects.filter(count__gt=0))
+    listings += [reverse('archive_year', args=[str(year)])
+                 for year in sorted(set(month.year for month in months))]
+    listings += [month.get_absolute_url() for month in months]
+    return pages, listings, removed
+
+
+def remove_posts(output_dir, slugs):
+    for slug in slugs:
+        directory = os.path.join(
+            output_dir, reverse('blog:post', args=[slug]).lstrip('/'))
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+
+
+def export_site(output_dir, host, secure=False, incremental=False,
+                processes=None, copy_static_files=True):
+    """Export the public pages to `output_dir`.
+
+    `host` and `secure` give the site's address for the absolute URLs in
+    the feeds and sitemap. Returns the number of files written.
+    """
+    started = timezone.now()
+    state = read_state(output_dir) if incremental else None
+    posts = published_posts()
+    pages, listings, removed = plan(state, posts)
+
+    options = {'HTTP_HOST': host, 'secure': secure}
+    tasks = [(export_page, (output_dir, path, options)) for path in pages]
+    tasks += [
+        (export_listing, (output_dir, path, options)) for path in listings]
+
+    if processes == 1:
+        results = [func(args) for func, args in tasks]
+    else:
+        # The workers are forked and must not share the connections
+        for connection in connections.all():
+            connection.close()
+        pool = Pool(processes)
+        try:
+            results = [
+                pool.apply_async(func, (args,)) for func, args in tasks]
+            results = [result.get() for result in results]
+        finally:
+            pool.terminate()
+            pool.join()
+
+    remove_posts(output_dir, removed)
+    written = sum(len(files) for files in results)
+    if copy_static_files:
+        written += copy_static(output_dir)
+    write_state(output_dir, started, posts)
+    return written
@@ -0,0 +1,96 @@
+"""
+RSS and Atom feeds of the latest posts, site wide and per category.
+
+Entries use the HTML stored on each post, so serving a feed never runs
+Markdown. The finished documents are kept in the page cache under the
+``feed`` and ``feed:<category slug>`` namespaces, which are only
+invalidated when a published post changes (see blog.signals), and
+conditional GETs are answered before the feed is built.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.utils.feedgenerator import Atom1Feed
+
+from .cache import cache_public_page
+from .conditional import conditional_page
+from .middleware import public_view
+from .models import Category, Post
+from .views import listing_last_modified
+
+FEED_MAX_ITEMS = getattr(settings, 'BLOG_FEED_MAX_ITEMS', 20)
+
+
+class LatestPostsFeed(Feed):
+    title = "Kevin Ndung'u"
+    link = '/'
+    description = "Thoughts of a Tech Hobbyist"
+
+    def get_posts(self, obj):
+        return Post.objects.filter(published=True)
+
+    def items(self, obj):
+        # Tags are not part of the feed and the excerpts are not needed
+        posts = self.get_posts(obj).select_related(
+            'category', 'author').defer(
+            'content', 'excerpt_short', 'excerpt_long')
+        return posts.order_by('-created', '-id')[:FEED_MAX_ITEMS]
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.content_html
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_updateddate(self, post):
+        return post.updated
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.get_username()
+
+    def item_categories(self, post):
+        return [post.category.name]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class CategoryFeed(LatestPostsFeed):
+
+    def get_object(self, request, category_name_slug):
+        return get_object_or_404(Category, slug=category_name_slug)
+
+    def get_posts(self, category):
+        return Post.objects.filter(published=True, category=category)
+
+    def title(self, category):
+        return "Kevin Ndung'u: %s" % category.name
+
+    def link(self, category):
+        return category.get_absolute_url()
+
+    def description(self, category):
+        return category.description or LatestPostsFeed.description
+
+
+class CategoryAtomFeed(CategoryFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
+
+
+def feed_view(feed, namespace):
+    return public_view(cache_public_page(namespace)(
+        conditional_page(listing_last_modified)(feed)))
+
+
+latest_posts_rss = feed_view(LatestPostsFeed(), 'feed')
+latest_posts_atom = feed_view(LatestPostsAtomFeed(), 'feed')
+category_rss = feed_view(CategoryFeed(), 'feed:{category_name_slug}')
+category_atom = feed_view(CategoryAtomFeed(), 'feed:{category_name_slug}')
@@ -0,0 +1,225 @@
+"""
+Resized and re-encoded copies ("derivatives") of the site's images.
+
+Each image is made available at several widths, as a JPEG or PNG like
+the original and as WebP (and AVIF, where the installed Pillow can write
+it), so that browsers can download the smallest file that suits them. A
+derivative of ``img/home-bg.jpg`` 768 pixels wide in WebP is named
+``img/home-bg.jpg.768w.webp``.
+
+Derivatives of the static images in RESPONSIVE_IMAGES come from
+`DerivativeFinder`, so collectstatic collects (and hashes) them like any
+other static file. Derivatives of uploaded images under MEDIA_ROOT are
+made on demand by the `media_derivative` view. Both are cached on disk
+under IMAGE_CACHE_ROOT and only made again when their source changes.
+
+The template tags in blog.templatetags.blog_images write the markup.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+from django.utils._os import safe_join
+from django.views.static import serve
+from PIL import Image
+
+from .middleware import public_view
+
+IMAGE_CACHE_ROOT = getattr(settings, 'BLOG_IMAGE_CACHE_ROOT', os.path.join(
+    settings.BASE_DIR, 'cache', 'images'))
+
+# The static images that get derivatives
+RESPONSIVE_IMAGES = getattr(settings, 'BLOG_RESPONSIVE_IMAGES', [
+    'img/home-bg.jpg', 'img/post-bg.jpg', 'img/about-bg.jpg',
+    'img/contact-bg.jpg', 'img/post-sample-image.jpg',
+])
+
+WIDTHS = [480, 768, 1200, 1920]
+
+JPEG_QUALITY = 80
+WEBP_QUALITY = 75
+
+# Extensions of the formats derivatives are made in, besides the
+# original's, and their content types
+FORMATS = [
+    ('avif', 'image/avif', 'AVIF'),
+    ('webp', 'image/webp', 'WEBP'),
+]
+
+SOURCE_EXTENSIONS = ('jpg', 'jpeg', 'png')
+
+DERIVATIVE_RE = re.compile(
+    r'^(?P<source>.+\.(?:%s))\.(?P<width>\d+)w\.(?P<extension>\w+)$'
+    % '|'.join(SOURCE_EXTENSIONS), re.IGNORECASE)
+
+# How long browsers may keep the on-demand derivatives of uploads
+MEDIA_MAX_AGE = 60 * 60 * 24 * 7
+
+
+def supported_formats():
+    """The extra formats the installed Pillow can write, best first."""
+    try:
+        # AVIF support comes from a separate plugin, if installed
+        import pillow_avif  # NOQA
+    except ImportError:
+        pass
+    Image.init()
+    return [
+        (extension, content_type) for extension, content_type, name
+        in FORMATS if name in Image.SAVE]
+
+
+def source_extension(name):
+    extension = os.path.splitext(name)[1].lstrip('.').lower()
+    return 'jpg' if extension == 'jpeg' else extension
+
+
+def derivative_name(name, width, extension):
+    return '%s.%dw.%s' % (name, width, extension)
+
+
+def image_widths(width):
+    """The widths derivatives of an image `width` pixels wide come in.
+
+    Images are never scaled up, the widest derivative is the original.
+    """
+    return [w for w in WIDTHS if w < width] + [width]
+
+
+def derivative_names(name, filename):
+    """``(name, width, extension)`` of every derivative of an image."""
+    width = Image.open(filename).size[0]
+    extensions = [source_extension(name)] + [
+        extension for extension, content_type in supported_formats()]
+    return [
+        (derivative_name(name, w, extension), w, extension)
+        for w in image_widths(width) for extension in extensions]
+
+
+def make_derivative(source, target, width, extension):
+    """Write `source` resized to `width` pixels in the format of
+    `extension` to `target`, unless it is already up to date."""
+    if (os.path.exists(target) and
+            os.path.getmtime(target) >= os.path.getmtime(source)):
+        return
+    image = Image.open(source)
+    if image.size[0] > width:
+        height = int(round(image.size[1] * width / float(image.size[0])))
+        height = max(height, 1)
+        image = image.resize((width, height), Image.ANTIALIAS)
+
+    directory = os.path.dirname(target)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    # Write to a temporary file first, other processes may be serving it
+    temporary = '%s.%d.tmp' % (target, os.getpid())
+    if extension == 'jpg':
+        image.convert('RGB').save(
+            temporary, 'JPEG', quality=JPEG_QUALITY, optimize=True,
+            progressive=True)
+    elif extension == 'png':
+        image.save(temporary, 'PNG', optimize=True)
+    elif extension == 'webp':
+        image.save(temporary, 'WEBP', quality=WEBP_QUALITY)
+    else:
+        image.save(temporary, extension.upper())
+    os.rename(temporary, target)
+
+
+def srcsets(name, filename):
+    """``[(extension, content_type, [(name, width), ...]), ...]`` of the
+    derivatives of an image, best format first and narrowest first."""
+    content_types = dict(supported_formats())
+    result = {}
+    for derivative, width, extension in derivative_names(name, filename):
+        result.setdefault(extension, []).append((derivative, width))
+    original = source_extension(name)
+    extensions = [e for e, t in supported_formats()] + [original]
+    return [
+        (extension, content_types.get(extension, 'image/%s' % (
+            'jpeg' if extension == 'jpg' else extension)), result[extension])
+        for extension in extensions]
+
+
+_static_srcsets = {}
+
+
+def static_srcsets(name):
+    """`srcsets` of one of the RESPONSIVE_IMAGES, or None if it has no
+    derivatives. Static images do not change while the site runs."""
+    if name not in _static_srcsets:
+        source = finders.find(name) if name in RESPONSIVE_IMAGES else None
+        _static_srcsets[name] = source and srcsets(name, source)
+    return _static_srcsets[name]
+
+
+class DerivativeFinder(BaseFinder):
+    """Finds (and makes) the derivatives of the RESPONSIVE_IMAGES."""
+
+    def __init__(self, *args, **kwargs):
+        self.root = os.path.join(IMAGE_CACHE_ROOT, 'static')
+        self.storage = FileSystemStorage(location=self.root)
+        super(DerivativeFinder, self).__init__(*args, **kwargs)
+
+    def make(self, name, width, extension):
+        source = finders.find(name)
+        if source is None:
+            return None
+        target = os.path.join(self.root, derivative_name(
+            name, width, extension))
+        make_derivative(source, target, width, extension)
+        return target
+
+    def find(self, path, all=False):
+        match = DERIVATIVE_RE.match(path)
+        if match and match.group('source') in RESPONSIVE_IMAGES:
+            source = finders.find(match.group('source'))
+            if source is not None:
+                for name, width, extension in derivative_names(
+                        match.group('source'), source):
+                    if name == path:
+                        target = self.make(
+                            match.group('source'), width, extension)
+                        return [target] if all else target
+        return [] if all else None
+
+    def list(self, ignore_patterns):
+        for name in RESPONSIVE_IMAGES:
+            source = finders.find(name)
+            if source is None:
+                continue
+            for derivative, width, extension in derivative_names(
+                    name, source):
+                self.make(name, width, extension)
+                yield derivative, self.storage
+
+
+@public_view
+def media_derivative(request, path):
+    """Serve a derivative of an uploaded image, making it if needed."""
+    match = DERIVATIVE_RE.match(path)
+    if not match:
+        raise Http404
+    try:
+        source = safe_join(settings.MEDIA_ROOT, match.group('source'))
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(source):
+        raise Http404
+
+    width, extension = int(match.group('width')), match.group('extension')
+    allowed = [
+        (w, e) for name, w, e
+        in derivative_names(match.group('source'), source)]
+    if (width, extension) not in allowed:
+        raise Http404
+
+    root = os.path.join(IMAGE_CACHE_ROOT, 'media')
+    make_derivative(source, os.path.join(root, path), width, extension)
+    response = serve(request, path, document_root=root)
+    response['Cache-Control'] = 'public, max-age=%d' % MEDIA_MAX_AGE
+    return response
@@ -0,0 +1,107 @@
+"""
+A database backed queue for outgoing mail.
+
+The contact form only writes its message to the queue, so a slow mail
+provider never holds up a web worker. `manage.py send_queued_mail` sends
+the queued messages in batches, retrying failures with exponential
+backoff.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingMessage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+# Seconds to wait before the first retry, doubled for every later one
+BACKOFF = 60
+# How long a worker may hold on to a batch before others can claim it
+LEASE = timedelta(minutes=5)
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Queue a message for sending, the arguments are those of send_mail.
+
+    Raises BadHeaderError straight away if a header contains a newline.
+    """
+    email = EmailMessage(subject, message, from_email, recipient_list)
+    # Building the MIME message validates the headers
+    email.message()
+    return OutgoingMessage.objects.create(
+        subject=subject, body=message, from_email=from_email,
+        recipients=','.join(recipient_list))
+
+
+def backoff(attempts):
+    """How long to wait before retrying a message that failed `attempts`
+    times."""
+    return timedelta(seconds=BACKOFF * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Take the messages that are due and keep other workers off them."""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutgoingMessage.objects.select_for_update().filter(
+            sent__isnull=True, attempts__lt=max_attempts,
+            next_attempt__lte=now)[:batch_size])
+        OutgoingMessage.objects.filter(
+            pk__in=[message.pk for message in batch]).update(
+            next_attempt=now + LEASE)
+    return batch
+
+
+def record_failure(message, error):
+    """Schedule the retry of a message that could not be sent."""
+    message.attempts += 1
+    message.next_attempt = timezone.now() + backoff(message.attempts)
+    message.last_error = repr(error)
+    logger.warning(
+        'Sending message %s failed (attempt %s): %r',
+        message.pk, message.attempts, error)
+    message.save()
+
+
+def send_queued_mail(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Send one batch of due messages over a single connection.
+
+    Returns a ``(sent, failed)`` tuple of message counts.
+    """
+    batch = claim_batch(batch_size, max_attempts)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing in the batch can be sent, retry all of it later
+        for message in batch:
+            record_failure(message, e)
+        return 0, len(batch)
+    try:
+        for message in batch:
+            email = EmailMessage(
+                message.subject, message.body, message.from_email,
+                message.recipient_list, connection=connection)
+            try:
+                email.send()
+            except Exception as e:
+                failed += 1
+                record_failure(message, e)
+            else:
+                sent += 1
+                message.attempts += 1
+                message.sent = timezone.now()
+                message.save()
+    finally:
+        connection.close()
+
+    return sent, failed
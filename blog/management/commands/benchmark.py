@@ -0,0 +1,107 @@
+import json
+import platform
+from optparse import make_option
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blog.benchmarks import compare_results, run_benchmarks
+
+DUMMY_PAGE_CACHE = {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the public views against seeded datasets in a "
+            "throwaway test database. Needs the testing requirements.")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--sizes', dest='sizes', default='10,1000',
+            help='Comma separated dataset sizes, e.g. 10,1000,100000.'),
+        make_option(
+            '--repeat', type='int', dest='repeat', default=20,
+            help='Requests per scenario and harness.'),
+        make_option(
+            '--output', dest='output', default='benchmark.json',
+            help='File to write the results to.'),
+        make_option(
+            '--compare', dest='compare', default=None,
+            help='Results file of an earlier run to check for regressions.'),
+        make_option(
+            '--max-slowdown', type='float', dest='max_slowdown',
+            default=1.25,
+            help='Allowed ratio of median latency to the earlier run.'),
+        make_option(
+            '--max-new-queries', type='int', dest='max_new_queries',
+            default=0,
+            help='Allowed extra queries per request over the earlier run.'),
+        make_option(
+            '--with-page-cache', action='store_true', dest='page_cache',
+            default=False,
+            help='Leave the full page cache on.'),
+        make_option(
+            '--noinput', action='store_false', dest='interactive',
+            default=True,
+            help='Do not ask before replacing an old test database.'),
+    )
+
+    requires_system_checks = False
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a list of numbers.')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        verbosity = int(options['verbosity'])
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=verbosity, autoclobber=not options['interactive'],
+            serialize=False)
+
+        overrides = {'ALLOWED_HOSTS': ['*'], 'DEBUG': False}
+        if not options['page_cache']:
+            overrides['CACHES'] = dict(
+                settings.CACHES, pages=DUMMY_PAGE_CACHE)
+
+        try:
+            with override_settings(**overrides):
+                results = run_benchmarks(
+                    sizes, options['repeat'], stdout=self.stdout)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity)
+
+        with open(options['output'], 'w') as f:
+            json.dump({
+                'meta': {
+                    'date': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'repeat': options['repeat'],
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        self.stdout.write('Results written to %s' % options['output'])
+
+        if baseline is not None:
+            regressions = compare_results(
+                baseline, results, options['max_slowdown'],
+                options['max_new_queries'])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError('%d regression(s) against %s.' % (
+                    len(regressions), options['compare']))
+            self.stdout.write('No regressions against %s' % options['compare'])
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.assets import ASSETS_ROOT, AssetError, build_assets
+
+
+class Command(BaseCommand):
+    help = ("Bundles and minifies the site's CSS and JavaScript and works "
+            "out the critical CSS of each template. Run before "
+            "collectstatic.")
+
+    def handle(self, *args, **options):
+        try:
+            manifest = build_assets()
+        except AssetError as e:
+            raise CommandError(str(e))
+
+        for name, path in sorted(manifest['bundles'].items()):
+            self.stdout.write("{0} -> {1}".format(name, path))
+        self.stdout.write("Critical CSS for {0} template(s) in {1}.".format(
+            len(manifest['critical']), ASSETS_ROOT))
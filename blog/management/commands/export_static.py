@@ -0,0 +1,59 @@
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from blog.export import ExportError, export_site
+
+DUMMY_PAGE_CACHE = {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+class Command(BaseCommand):
+    args = '<output directory>'
+    help = ("Renders every public page to a directory of static files. "
+            "Only the contact form still needs Django.")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--host', dest='host', default='localhost',
+            help='Domain the export will be served from.'),
+        make_option(
+            '--secure', action='store_true', dest='secure', default=False,
+            help='The export will be served over https.'),
+        make_option(
+            '--incremental', action='store_true', dest='incremental',
+            default=False,
+            help='Only render the pages affected by changes since the '
+                 'last export to the same directory.'),
+        make_option(
+            '--processes', type='int', dest='processes', default=None,
+            help='Number of rendering processes (default: one per CPU).'),
+        make_option(
+            '--no-static', action='store_false', dest='static',
+            default=True,
+            help='Do not copy the collected static files.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Give the directory to export to.')
+
+        # Render straight from the database, not from cached pages
+        overrides = {
+            'ALLOWED_HOSTS': [options['host']],
+            'CACHES': dict(settings.CACHES, pages=DUMMY_PAGE_CACHE),
+        }
+        try:
+            with override_settings(**overrides):
+                written = export_site(
+                    args[0], options['host'], options['secure'],
+                    incremental=options['incremental'],
+                    processes=options['processes'],
+                    copy_static_files=options['static'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write("Wrote {0} file(s) to {1}.".format(written, args[0]))
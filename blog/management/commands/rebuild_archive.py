@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.archive import rebuild_archive
+from blog.models import ArchiveMonth
+
+
+class Command(BaseCommand):
+    help = "Recounts the published posts of every month in the archive."
+
+    def handle(self, *args, **options):
+        rebuild_archive()
+
+        self.stdout.write("Counted {0} month(s).".format(
+            ArchiveMonth.objects.count()))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from blog.search import index_post
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of every post."
+
+    def handle(self, *args, **options):
+        count = 0
+        for post in Post.objects.prefetch_related('tags').iterator():
+            index_post(post)
+            count += 1
+
+        self.stdout.write("Indexed {0} post(s).".format(count))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import TagCount
+from blog.tags import rebuild_tag_counts
+
+
+class Command(BaseCommand):
+    help = "Recounts the published posts of every tag."
+
+    def handle(self, *args, **options):
+        rebuild_tag_counts()
+
+        self.stdout.write("Counted {0} tag(s).".format(
+            TagCount.objects.count()))
@@ -0,0 +1,53 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from taggit.models import Tag
+
+from blog.cache import invalidate
+from blog.models import EXCERPT_VERSION, Post, render_post_fields
+from blog.signals import feed_namespaces, post_namespaces
+from blog.tags import post_tag_ids
+
+
+class Command(BaseCommand):
+    help = ("Re-renders the stored HTML and excerpts of every post. "
+            "Run this after changing MARKDOWN_DEUX_STYLES.")
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--stale', action='store_true', dest='stale', default=False,
+            help='Only re-render posts whose excerpts are out of date.'),
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        namespaces = set()
+        tag_ids = set()
+        posts = Post.objects.all()
+        if options['stale']:
+            posts = posts.filter(excerpt_version__lt=EXCERPT_VERSION)
+
+        with transaction.atomic():
+            # Bump updated so the ETags and Last-Modified dates change
+            now = timezone.now()
+            rows = posts.values_list(
+                'pk', 'slug', 'category__slug', 'published', 'content')
+            for pk, slug, category_slug, published, content in rows:
+                Post.objects.filter(pk=pk).update(
+                    updated=now, **render_post_fields(content))
+                namespaces.update(post_namespaces(slug, category_slug))
+                if published:
+                    namespaces.update(feed_namespaces(category_slug))
+                    namespaces.add('archive')
+                tag_ids.update(post_tag_ids(pk))
+                count += 1
+
+        slugs = Tag.objects.filter(pk__in=tag_ids).values_list(
+            'slug', flat=True)
+        namespaces.update('tag:%s' % slug for slug in slugs)
+        if namespaces:
+            invalidate(*namespaces)
+
+        self.stdout.write("Rendered {0} post(s).".format(count))
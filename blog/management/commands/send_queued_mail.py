@@ -0,0 +1,48 @@
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from blog import mail
+
+
+class Command(BaseCommand):
+    help = "Sends the mail queued by the contact form."
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--batch-size', type='int', dest='batch_size',
+            default=mail.BATCH_SIZE,
+            help='Number of messages sent over one connection.'),
+        make_option(
+            '--max-attempts', type='int', dest='max_attempts',
+            default=mail.MAX_ATTEMPTS,
+            help='Give up on a message after this many failures.'),
+        make_option(
+            '--loop', action='store_true', dest='loop', default=False,
+            help='Keep polling the queue instead of exiting once empty.'),
+        make_option(
+            '--interval', type='float', dest='interval', default=10,
+            help='Seconds to wait between polls with --loop.'),
+    )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.drain(options)
+            if sent or failed:
+                self.stdout.write(
+                    "Sent {0} message(s), {1} failed.".format(sent, failed))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def drain(self, options):
+        """Send batches until nothing that is due is left."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = mail.send_queued_mail(
+                options['batch_size'], options['max_attempts'])
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < options['batch_size']:
+                return total_sent, total_failed
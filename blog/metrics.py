@@ -0,0 +1,115 @@
+"""
+Per request performance measurements.
+
+`PerformanceMiddleware` (in blog.middleware) starts a fresh set of timers
+for every request. Code that does expensive work wraps it in
+``with timer('name'):`` and the total time per name ends up in the
+request's Server-Timing header and log line. Wall times are also kept in
+a rolling window per URL name, which the staff-only metrics view reports
+as percentiles.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Number of recent requests kept per URL name
+WINDOW = getattr(settings, 'BLOG_METRICS_WINDOW', 1000)
+
+_local = threading.local()
+_durations = {}
+_durations_lock = threading.Lock()
+
+
+def start_timers():
+    _local.timings = defaultdict(float)
+    _local.depth = defaultdict(int)
+
+
+def stop_timers():
+    """Return the times recorded since `start_timers`, in milliseconds."""
+    timings = getattr(_local, 'timings', {})
+    _local.timings = None
+    return dict(timings)
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in the block to the current request's `name`.
+
+    Nested blocks with the same name are only counted once.
+    """
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+
+    _local.depth[name] += 1
+    start = time.time()
+    try:
+        yield
+    finally:
+        _local.depth[name] -= 1
+        if not _local.depth[name]:
+            timings[name] += (time.time() - start) * 1000
+
+
+def record(url_name, duration):
+    """Add a request's wall time to the rolling window for `url_name`."""
+    try:
+        window = _durations[url_name]
+    except KeyError:
+        with _durations_lock:
+            window = _durations.setdefault(url_name, deque(maxlen=WINDOW))
+    window.append(duration)
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = int(math.ceil(fraction * len(ordered))) - 1
+    return ordered[max(index, 0)]
+
+
+def summary():
+    """Return request count and p50/p95/p99 wall times per URL name."""
+    result = {}
+    for url_name, window in list(_durations.items()):
+        ordered = sorted(window)
+        if not ordered:
+            continue
+        result[url_name] = {
+            'count': len(ordered),
+            'p50': percentile(ordered, 0.50),
+            'p95': percentile(ordered, 0.95),
+            'p99': percentile(ordered, 0.99),
+        }
+    return result
+
+
+def reset():
+    with _durations_lock:
+        _durations.clear()
+
+
+_templates_instrumented = False
+
+
+def instrument_templates():
+    """Time every template render under the 'template' timer."""
+    global _templates_instrumented
+    if _templates_instrumented:
+        return
+
+    from django.template.base import Template
+
+    original_render = Template.render
+
+    def render(self, context):
+        with timer('template'):
+            return original_render(self, context)
+
+    Template.render = render
+    _templates_instrumented = True
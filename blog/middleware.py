@@ -0,0 +1,215 @@
+import json
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.urlresolvers import Resolver404, resolve
+from django.db import connections
+from django.utils.decorators import available_attrs
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+logger = logging.getLogger('blog.performance')
+
+
+class CountingCursor(object):
+    """Wraps a cursor to count and time its queries into `stats`.
+
+    Unlike Django's debug cursor it keeps no copy of the SQL, so it is
+    cheap enough to use on every request.
+    """
+
+    def __init__(self, cursor, stats):
+        self.cursor = cursor
+        self.stats = stats
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return self.cursor.__exit__(type, value, traceback)
+
+    def timed(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            self.stats['count'] += 1
+            self.stats['time'] += time.time() - start
+
+    def execute(self, sql, params=None):
+        return self.timed(self.cursor.execute, sql, params)
+
+    def executemany(self, sql, param_list):
+        return self.timed(self.cursor.executemany, sql, param_list)
+
+
+def counting_cursors(connection, stats):
+    """Have `connection` hand out CountingCursors until
+    `restore_cursors` is called."""
+    # In case an exception skipped the restore of an earlier request
+    restore_cursors(connection)
+    cursor = connection.cursor
+
+    def counting_cursor():
+        return CountingCursor(cursor(), stats)
+    connection.cursor = counting_cursor
+
+
+def restore_cursors(connection):
+    connection.__dict__.pop('cursor', None)
+
+
+class PerformanceMiddleware(object):
+    """Measure where the time of each request goes.
+
+    Records wall time, number and duration of SQL queries, template and
+    Markdown render time. They are sent back in a ``Server-Timing`` header,
+    logged as one JSON line per request and aggregated per URL name for
+    the metrics view. Put it first in MIDDLEWARE_CLASSES so the wall time
+    covers the other middleware too.
+    """
+
+    def __init__(self):
+        metrics.instrument_templates()
+
+    def process_request(self, request):
+        request._performance = {
+            'start': time.time(),
+            'sql': {'count': 0, 'time': 0.0},
+        }
+        for connection in connections.all():
+            counting_cursors(connection, request._performance['sql'])
+        metrics.start_timers()
+
+    def sql_stats(self, request):
+        for connection in connections.all():
+            restore_cursors(connection)
+        stats = request._performance['sql']
+        return stats['count'], stats['time'] * 1000
+
+    def process_response(self, request, response):
+        state = getattr(request, '_performance', None)
+        if state is None:
+            # An earlier middleware answered before process_request ran
+            return response
+
+        timings = metrics.stop_timers()
+        total = (time.time() - state['start']) * 1000
+        sql_count, sql_time = self.sql_stats(request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = resolver_match.view_name if resolver_match else None
+        if url_name:
+            metrics.record(url_name, total)
+
+        response['Server-Timing'] = ', '.join([
+            'total;dur=%.1f' % total,
+            'db;dur=%.1f;desc="%d queries"' % (sql_time, sql_count),
+            'template;dur=%.1f' % timings.get('template', 0),
+            'markdown;dur=%.1f' % timings.get('markdown', 0),
+        ])
+        logger.info(json.dumps({
+            'path': request.path,
+            'url_name': url_name,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total, 1),
+            'sql_count': sql_count,
+            'sql_ms': round(sql_time, 1),
+            'template_ms': round(timings.get('template', 0), 1),
+            'markdown_ms': round(timings.get('markdown', 0), 1),
+        }, sort_keys=True))
+        return response
+
+
+def public_view(view_func):
+    """Mark a view as safe to serve without sessions, auth, CSRF and
+    messages. It must not depend on the user nor render a form."""
+    @wraps(view_func, assigned=available_attrs(view_func))
+    def wrapped_view(*args, **kwargs):
+        return view_func(*args, **kwargs)
+    wrapped_view.public_view = True
+    return wrapped_view
+
+
+class PublicViewMiddleware(object):
+    """Run the SESSION_MIDDLEWARE_CLASSES, except for anonymous readers
+    of public views.
+
+    A GET or HEAD of a view marked with `public_view`, from a client
+    without a session cookie, gets an AnonymousUser and an empty session
+    and skips the wrapped middleware entirely: no session lookup, no
+    cookies set and no ``Vary: Cookie``, so the response can be shared
+    by a CDN or reverse proxy. Every other request goes through the
+    wrapped middleware as if it were listed in MIDDLEWARE_CLASSES.
+    """
+
+    def __init__(self):
+        self.middleware = []
+        for path in settings.SESSION_MIDDLEWARE_CLASSES:
+            try:
+                self.middleware.append(import_string(path)())
+            except MiddlewareNotUsed:
+                pass
+
+    def methods(self, name):
+        return [
+            getattr(middleware, name) for middleware in self.middleware
+            if hasattr(middleware, name)]
+
+    def is_public(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return getattr(match.func, 'public_view', False)
+
+    def process_request(self, request):
+        request.public_view = self.is_public(request)
+        if request.public_view:
+            request.session = SessionBase()
+            request.user = AnonymousUser()
+            return None
+        for method in self.methods('process_request'):
+            response = method(request)
+            if response is not None:
+                return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(request, 'public_view', False):
+            return None
+        for method in self.methods('process_view'):
+            response = method(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+
+    def process_exception(self, request, exception):
+        if getattr(request, 'public_view', False):
+            return None
+        for method in reversed(self.methods('process_exception')):
+            response = method(request, exception)
+            if response is not None:
+                return response
+
+    def process_response(self, request, response):
+        if getattr(request, 'public_view', False):
+            return response
+        for method in reversed(self.methods('process_response')):
+            response = method(request, response)
+        return response
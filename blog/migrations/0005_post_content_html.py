@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import markdown_deux
+
+
+def render_content(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    for post in Post.objects.all():
+        post.content_html = markdown_deux.markdown(post.content, 'trusted')
+        post.save(update_fields=['content_html'])
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_auto_20141113_1658'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(default='', editable=False, blank=True),
+            preserve_default=False,
+        ),
+        migrations.RunPython(render_content, noop),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def build_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    for post in Post.objects.all():
+        truncator = Truncator(post.content_html)
+        post.excerpt_short = strip_tags(truncator.words(30, html=True))
+        post.excerpt_long = strip_tags(truncator.words(50, html=True))
+        post.excerpt_version = 1
+        post.save(update_fields=[
+            'excerpt_short', 'excerpt_long', 'excerpt_version'])
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_content_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_long',
+            field=models.TextField(default='', editable=False, blank=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_short',
+            field=models.TextField(default='', editable=False, blank=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+            preserve_default=True,
+        ),
+        migrations.RunPython(build_excerpts, noop),
+    ]
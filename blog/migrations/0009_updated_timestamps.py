@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+def backfill_updated(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated=models.F('created'))
+
+
+def restore_sqlite_indexes(apps, schema_editor):
+    # Django 1.7 loses the index_together indexes when SQLite rebuilds
+    # the table to add a column, so put them back.
+    if schema_editor.connection.vendor == 'sqlite':
+        Post = apps.get_model('blog', 'Post')
+        schema_editor.alter_index_together(
+            Post, [('category', 'updated')], Post._meta.index_together)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_published_partial_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, auto_now=True, db_index=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(default=django.utils.timezone.now, auto_now=True, db_index=True),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated, noop),
+        migrations.AlterIndexTogether(
+            name='post',
+            index_together=set([('category', 'published', 'created'), ('published', 'created'), ('category', 'updated')]),
+        ),
+        migrations.RunPython(restore_sqlite_indexes, noop),
+    ]
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+from collections import defaultdict
+
+from django.db import models, migrations
+from django.utils.html import strip_tags
+from django.utils.six.moves import html_parser
+
+# A copy of the tokenizer in blog.search as it was when this migration
+# was written, so that later changes to it cannot break the migration.
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have i if in into is it its
+    of on or so that the their then there these this to was we were will
+    with you your
+""".split())
+
+WEIGHTS = {
+    'title': 10,
+    'tags': 6,
+    'subtitle': 4,
+    'meta_desc': 2,
+    'body': 1,
+}
+MAX_BODY_OCCURRENCES = 10
+
+MAX_TERM_LENGTH = 50
+
+
+def tokenize(text):
+    terms = (word.lower()[:MAX_TERM_LENGTH] for word in WORD_RE.findall(text))
+    return [term for term in terms if len(term) > 1 and term not in STOP_WORDS]
+
+
+def build_terms(title, subtitle, meta_desc, tags, html):
+    weights = defaultdict(int)
+    for part, text in [('title', title), ('subtitle', subtitle),
+                       ('meta_desc', meta_desc), ('tags', ' '.join(tags))]:
+        for term in tokenize(text):
+            weights[term] += WEIGHTS[part]
+
+    body_counts = defaultdict(int)
+    body = html_parser.HTMLParser().unescape(strip_tags(html))
+    for term in tokenize(body):
+        body_counts[term] += 1
+    for term, count in body_counts.items():
+        weights[term] += min(count, MAX_BODY_OCCURRENCES) * WEIGHTS['body']
+    return weights
+
+
+def build_index(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    SearchTerm = apps.get_model('blog', 'SearchTerm')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    for post in Post.objects.all():
+        tags = TaggedItem.objects.filter(
+            content_type__app_label='blog', content_type__model='post',
+            object_id=post.pk).values_list('tag__name', flat=True)
+        terms = build_terms(
+            post.title, post.subtitle, post.meta_desc, tags,
+            post.content_html)
+        SearchTerm.objects.bulk_create(
+            SearchTerm(post=post, term=term, weight=weight)
+            for term, weight in terms.items())
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_outgoingmessage'),
+        ('contenttypes', '0001_initial'),
+        ('taggit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(related_name='search_terms', to='blog.Post')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='searchterm',
+            unique_together=set([('term', 'post')]),
+        ),
+        migrations.RunPython(build_index, noop),
+    ]
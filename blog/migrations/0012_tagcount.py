@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.db.models import Count
+
+
+def count_tags(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Tag = apps.get_model('taggit', 'Tag')
+    TagCount = apps.get_model('blog', 'TagCount')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    counts = dict(TaggedItem.objects.filter(
+        content_type__app_label='blog', content_type__model='post',
+        object_id__in=Post.objects.filter(published=True).values('pk'),
+    ).values_list('tag_id').annotate(count=Count('id')).order_by())
+    TagCount.objects.bulk_create(
+        TagCount(tag=tag, name=tag.name, slug=tag.slug,
+                 count=counts.get(tag.pk, 0))
+        for tag in Tag.objects.all())
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('taggit', '0001_initial'),
+        ('blog', '0011_searchterm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCount',
+            fields=[
+                ('tag', models.OneToOneField(related_name='post_count', primary_key=True, serialize=False, to='taggit.Tag')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True, max_length=100)),
+                ('count', models.PositiveIntegerField(default=0, db_index=True)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.RunPython(count_tags, noop),
+    ]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.db import models, migrations
+from django.utils import timezone
+
+
+def count_months(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ArchiveMonth = apps.get_model('blog', 'ArchiveMonth')
+    counts = Counter()
+    for created in Post.objects.filter(published=True).values_list(
+            'created', flat=True).iterator():
+        local = timezone.localtime(created)
+        counts[local.year, local.month] += 1
+    ArchiveMonth.objects.bulk_create(
+        ArchiveMonth(year=year, month=month, count=count)
+        for (year, month), count in counts.items())
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_tagcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivemonth',
+            unique_together=set([('year', 'month')]),
+        ),
+        migrations.RunPython(count_months, noop),
+    ]
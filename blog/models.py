@@ -1,8 +1,86 @@
+from datetime import date
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
 
+import markdown_deux
 from taggit.managers import TaggableManager
+from taggit.models import Tag
+
+from .metrics import timer
+
+# The MARKDOWN_DEUX_STYLES entry used to render post bodies
+MARKDOWN_STYLE = "trusted"
+
+# Bump whenever the way excerpts are built changes, so that
+# `manage.py render_posts --stale` knows which posts to rebuild.
+EXCERPT_VERSION = 1
+
+# Word counts of the excerpts shown on the category and home pages
+EXCERPT_SHORT_WORDS = 30
+EXCERPT_LONG_WORDS = 50
+
+
+def render_markdown(text):
+    """Render Markdown text to HTML using the blog's markdown style."""
+    with timer('markdown'):
+        return markdown_deux.markdown(text, MARKDOWN_STYLE)
+
+
+def make_excerpt(html, words):
+    """Return the first `words` words of `html` as plain text."""
+    return strip_tags(Truncator(html).words(words, html=True))
+
+
+def render_post_fields(content):
+    """Build the stored HTML and excerpts of a post from its Markdown.
+
+    Returns a dict of field values suitable for `Post.objects.update()`.
+    """
+    html = render_markdown(content)
+    return {
+        'content_html': html,
+        'excerpt_short': make_excerpt(html, EXCERPT_SHORT_WORDS),
+        'excerpt_long': make_excerpt(html, EXCERPT_LONG_WORDS),
+        'excerpt_version': EXCERPT_VERSION,
+    }
+
+
+class PostQuerySet(models.QuerySet):
+
+    def published(self):
+        """Published posts, with the relations the templates use loaded.
+
+        The Markdown source is never shown to readers, so it is deferred.
+        """
+        return self.filter(published=True).select_related(
+            'category', 'author').prefetch_related('tags').defer('content')
+
+    def listing(self):
+        """Published posts for listing pages, which only show excerpts."""
+        return self.published().defer('content', 'content_html')
+
+    def last_modified(self):
+        """When any of these posts last changed, for cache validation.
+
+        Call it on all posts, not just published ones, so that
+        unpublishing a post also counts as a change.
+        """
+        return self.aggregate(latest=Max('updated'))['latest']
+
+    def changes(self):
+        """``(last_modified(), number of posts)``, for the validators of
+        listings: deleting a post changes the count but not necessarily
+        the latest update."""
+        result = self.aggregate(latest=Max('updated'), count=Count('id'))
+        if result['latest'] is None:
+            return None
+        return result['latest'], result['count']
 
 
 class Post(models.Model):
@@ -10,24 +88,51 @@ class Post(models.Model):
     slug = models.SlugField(max_length=100, unique=True)
     subtitle = models.CharField(max_length=200, blank=True)
     content = models.TextField()
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt_short = models.TextField(blank=True, editable=False)
+    excerpt_long = models.TextField(blank=True, editable=False)
+    excerpt_version = models.PositiveSmallIntegerField(
+        default=0, editable=False)
     created = models.DateTimeField(db_index=True, auto_now_add=True)
+    updated = models.DateTimeField(db_index=True, auto_now=True)
     tags = TaggableManager(blank=True)
     meta_desc = models.TextField(blank=True)
     author = models.ForeignKey(User)
     category = models.ForeignKey('Category')
     published = models.BooleanField(default=False)
 
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        # Every public query filters on published and sorts by created,
+        # the category pages also filter on the category.
+        index_together = [
+            ['published', 'created'],
+            ['category', 'published', 'created'],
+            ['category', 'updated'],
+        ]
+
     def __unicode__(self):
         return "%s" % self.title
 
+    def save(self, *args, **kwargs):
+        self.render_content()
+        super(Post, self).save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post', args=[str(self.slug)])
 
+    def render_content(self):
+        """Regenerate the stored HTML and excerpts from the content."""
+        for field, value in render_post_fields(self.content).items():
+            setattr(self, field, value)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True)
     description = models.TextField(blank=True)
+    updated = models.DateTimeField(db_index=True, auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -35,5 +140,86 @@ class Category(models.Model):
     def __unicode__(self):
         return "%s" % self.name
 
+    def save(self, *args, **kwargs):
+        super(Category, self).save(*args, **kwargs)
+        # The category is shown alongside each of its posts, so they
+        # have changed too.
+        self.post_set.update(updated=self.updated)
+
     def get_absolute_url(self):
         return reverse('category', args=[str(self.slug)])
+
+
+class SearchTerm(models.Model):
+    """One entry of the full-text search index, see blog.search."""
+    post = models.ForeignKey(Post, related_name='search_terms')
+    term = models.CharField(max_length=50)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = [('term', 'post')]
+
+    def __unicode__(self):
+        return "%s" % self.term
+
+
+class TagCount(models.Model):
+    """The number of published posts with a tag, see blog.tags."""
+    tag = models.OneToOneField(
+        Tag, primary_key=True, related_name='post_count')
+    # Copied from the tag so the tag cloud needs no join
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    count = models.PositiveIntegerField(default=0, db_index=True)
+
+    def __unicode__(self):
+        return "%s (%d)" % (self.name, self.count)
+
+    def get_absolute_url(self):
+        return reverse('tag', args=[str(self.slug)])
+
+
+class OutgoingMessage(models.Model):
+    """An email waiting to be sent by `manage.py send_queued_mail`."""
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    # Comma separated list of addresses
+    recipients = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    sent = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt = models.DateTimeField(default=timezone.now, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['next_attempt']
+
+    def __unicode__(self):
+        return "%s" % self.subject
+
+    @property
+    def recipient_list(self):
+        return [address for address in self.recipients.split(',') if address]
+
+
+class ArchiveMonth(models.Model):
+    """The number of published posts of a month, see blog.archive."""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('year', 'month')]
+        ordering = ['-year', '-month']
+
+    def __unicode__(self):
+        return "%d-%02d (%d)" % (self.year, self.month, self.count)
+
+    @property
+    def first_day(self):
+        return date(self.year, self.month, 1)
+
+    def get_absolute_url(self):
+        return reverse('archive_month', args=[
+            str(self.year), '%02d' % self.month])
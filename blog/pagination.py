@@ -0,0 +1,191 @@
+"""
+Keyset (cursor) pagination for post listings.
+
+Pages are addressed by the ``(created, id)`` pair of a post instead of an
+``OFFSET``, so moving to the next or previous page costs the same however
+deep into the archive it is and never needs a ``COUNT(*)``.
+
+URLs look like ``?before=<cursor>`` (older posts) and ``?after=<cursor>``
+(newer posts). The old ``?page=N`` links are still honoured.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _epoch():
+    if settings.USE_TZ:
+        return datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return datetime(1970, 1, 1)
+
+
+def encode_cursor(post):
+    """Return the cursor string identifying `post`'s position."""
+    delta = post.created - _epoch()
+    microseconds = (delta.days * 86400 + delta.seconds) * 10 ** 6
+    microseconds += delta.microseconds
+    return '{0}-{1}'.format(microseconds, post.pk)
+
+
+def decode_cursor(value):
+    """Return the ``(created, id)`` pair encoded in a cursor string."""
+    try:
+        microseconds, pk = [int(part) for part in value.split('-')]
+        return _epoch() + timedelta(microseconds=microseconds), pk
+    except (AttributeError, ValueError, OverflowError):
+        raise InvalidCursor(value)
+
+
+class CursorPage(object):
+    """A page of posts, usable in templates much like a Paginator page."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        """Cursor for the page of older posts."""
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        """Cursor for the page of newer posts."""
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+
+
+class CursorPaginator(object):
+    """Paginates a Post queryset newest first on ``(created, id)``.
+
+    Like Django's Paginator, the last page absorbs up to `orphans`
+    extra posts rather than leaving them on a page of their own.
+    """
+
+    def __init__(self, queryset, per_page, orphans=0):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.orphans = orphans
+
+    def _newest_first(self, queryset):
+        """Fetch one page going back in time, merging any orphans."""
+        limit = self.per_page + self.orphans
+        posts = list(queryset.order_by('-created', '-id')[:limit + 1])
+        if len(posts) > limit:
+            return posts[:self.per_page], True
+        return posts, False
+
+    def first_page(self):
+        posts, has_next = self._newest_first(self.queryset)
+        return CursorPage(posts, has_next=has_next, has_previous=False)
+
+    def _older(self, created, pk):
+        return self.queryset.filter(
+            Q(created__lt=created) | Q(created=created, id__lt=pk))
+
+    def _newer(self, created, pk):
+        return self.queryset.filter(
+            Q(created__gt=created) | Q(created=created, id__gt=pk))
+
+    def page_before(self, cursor):
+        """The page of posts older than `cursor`.
+
+        A cursor older than every post (e.g. from a stale link) delivers
+        the last page.
+        """
+        posts, has_next = self._newest_first(
+            self._older(*decode_cursor(cursor)))
+        if not posts:
+            return self.last_page()
+        return CursorPage(
+            posts, has_next=has_next,
+            has_previous=self._newer(posts[0].created, posts[0].pk).exists())
+
+    def page_after(self, cursor):
+        """The page of posts newer than `cursor`.
+
+        A cursor newer than every post delivers the first page.
+        """
+        newer = self._newer(*decode_cursor(cursor))
+        posts = list(newer.order_by('created', 'id')[:self.per_page + 1])
+        if not posts:
+            return self.first_page()
+        has_previous = len(posts) > self.per_page
+        posts = posts[:self.per_page][::-1]
+        return CursorPage(
+            posts,
+            has_next=self._older(posts[-1].created, posts[-1].pk).exists(),
+            has_previous=has_previous)
+
+    def last_page(self):
+        """The page holding the oldest posts."""
+        posts = list(
+            self.queryset.order_by('created', 'id')[:self.per_page + 1])
+        has_previous = len(posts) > self.per_page
+        posts = posts[:self.per_page][::-1]
+        return CursorPage(posts, has_next=False, has_previous=has_previous)
+
+    def page_number(self, number):
+        """Compatibility shim for the old ``?page=N`` links.
+
+        This still uses an OFFSET, but only for the page that was asked
+        for; the links on the returned page are cursor based.
+        """
+        if number < 1:
+            return self.last_page()
+        if number == 1:
+            return self.first_page()
+
+        offset = (number - 1) * self.per_page
+        limit = self.per_page + self.orphans
+        posts = list(self.queryset.order_by(
+            '-created', '-id')[offset:offset + limit + 1])
+        if not posts:
+            # If page is out of range (e.g. 9999), deliver last page.
+            return self.last_page()
+        if len(posts) > limit:
+            return CursorPage(
+                posts[:self.per_page], has_next=True, has_previous=True)
+        return CursorPage(posts, has_next=False, has_previous=True)
+
+    def page_for_request(self, request):
+        """Return the page addressed by the request's query string.
+
+        Anything that cannot be understood delivers the first page.
+        """
+        try:
+            if 'before' in request.GET:
+                return self.page_before(request.GET['before'])
+            if 'after' in request.GET:
+                return self.page_after(request.GET['after'])
+            if 'page' in request.GET:
+                return self.page_number(int(request.GET['page']))
+        except (InvalidCursor, ValueError):
+            pass
+        return self.first_page()
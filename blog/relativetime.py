@@ -0,0 +1,100 @@
+"""
+"Posted 3 days ago" without pages that change every minute.
+
+In the default ``client`` mode the relative_time tag writes the date in
+a ``<time datetime>`` element and relative-time.js turns it into "3
+minutes ago" in the browser, so a page's HTML only changes when its
+posts do.
+
+In ``server`` mode the relative time is written into the page, rounded
+to a bucket of whole days ("yesterday", "3 weeks ago"). Buckets only
+change at midnight, and a page expires when the first of its buckets
+does: `relative_time_page` gives the response an Expires header and the
+matching ``Cache-Control: max-age``, and the page cache keeps it no
+longer. `with_relative_times` makes such pages count as modified at
+the start of each day, so conditional GETs don't hand back stale text.
+"""
+from calendar import timegm
+from datetime import datetime, time, timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.decorators import available_attrs
+from django.utils.http import http_date
+
+from .cache import refresh_max_age
+
+RELATIVE_TIME = getattr(settings, 'BLOG_RELATIVE_TIME', 'client')
+
+# (first day, last day, width in days, singular, plural) of the buckets
+# from a day on. Buckets end early where the next one takes over.
+BUCKETS = [
+    (2, 6, 1, None, '%d days ago'),
+    (7, 29, 7, 'a week ago', '%d weeks ago'),
+    (30, 364, 30, 'a month ago', '%d months ago'),
+    (365, None, 365, 'a year ago', '%d years ago'),
+]
+
+
+def local_midnight(day):
+    return timezone.make_aware(
+        datetime.combine(day, time()), timezone.get_current_timezone())
+
+
+def coarse_relative_time(value, now=None):
+    """``(text, expires)``: how long ago `value` was, in whole days, and
+    the time at which that text changes."""
+    now = now or timezone.now()
+    day = timezone.localtime(value).date()
+    days = max((timezone.localtime(now).date() - day).days, 0)
+    if days == 0:
+        return 'today', local_midnight(day + timedelta(days=1))
+    if days == 1:
+        return 'yesterday', local_midnight(day + timedelta(days=2))
+    for first, last, width, singular, plural in BUCKETS:
+        if last is None or days <= last:
+            count = days // width
+            text = singular if count == 1 and singular else plural % count
+            changes = (count + 1) * width
+            if last is not None:
+                changes = min(changes, last + 1)
+            return text, local_midnight(day + timedelta(days=changes))
+
+
+def note_expiry(request, expires):
+    """Record that the page being rendered for `request` is out of date
+    at `expires`."""
+    current = getattr(request, '_relative_time_expires', None)
+    if current is None or expires < current:
+        request._relative_time_expires = expires
+
+
+def relative_time_page(view_func):
+    """Let a view's responses expire with the relative times on them."""
+    @wraps(view_func, assigned=available_attrs(view_func))
+    def _wrapped_view(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        expires = getattr(request, '_relative_time_expires', None)
+        if expires is not None and response.status_code == 200:
+            response['Expires'] = http_date(timegm(expires.utctimetuple()))
+            refresh_max_age(response)
+        return response
+    return _wrapped_view
+
+
+def with_relative_times(last_modified_func):
+    """Wrap a `conditional_page` validator for pages using relative_time.
+
+    In server mode the text of such a page changes at midnight, so it
+    counts as modified at the start of the day at the latest.
+    """
+    def last_modified(request, *args, **kwargs):
+        value = last_modified_func(request, *args, **kwargs)
+        if value is None or RELATIVE_TIME != 'server':
+            return value
+        midnight = local_midnight(timezone.localtime(timezone.now()).date())
+        if isinstance(value, tuple):
+            return (max(value[0], midnight),) + value[1:]
+        return max(value, midnight)
+    return last_modified
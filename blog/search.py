@@ -0,0 +1,165 @@
+"""
+Full-text search over posts.
+
+Each post is broken into terms, stored in the SearchTerm table with a
+weight that favours matches in the title and tags over the body. A
+search is then one indexed query: fetch the posts holding any of the
+query's terms, ranked by their summed weights. The table is kept up to
+date as posts and their tags are saved (see blog.signals) and can be
+rebuilt with ``manage.py rebuild_search_index``.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+from django.utils.six.moves import html_parser
+
+from .models import Post, SearchTerm
+from .pagination import CursorPage, InvalidCursor, decode_cursor, encode_cursor
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have i if in into is it its
+    of on or so that the their then there these this to was we were will
+    with you your
+""".split())
+
+# How much one occurrence of a term in each part of a post counts
+WEIGHTS = {
+    'title': 10,
+    'tags': 6,
+    'subtitle': 4,
+    'meta_desc': 2,
+    'body': 1,
+}
+# Repeating a word over and over in the body should not win searches
+MAX_BODY_OCCURRENCES = 10
+
+MAX_TERM_LENGTH = 50
+SNIPPET_WORDS = 30
+
+
+def plain_text(html):
+    """Strip the tags from `html` and decode its entities."""
+    return html_parser.HTMLParser().unescape(strip_tags(html))
+
+
+def normalize(word):
+    return word.lower()[:MAX_TERM_LENGTH]
+
+
+def tokenize(text):
+    """Return the searchable terms in `text`, in order."""
+    terms = (normalize(word) for word in WORD_RE.findall(text))
+    return [term for term in terms if len(term) > 1 and term not in STOP_WORDS]
+
+
+def build_terms(title, subtitle, meta_desc, tags, html):
+    """Return a ``{term: weight}`` dict for the parts of a post."""
+    weights = defaultdict(int)
+    for part, text in [('title', title), ('subtitle', subtitle),
+                       ('meta_desc', meta_desc), ('tags', ' '.join(tags))]:
+        for term in tokenize(text):
+            weights[term] += WEIGHTS[part]
+
+    body_counts = defaultdict(int)
+    for term in tokenize(plain_text(html)):
+        body_counts[term] += 1
+    for term, count in body_counts.items():
+        weights[term] += min(count, MAX_BODY_OCCURRENCES) * WEIGHTS['body']
+    return weights
+
+
+def index_post(post):
+    """Replace the search terms stored for `post`."""
+    terms = build_terms(
+        post.title, post.subtitle, post.meta_desc,
+        post.tags.names(), post.content_html)
+    with transaction.atomic():
+        SearchTerm.objects.filter(post=post).delete()
+        SearchTerm.objects.bulk_create(
+            SearchTerm(post=post, term=term, weight=weight)
+            for term, weight in terms.items())
+
+
+def encode_search_cursor(post):
+    return '{0}-{1}'.format(post.score, encode_cursor(post))
+
+
+def decode_search_cursor(value):
+    try:
+        score, cursor = value.split('-', 1)
+        return int(score), decode_cursor(cursor)
+    except (AttributeError, ValueError):
+        raise InvalidCursor(value)
+
+
+class SearchPage(CursorPage):
+    """A page of search results, ranked best first."""
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_search_cursor(self.object_list[-1])
+
+    previous_cursor = None
+
+
+def search(query, cursor=None, per_page=10):
+    """Return a SearchPage of the published posts matching `query`.
+
+    Every result carries its `score` and a highlighted `snippet`.
+    Passing the `next_cursor` of a page returns the page after it.
+    """
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return SearchPage([], has_next=False, has_previous=False)
+
+    results = Post.objects.published().defer(
+        'excerpt_short', 'excerpt_long').filter(
+        search_terms__term__in=terms).annotate(
+        score=Sum('search_terms__weight'))
+
+    if cursor is not None:
+        score, (created, pk) = decode_search_cursor(cursor)
+        results = results.filter(
+            Q(score__lt=score) |
+            Q(score=score, created__lt=created) |
+            Q(score=score, created=created, id__lt=pk))
+
+    posts = list(results.order_by(
+        '-score', '-created', '-id')[:per_page + 1])
+    has_next = len(posts) > per_page
+    posts = posts[:per_page]
+    for post in posts:
+        post.snippet = highlight(plain_text(post.content_html), terms)
+    return SearchPage(
+        posts, has_next=has_next, has_previous=cursor is not None)
+
+
+def highlight(text, terms, length=SNIPPET_WORDS):
+    """Return an excerpt of `text` around the first of `terms` found, with
+    every occurrence of the terms wrapped in <mark>."""
+    words = text.split()
+    terms = set(terms)
+
+    def matches(word):
+        return any(normalize(w) in terms for w in WORD_RE.findall(word))
+
+    first = next(
+        (n for n, word in enumerate(words) if matches(word)), 0)
+    start = max(first - length // 3, 0)
+    window = words[start:start + length]
+
+    snippet = ' '.join(
+        '<mark>%s</mark>' % escape(word) if matches(word) else escape(word)
+        for word in window)
+    if start > 0:
+        snippet = '&hellip; ' + snippet
+    if start + length < len(words):
+        snippet += ' &hellip;'
+    return mark_safe(snippet)
@@ -0,0 +1,187 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .archive import post_month, recount_months
+from .cache import invalidate
+from .models import Category, Post, TagCount
+from .search import index_post
+from .tags import post_tag_ids, recount_tags
+
+
+def post_namespaces(slug, category_slug):
+    """The page cache namespaces showing a post."""
+    return ['index', 'post:%s' % slug, 'category:%s' % category_slug]
+
+
+def feed_namespaces(category_slug):
+    """The page cache namespaces of the feeds and sitemap listing a
+    published post."""
+    return ['feed', 'feed:%s' % category_slug, 'sitemap']
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_pages(sender, instance, raw, **kwargs):
+    """Note where the post used to appear before it is saved.
+
+    A changed slug or category leaves pages cached under the old values.
+    """
+    instance._previous_pages = []
+    if instance.pk and not raw:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'slug', 'category__slug', 'published').first()
+        if previous:
+            slug, category_slug, published = previous
+            instance._previous_pages = post_namespaces(slug, category_slug)
+            if published:
+                instance._previous_pages += feed_namespaces(category_slug)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    namespaces = set(post_namespaces(instance.slug, instance.category.slug))
+    # Drafts never appear in the feeds, so saving one leaves them cached
+    if instance.published:
+        namespaces.update(feed_namespaces(instance.category.slug))
+    namespaces.update(getattr(instance, '_previous_pages', []))
+    invalidate(*namespaces)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_pages(sender, instance, raw, **kwargs):
+    instance._previous_pages = []
+    if instance.pk and not raw:
+        previous = Category.objects.filter(pk=instance.pk).values_list(
+            'slug', flat=True).first()
+        if previous:
+            instance._previous_pages = [
+                'category:%s' % previous, 'feed:%s' % previous]
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    # The category's name is shown next to each of its posts everywhere
+    slugs = Post.objects.filter(category=instance).values_list(
+        'slug', flat=True)
+    namespaces = set('post:%s' % slug for slug in slugs)
+    namespaces.update(['index', 'archive', 'category:%s' % instance.slug])
+    namespaces.update(feed_namespaces(instance.slug))
+    namespaces.update(getattr(instance, '_previous_pages', []))
+    invalidate(*namespaces)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, raw, **kwargs):
+    if not raw:
+        index_post(instance)
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def update_search_index_tags(sender, instance, **kwargs):
+    """Taggit saves tags after the post, so index the post again."""
+    if kwargs.get('raw'):
+        return
+    if instance.content_type_id == ContentType.objects.get_for_model(Post).pk:
+        post = Post.objects.filter(pk=instance.object_id).first()
+        if post is not None:
+            index_post(post)
+
+
+def invalidate_tag_pages(tag_ids):
+    slugs = Tag.objects.filter(pk__in=tag_ids).values_list('slug', flat=True)
+    invalidate('tags', 'sitemap', *['tag:%s' % slug for slug in slugs])
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def update_tag_counts(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    if instance.content_type_id != ContentType.objects.get_for_model(Post).pk:
+        return
+    recount_tags([instance.tag_id])
+    invalidate_tag_pages([instance.tag_id])
+    # The post page lists its tags
+    post = Post.objects.filter(pk=instance.object_id).values_list(
+        'slug', flat=True).first()
+    if post is not None:
+        Post.objects.filter(pk=instance.object_id).update(
+            updated=timezone.now())
+        invalidate('post:%s' % post)
+
+
+@receiver(post_save, sender=Post)
+def update_post_tag_counts(sender, instance, raw, **kwargs):
+    """Publishing or unpublishing a post changes its tags' counts."""
+    if not raw:
+        tag_ids = post_tag_ids(instance.pk)
+        recount_tags(tag_ids)
+        invalidate_tag_pages(tag_ids)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_tags(sender, instance, **kwargs):
+    # Taggit leaves the tagged items of a deleted post behind, but note
+    # them before the post goes in case that ever changes.
+    instance._tag_ids = post_tag_ids(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def update_deleted_post_tag_counts(sender, instance, **kwargs):
+    tag_ids = getattr(instance, '_tag_ids', [])
+    recount_tags(tag_ids)
+    invalidate_tag_pages(tag_ids)
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_pages(sender, instance, raw, **kwargs):
+    instance._previous_pages = []
+    if instance.pk and not raw:
+        previous = Tag.objects.filter(pk=instance.pk).values_list(
+            'slug', flat=True).first()
+        if previous:
+            instance._previous_pages = ['tag:%s' % previous]
+
+
+@receiver(post_save, sender=Tag)
+def rename_tag_count(sender, instance, raw, **kwargs):
+    """Keep the copy of the tag's name and slug up to date."""
+    if raw:
+        return
+    TagCount.objects.filter(tag=instance).update(
+        name=instance.name, slug=instance.slug)
+    namespaces = set(['tags', 'sitemap', 'tag:%s' % instance.slug])
+    namespaces.update(getattr(instance, '_previous_pages', []))
+    invalidate(*namespaces)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_month(sender, instance, raw, **kwargs):
+    instance._previous_month = None
+    if instance.pk and not raw:
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'created', 'published').first()
+        if previous and previous[1]:
+            instance._previous_month = post_month(previous[0])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def update_archive_months(sender, instance, **kwargs):
+    """Recount the months the post is or was listed in."""
+    if kwargs.get('raw'):
+        return
+    months = set()
+    if instance.published and instance.created is not None:
+        months.add(post_month(instance.created))
+    if getattr(instance, '_previous_month', None):
+        months.add(instance._previous_month)
+    if months:
+        recount_months(months)
+        invalidate('archive')
@@ -0,0 +1,128 @@
+"""
+sitemap.xml and robots.txt.
+
+Crawlers get every post from the sitemap instead of walking the listing
+pages. ``/sitemap.xml`` is an index of the sections: one for the static,
+category, tag and archive pages, and one per block of SITEMAP_CHUNK_SIZE
+post ids, so no section grows past the size limits of the sitemap
+protocol. Rows are read with ``values_list().iterator()`` rather than as
+model instances, and every document is kept in the page cache under the
+``sitemap`` namespace until a published post, category or tag changes.
+"""
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.utils.html import escape
+
+from .cache import cache_public_page
+from .middleware import public_view
+from .models import ArchiveMonth, Category, Post, TagCount
+
+SITEMAP_CHUNK_SIZE = getattr(settings, 'BLOG_SITEMAP_CHUNK_SIZE', 5000)
+
+STATIC_PAGES = ['home', 'about', 'about_site', 'contact', 'tags']
+
+# Pages crawlers have no business in. The ?page=N links are still
+# honoured for old bookmarks, but are slow deep into the archive.
+DISALLOW = ['/admin/', '/performance/', '/search/', '/*?page=']
+
+
+def w3c_date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def render_xml(root, tag, entries):
+    """Build a <urlset> or <sitemapindex> document from
+    ``(location, lastmod)`` pairs."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        '<%s xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n' % root]
+    for location, lastmod in entries:
+        parts.append('<%s><loc>%s</loc>' % (tag, escape(location)))
+        if lastmod:
+            parts.append('<lastmod>%s</lastmod>' % w3c_date(lastmod))
+        parts.append('</%s>\n' % tag)
+    parts.append('</%s>\n' % root)
+    return HttpResponse(''.join(parts), content_type='application/xml')
+
+
+def post_chunks():
+    """``(chunk, lastmod)`` for each block of post ids holding a
+    published post, from a single grouped query."""
+    return Post.objects.filter(published=True).extra(
+        select={'chunk': '"blog_post"."id" / %s'},
+        select_params=[SITEMAP_CHUNK_SIZE],
+    ).values_list('chunk').annotate(lastmod=Max('updated')).order_by('chunk')
+
+
+@public_view
+@cache_public_page('sitemap')
+def sitemap_index(request):
+    chunks = list(post_chunks())
+    # The category pages change whenever one of their posts does
+    latest = max([lastmod for chunk, lastmod in chunks] or [None])
+    sections = [(reverse('sitemap_pages'), latest)]
+    sections.extend(
+        (reverse('sitemap_posts', args=[chunk]), lastmod)
+        for chunk, lastmod in chunks)
+    return render_xml('sitemapindex', 'sitemap', (
+        (request.build_absolute_uri(location), lastmod)
+        for location, lastmod in sections))
+
+
+@public_view
+@cache_public_page('sitemap')
+def sitemap_pages(request):
+    """The static pages, categories, tags and archive pages."""
+    def entries():
+        for name in STATIC_PAGES:
+            yield reverse(name), None
+        latest = dict(Post.objects.filter(published=True).values_list(
+            'category').annotate(Max('updated')).order_by())
+        categories = Category.objects.values_list(
+            'pk', 'slug').order_by('slug')
+        for pk, slug in categories.iterator():
+            yield reverse('category', args=[slug]), latest.get(pk)
+        tags = TagCount.objects.filter(count__gt=0).values_list(
+            'slug', flat=True).order_by('slug')
+        for slug in tags.iterator():
+            yield reverse('tag', args=[slug]), None
+        months = list(ArchiveMonth.objects.filter(count__gt=0))
+        for year in sorted(set(month.year for month in months)):
+            yield reverse('archive_year', args=[str(year)]), None
+        for month in months:
+            yield month.get_absolute_url(), None
+
+    return render_xml('urlset', 'url', (
+        (request.build_absolute_uri(location), lastmod)
+        for location, lastmod in entries()))
+
+
+@public_view
+@cache_public_page('sitemap')
+def sitemap_posts(request, chunk):
+    """The published posts whose ids fall in block `chunk`."""
+    start = int(chunk) * SITEMAP_CHUNK_SIZE
+    posts = Post.objects.filter(
+        published=True, id__gte=start, id__lt=start + SITEMAP_CHUNK_SIZE,
+    ).values_list('slug', 'updated').order_by('id')
+
+    # Every post URL has the same shape, so only reverse() once
+    prefix = request.build_absolute_uri(reverse('blog:post', args=['-']))
+    prefix = prefix[:-len('-/')]
+    entries = [
+        ('%s%s/' % (prefix, slug), updated)
+        for slug, updated in posts.iterator()]
+    if not entries:
+        raise Http404
+    return render_xml('urlset', 'url', entries)
+
+
+@public_view
+def robots_txt(request):
+    lines = ['User-agent: *']
+    lines.extend('Disallow: %s' % path for path in DISALLOW)
+    lines.append('Sitemap: %s' % request.build_absolute_uri(
+        reverse('sitemap')))
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain')
@@ -0,0 +1,64 @@
+// Shows the <time class="relative-time"> dates written by the
+// relative_time template tag as "3 minutes ago", like Django's
+// naturaltime filter. The server leaves this to the browser so that
+// its pages stay the same from one minute to the next.
+
+(function() {
+    var MINUTE = 60, HOUR = 60 * MINUTE, DAY = 24 * HOUR;
+    var UNITS = [
+        [365 * DAY, 'year'], [30 * DAY, 'month'], [7 * DAY, 'week'],
+        [DAY, 'day'], [HOUR, 'hour'], [MINUTE, 'minute']
+    ];
+
+    function count(n, unit) {
+        return n + ' ' + unit + (n === 1 ? '' : 's');
+    }
+
+    function relative(date, now) {
+        var seconds = Math.floor((now - date) / 1000);
+        if (seconds < 0) {
+            return null;
+        }
+        if (seconds < MINUTE) {
+            return seconds < 10 ? 'now' : count(seconds, 'second') + ' ago';
+        }
+        if (seconds < DAY) {
+            return (seconds < HOUR ?
+                count(Math.floor(seconds / MINUTE), 'minute') :
+                count(Math.floor(seconds / HOUR), 'hour')) + ' ago';
+        }
+        // The two largest units, as in "2 weeks, 3 days ago"
+        for (var i = 0; i < UNITS.length; i++) {
+            var n = Math.floor(seconds / UNITS[i][0]);
+            if (n > 0) {
+                var text = count(n, UNITS[i][1]);
+                var next = UNITS[i + 1];
+                var rest = next && Math.floor(
+                    (seconds - n * UNITS[i][0]) / next[0]);
+                if (rest > 0) {
+                    text += ', ' + count(rest, next[1]);
+                }
+                return text + ' ago';
+            }
+        }
+    }
+
+    function update() {
+        var now = new Date();
+        var times = document.querySelectorAll('time.relative-time');
+        for (var i = 0; i < times.length; i++) {
+            var text = relative(
+                new Date(times[i].getAttribute('datetime')), now);
+            if (text) {
+                times[i].textContent = text;
+            }
+        }
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', update);
+    } else {
+        update();
+    }
+    setInterval(update, MINUTE * 1000);
+})();
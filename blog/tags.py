@@ -0,0 +1,67 @@
+"""
+Precomputed tag counts for the tag pages and the tag cloud.
+
+Counting the posts behind each tag means grouping the generic TaggedItem
+table, so the number of published posts per tag is kept in the TagCount
+table instead. Only the tags touched by a change are recounted (see
+blog.signals); ``manage.py rebuild_tag_counts`` recounts them all.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from taggit.models import Tag, TaggedItem
+
+from .models import Post, TagCount
+
+# Number of font sizes the tag cloud is drawn with
+CLOUD_STEPS = 5
+
+
+def post_tag_ids(post_id):
+    """The ids of the tags on a post."""
+    return list(TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+        object_id=post_id).values_list('tag_id', flat=True))
+
+
+def recount_tags(tag_ids):
+    """Recount the published posts of the given tags."""
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+
+    counts = dict(TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+        tag_id__in=tag_ids,
+        object_id__in=Post.objects.filter(published=True).values('pk'),
+    ).values_list('tag_id').annotate(count=Count('id')).order_by())
+
+    with transaction.atomic():
+        existing = set(TagCount.objects.filter(
+            tag_id__in=tag_ids).values_list('tag_id', flat=True))
+        for tag_id in existing:
+            TagCount.objects.filter(tag_id=tag_id).update(
+                count=counts.get(tag_id, 0))
+        TagCount.objects.bulk_create(
+            TagCount(tag=tag, name=tag.name, slug=tag.slug,
+                     count=counts.get(tag.pk, 0))
+            for tag in Tag.objects.filter(pk__in=tag_ids - existing))
+
+
+def rebuild_tag_counts():
+    """Recount every tag from scratch."""
+    with transaction.atomic():
+        TagCount.objects.all().delete()
+        recount_tags(Tag.objects.values_list('pk', flat=True))
+
+
+def tag_cloud():
+    """The tags with published posts, by name, each with a `size` from 1
+    to CLOUD_STEPS relative to the most used tag."""
+    tags = list(TagCount.objects.filter(count__gt=0).order_by('name'))
+    if tags:
+        largest = max(tag.count for tag in tags)
+        for tag in tags:
+            tag.size = 1 + (tag.count - 1) * (CLOUD_STEPS - 1) // max(
+                largest - 1, 1)
+    return tags
@@ -0,0 +1,53 @@
+from django import template
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from blog.assets import BUNDLES, get_manifest
+
+register = template.Library()
+
+
+def bundle_urls(name):
+    """The bundle's URL, or those of its sources before a build."""
+    manifest = get_manifest()
+    if manifest and name in manifest['bundles']:
+        return [static(manifest['bundles'][name])]
+    return [static(path) for path in BUNDLES[name]]
+
+
+@register.simple_tag
+def critical_css(template_name):
+    """Inline the critical CSS worked out for `template_name`."""
+    manifest = get_manifest()
+    css = manifest and manifest['critical'].get(template_name)
+    if not css:
+        return ''
+    return format_html('<style>{0}</style>', mark_safe(css))
+
+
+@register.simple_tag
+def stylesheet(name):
+    """Load a stylesheet bundle, or the stylesheet at a URL.
+
+    Once the assets are built, the page's critical CSS is inlined and
+    the stylesheet is loaded without blocking the first paint.
+    """
+    urls = bundle_urls(name) if name in BUNDLES else [name]
+    if not get_manifest():
+        return format_html_join(
+            '\n', '<link href="{0}" rel="stylesheet">',
+            ((url,) for url in urls))
+    return format_html_join('\n', (
+        '<link rel="preload" href="{0}" as="style" '
+        'onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link href="{0}" rel="stylesheet"></noscript>'),
+        ((url,) for url in urls))
+
+
+@register.simple_tag
+def javascript(name):
+    """Load a script bundle after the document has been parsed."""
+    return format_html_join(
+        '\n', '<script src="{0}" defer></script>',
+        ((url,) for url in bundle_urls(name)))
@@ -0,0 +1,93 @@
+import os
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.templatetags.staticfiles import static
+from django.core.urlresolvers import reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from blog.images import srcsets, static_srcsets
+
+register = template.Library()
+
+
+def srcset(urls):
+    return ', '.join('%s %dw' % (url, width) for url, width in urls)
+
+
+def picture_markup(sources, src, alt, sizes):
+    """A <picture> offering every format in `sources`, as made by
+    `blog.images.srcsets` with the names replaced by URLs."""
+    extra, (original,) = sources[:-1], sources[-1:]
+    return format_html(
+        '<picture>{0}<img src="{1}" srcset="{2}" sizes="{3}" alt="{4}">'
+        '</picture>',
+        format_html_join('', '<source type="{0}" srcset="{1}" sizes="{2}">', (
+            (content_type, srcset(urls), sizes)
+            for extension, content_type, urls in extra)),
+        src, srcset(original[2]), sizes, alt)
+
+
+@register.simple_tag
+def picture(name, alt='', sizes='100vw'):
+    """A responsive <picture> of the static image `name`."""
+    sources = static_srcsets(name)
+    if not sources:
+        return format_html('<img src="{0}" alt="{1}">', static(name), alt)
+    sources = [
+        (extension, content_type,
+         [(static(derivative), width) for derivative, width in urls])
+        for extension, content_type, urls in sources]
+    return picture_markup(sources, static(name), alt, sizes)
+
+
+@register.simple_tag
+def media_picture(name, alt='', sizes='100vw'):
+    """A responsive <picture> of the uploaded image `name`."""
+    src = settings.MEDIA_URL + name
+    filename = os.path.join(settings.MEDIA_ROOT, name)
+    if not os.path.isfile(filename):
+        return format_html('<img src="{0}" alt="{1}">', src, alt)
+    sources = [
+        (extension, content_type, [
+            (reverse('media_derivative', args=[derivative]), width)
+            for derivative, width in urls])
+        for extension, content_type, urls in srcsets(name, filename)]
+    return picture_markup(sources, src, alt, sizes)
+
+
+@register.simple_tag
+def responsive_background(name, selector):
+    """A <style> giving the elements matching `selector` the static image
+    `name` as their background, at a width suiting the screen."""
+    sources = static_srcsets(name)
+    if not sources:
+        return format_html(
+            '<style>{0}{{background-image:url("{1}")}}</style>',
+            mark_safe(selector), static(name))
+
+    # Widest first, so that the narrowest matching media query wins
+    extra, (original,) = sources[:-1], sources[-1:]
+    widths = [width for derivative, width in original[2]][::-1]
+    urls = dict(
+        ((extension, width), static(derivative))
+        for extension, content_type, derivatives in sources
+        for derivative, width in derivatives)
+
+    def rules(width):
+        fallback = 'background-image:url("%s")' % urls[original[0], width]
+        if not extra:
+            return '%s{%s}' % (selector, fallback)
+        image_set = ','.join(
+            'url("%s") type("%s")' % (urls[extension, width], content_type)
+            for extension, content_type, derivatives in sources)
+        # Browsers that do not understand image-set() keep the fallback
+        return '%s{%s;background-image:image-set(%s)}' % (
+            selector, fallback, image_set)
+
+    css = [rules(widths[0])]
+    css.extend(
+        '@media (max-width:%dpx){%s}' % (width, rules(width))
+        for width in widths[1:])
+    return format_html('<style>{0}</style>', mark_safe(''.join(css)))
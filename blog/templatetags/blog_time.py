@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django import template
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.html import format_html
+
+from blog import relativetime
+from blog.relativetime import coarse_relative_time, note_expiry
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def relative_time(context, value):
+    """A <time> element saying how long ago `value` was.
+
+    The date is written as it is and made relative in the browser,
+    unless BLOG_RELATIVE_TIME is 'server'.
+    """
+    if not isinstance(value, datetime):
+        return ''
+    local = timezone.localtime(value)
+    title = date_format(local, 'DATETIME_FORMAT')
+    utc = timezone.localtime(value, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ')
+
+    if relativetime.RELATIVE_TIME != 'server':
+        return format_html(
+            '<time class="relative-time" datetime="{0}" title="{1}">{2}'
+            '</time>', utc, title, date_format(local, 'DATE_FORMAT'))
+
+    text, expires = coarse_relative_time(value)
+    request = context.get('request')
+    if request is not None:
+        note_expiry(request, expires)
+    return format_html(
+        '<time datetime="{0}" title="{1}">{2}</time>', utc, title, text)
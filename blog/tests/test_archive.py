@@ -0,0 +1,198 @@
+from datetime import datetime
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from blog.archive import archive_years, month_range, rebuild_archive
+from blog.cache import get_page_cache
+from blog.models import ArchiveMonth, Post
+from .factories import *
+from .test_cache import LOCMEM_CACHES
+
+
+def counts():
+    return dict(
+        ((month.year, month.month), month.count)
+        for month in ArchiveMonth.objects.all())
+
+
+def local(*args):
+    return timezone.make_aware(
+        datetime(*args), timezone.get_current_timezone())
+
+
+def dated_post(created, published=True, **kwargs):
+    """A post created at `created`, published through a save like in
+    the admin."""
+    post = UnPublishedPostFactory(content='content', **kwargs)
+    Post.objects.filter(pk=post.pk).update(created=created, updated=created)
+    post = Post.objects.get(pk=post.pk)
+    if published:
+        post.published = True
+        post.save()
+    return post
+
+
+class ArchiveCountTest(TestCase):
+
+    def test_publishing_counts_the_post_in_its_month(self):
+        dated_post(local(2014, 11, 12), title='One')
+        dated_post(local(2014, 11, 30), title='Two')
+        dated_post(local(2015, 1, 2), title='Three')
+
+        self.assertEqual(counts(), {(2014, 11): 2, (2015, 1): 1})
+
+    def test_drafts_are_not_counted(self):
+        dated_post(local(2014, 11, 12), published=False)
+
+        self.assertEqual(counts(), {})
+
+    def test_unpublishing_and_deleting_recount(self):
+        post = dated_post(local(2014, 11, 12), title='One')
+        other = dated_post(local(2014, 11, 13), title='Two')
+
+        post.published = False
+        post.save()
+        self.assertEqual(counts(), {(2014, 11): 1})
+
+        other.delete()
+        self.assertEqual(counts(), {(2014, 11): 0})
+
+    def test_months_are_those_of_the_site_time_zone(self):
+        # Nairobi is three hours ahead of UTC
+        dated_post(datetime(2014, 11, 30, 22, tzinfo=timezone.utc))
+
+        self.assertEqual(counts(), {(2014, 12): 1})
+
+    def test_month_range(self):
+        self.assertEqual(
+            month_range(2014, 12), (local(2014, 12, 1), local(2015, 1, 1)))
+        self.assertEqual(
+            month_range(2014), (local(2014, 1, 1), local(2015, 1, 1)))
+
+    def test_rebuild(self):
+        dated_post(local(2014, 11, 12))
+        ArchiveMonth.objects.update(count=42)
+        ArchiveMonth.objects.create(year=2013, month=1, count=3)
+
+        rebuild_archive()
+
+        self.assertEqual(counts(), {(2014, 11): 1})
+
+    def test_rebuild_command(self):
+        dated_post(local(2014, 11, 12))
+        ArchiveMonth.objects.all().delete()
+        out = StringIO()
+
+        call_command('rebuild_archive', stdout=out)
+
+        self.assertEqual(counts(), {(2014, 11): 1})
+        self.assertIn('Counted 1 month(s).', out.getvalue())
+
+    def test_archive_years_groups_the_months(self):
+        dated_post(local(2014, 11, 12), title='One')
+        dated_post(local(2014, 12, 1), title='Two')
+        dated_post(local(2015, 1, 2), title='Three')
+        dated_post(local(2013, 5, 2), title='Draft').delete()
+
+        years = archive_years()
+
+        self.assertEqual(
+            [(year['year'], year['count']) for year in years],
+            [(2015, 1), (2014, 2)])
+        self.assertEqual(
+            [month.month for month in years[1]['months']], [12, 11])
+
+
+class ArchiveViewTest(TestCase):
+
+    def setUp(self):
+        self.november = dated_post(local(2014, 11, 12), title='November')
+        self.december = dated_post(local(2014, 12, 31, 23), title='December')
+        self.january = dated_post(local(2015, 1, 1, 1), title='January')
+
+    def test_month_lists_its_posts(self):
+        response = self.client.get('/archive/2014/12/')
+
+        self.assertTemplateUsed(response, 'blog/archive.html')
+        self.assertEqual(list(response.context['posts']), [self.december])
+        self.assertContains(response, 'Posts from December 2014')
+
+    def test_year_lists_its_posts_and_months(self):
+        response = self.client.get('/archive/2014/')
+
+        self.assertEqual(
+            list(response.context['posts']), [self.december, self.november])
+        self.assertEqual(response.context['count'], 2)
+        self.assertContains(response, 'href="/archive/2014/11/"')
+
+    def test_empty_or_invalid_periods_are_404(self):
+        for url in ['/archive/2013/', '/archive/2014/10/',
+                    '/archive/2014/13/']:
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+    def test_drafts_are_not_listed(self):
+        dated_post(local(2014, 11, 20), published=False, title='Draft')
+
+        response = self.client.get('/archive/2014/11/')
+
+        self.assertNotContains(response, 'Draft')
+
+    def test_sidebar_shows_the_month_counts(self):
+        response = self.client.get('/')
+
+        self.assertContains(response, 'href="/archive/2015/"')
+        self.assertContains(
+            response, '<li><a href="/archive/2014/11/">November</a> (1)</li>',
+            html=True)
+
+    def test_pagination_stays_in_the_period(self):
+        for day in range(1, 9):
+            dated_post(local(2014, 11, day), title='Post %d' % day)
+
+        response = self.client.get('/archive/2014/11/')
+        page = response.context['posts']
+        self.assertEqual(len(page), 5)
+        self.assertContains(response, '/archive/2014/11/?before=')
+
+        response = self.client.get(
+            '/archive/2014/11/?before=%s' % page.next_cursor)
+        self.assertEqual(
+            [post.title for post in response.context['posts']],
+            ['Post 4', 'Post 3', 'Post 2', 'Post 1'])
+
+    def test_stale_cursor_stays_in_the_period(self):
+        for day in range(1, 9):
+            dated_post(local(2014, 11, day), title='Post %d' % day)
+
+        response = self.client.get(
+            '/archive/2014/11/?after=99999999999999999-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 5)
+        self.assertContains(response, '/archive/2014/11/?before=')
+
+    def test_query_count(self):
+        # The validators, the month, the posts, their tags and the sidebar
+        with self.assertNumQueries(5):
+            self.client.get('/archive/2014/12/')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ArchiveCacheTest(TestCase):
+
+    def setUp(self):
+        get_page_cache().clear()
+
+    def test_publishing_a_post_refreshes_the_archive(self):
+        dated_post(local(2014, 11, 12), title='November')
+        self.client.get('/archive/2014/11/')
+
+        dated_post(local(2014, 11, 20), title='Later in November')
+
+        response = self.client.get('/archive/2014/11/')
+        self.assertContains(response, 'Later in November')
+        self.assertEqual(response.context['count'], 2)
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+from blog import assets
+from blog.assets import (
+    critical_css, minify_css, parse_css, strip_source_maps)
+
+
+class CriticalCSSTest(TestCase):
+
+    def critical(self, css, html):
+        return critical_css(parse_css(minify_css(css)), html)
+
+    def test_minify(self):
+        self.assertEqual(
+            minify_css('/* comment */\na , b > c {\n  color : red;\n}\n'),
+            'a,b>c{color:red}')
+
+    def test_strip_source_maps(self):
+        self.assertEqual(
+            strip_source_maps(
+                'var a = 1;\n//# sourceMappingURL=a.min.map\n'
+                'var b = "//# sourceMappingURL=b.map";\n'
+                '/*# sourceMappingURL=c.map */\n'),
+            'var a = 1;\n\nvar b = "//# sourceMappingURL=b.map";\n\n')
+
+    def test_keeps_the_rules_used_above_the_fold(self):
+        html = ('<nav class="navbar"><a id="brand">Home</a></nav>'
+                '<header class="intro-header"></header>'
+                '<div class="post-preview"></div>')
+        css = ('.navbar a{color:red}#brand:hover{color:blue}'
+               '.intro-header,.post-preview{margin:0}'
+               '.post-preview{padding:0}table{border:0}')
+
+        self.assertEqual(
+            self.critical(css, html),
+            '.navbar a{color:red}#brand:hover{color:blue}'
+            '.intro-header{margin:0}')
+
+    def test_filters_media_queries_and_drops_fonts(self):
+        html = '<header class="intro-header"></header>'
+        css = ('@font-face{font-family:x;src:url(x.woff)}'
+               '@media (min-width:768px){.intro-header{padding:0}'
+               '.footer{padding:0}}@media print{table{border:0}}')
+
+        self.assertEqual(
+            self.critical(css, html),
+            '@media (min-width:768px){.intro-header{padding:0}}')
+
+
+class BuildAssetsTest(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.root = os.path.join(root, 'bundles')
+        original = assets.ASSETS_ROOT
+        assets.ASSETS_ROOT = self.root
+        assets.reset_manifest()
+
+        def restore():
+            assets.ASSETS_ROOT = original
+            assets.reset_manifest()
+        self.addCleanup(restore)
+
+    def test_pages_use_the_sources_before_a_build(self):
+        response = self.client.get('/about/')
+
+        self.assertContains(response, 'css/bootstrap.min.css')
+        self.assertContains(response, 'js/jquery.min.js')
+        # Only the header's background image, no critical CSS
+        self.assertContains(response, '<style>', count=1)
+
+    def test_build_writes_hashed_bundles_and_a_manifest(self):
+        os.makedirs(self.root)
+        open(os.path.join(self.root, 'site.0000.css'), 'w').close()
+
+        manifest = assets.build_assets()
+
+        self.assertEqual(
+            sorted(os.listdir(self.root)), sorted(
+                ['manifest.json'] + [
+                    path.split('/')[1]
+                    for path in manifest['bundles'].values()]))
+        self.assertRegexpMatches(
+            manifest['bundles']['site.css'], r'^bundles/site\.\w{12}\.css$')
+        with open(os.path.join(self.root, 'manifest.json')) as f:
+            self.assertEqual(json.load(f), manifest)
+        self.assertIn('.intro-header', manifest['critical']['blog/index.html'])
+        self.assertLess(
+            len(manifest['critical']['blog/index.html']),
+            os.path.getsize(os.path.join(
+                self.root, manifest['bundles']['site.css'].split('/')[1])))
+
+    def test_script_bundle_drops_the_source_maps(self):
+        bundle = assets.build_bundle('site.js', assets.BUNDLES['site.js'])
+
+        self.assertNotIn('sourceMappingURL', bundle)
+        self.assertIn('jQuery', bundle)
+
+    def test_pages_use_the_bundles_after_a_build(self):
+        manifest = assets.build_assets()
+
+        response = self.client.get('/about/')
+
+        self.assertContains(response, '<style>')
+        self.assertContains(
+            response, 'rel="preload" href="/static/%s"'
+            % manifest['bundles']['site.css'])
+        self.assertContains(
+            response, '<script src="/static/%s" defer>'
+            % manifest['bundles']['site.js'])
+        self.assertNotContains(response, 'css/bootstrap.min.css')
@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+from blog.benchmarks import SCENARIOS, compare_results, run_benchmarks, seed
+from blog.models import ArchiveMonth, Post, SearchTerm, TagCount
+
+
+class BenchmarkTest(TestCase):
+
+    def test_seed_tops_up_to_size(self):
+        seed(5)
+        seed(8)
+
+        self.assertEqual(Post.objects.filter(published=True).count(), 8)
+        self.assertNotEqual(Post.objects.first().content_html, '')
+
+    def test_seed_fills_the_precomputed_tables(self):
+        seed(5)
+        seed(8)
+
+        self.assertEqual(
+            sum(ArchiveMonth.objects.values_list('count', flat=True)), 8)
+        self.assertEqual(
+            sum(TagCount.objects.values_list('count', flat=True)), 16)
+        self.assertEqual(
+            Post.objects.filter(search_terms__isnull=True).count(), 0)
+        self.assertTrue(SearchTerm.objects.filter(term='django').exists())
+
+    def test_seeded_posts_are_spread_over_time(self):
+        seed(5)
+
+        self.assertEqual(
+            Post.objects.values('created').distinct().count(), 5)
+
+    def test_run_benchmarks_measures_every_scenario(self):
+        results = run_benchmarks([4], repeat=1)
+
+        self.assertEqual(set(results['4']), set(SCENARIOS))
+        for scenario in results['4'].values():
+            self.assertEqual(set(scenario), set(['client', 'wsgi']))
+            self.assertGreater(scenario['wsgi']['queries'], 0)
+
+    def test_run_benchmarks_measures_every_template(self):
+        results = run_benchmarks([4], repeat=1)
+
+        self.assertIn('blog/post.html', results['templates'])
+        for loaders in results['templates'].values():
+            self.assertEqual(set(loaders), set(['default', 'cached']))
+            self.assertEqual(loaders['cached']['queries'], 0)
+            self.assertIn('cold_ms', loaders['cached'])
+
+
+class CompareResultsTest(TestCase):
+
+    def results(self, p50_ms, queries):
+        return {'10': {'index': {'wsgi': {
+            'p50_ms': p50_ms, 'queries': queries}}}}
+
+    def test_no_regressions(self):
+        self.assertEqual(
+            compare_results(self.results(10, 3), self.results(12, 3)), [])
+
+    def test_slowdown_is_a_regression(self):
+        regressions = compare_results(
+            self.results(10, 3), self.results(13, 3), max_slowdown=1.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('10 posts index (wsgi)', regressions[0])
+
+    def test_extra_queries_are_a_regression(self):
+        self.assertEqual(len(compare_results(
+            self.results(10, 3), self.results(10, 4))), 1)
+
+    def test_new_scenarios_are_ignored(self):
+        self.assertEqual(compare_results({}, self.results(10, 3)), [])
@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from blog.cache import _generation_key, get_page_cache
+from .factories import *
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-pages',
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PageCacheTest(TestCase):
+
+    def setUp(self):
+        get_page_cache().clear()
+        self.category = CategoryFactory()
+        self.post = PublishedPostFactory(
+            category=self.category, content='content')
+
+    def assertCached(self, url):
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_public_pages_are_cached(self):
+        self.assertCached('/')
+        self.assertCached(self.category.get_absolute_url())
+        self.assertCached(self.post.get_absolute_url())
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get('/')
+
+        response = self.client.get('/?page=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(len(response.context['posts']), 0)
+
+    def test_saving_a_post_invalidates_its_pages(self):
+        for url in ['/', self.category.get_absolute_url(),
+                    self.post.get_absolute_url()]:
+            self.client.get(url)
+
+            self.post.title = 'Title for %s' % url
+            self.post.save()
+
+            self.assertContains(self.client.get(url), self.post.title)
+
+    def test_publishing_a_post_shows_it_on_the_home_page(self):
+        draft = UnPublishedPostFactory(category=self.category)
+        self.assertNotContains(self.client.get('/'), draft.title)
+
+        draft.published = True
+        draft.save()
+
+        self.assertContains(self.client.get('/'), draft.title)
+
+    def test_saving_a_post_keeps_other_posts_cached(self):
+        other = PublishedPostFactory(title='Other post')
+        self.client.get(other.get_absolute_url())
+
+        self.post.save()
+
+        with self.assertNumQueries(0):
+            self.client.get(other.get_absolute_url())
+
+    def test_changing_a_slug_invalidates_the_old_page(self):
+        old_url = self.post.get_absolute_url()
+        self.client.get(old_url)
+
+        self.post.slug = 'new-slug'
+        self.post.save()
+
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+
+    def test_renaming_a_category_invalidates_its_posts(self):
+        self.client.get(self.post.get_absolute_url())
+
+        self.category.name = 'Renamed category'
+        self.category.save()
+
+        self.assertContains(
+            self.client.get(self.post.get_absolute_url()), 'Renamed category')
+
+    def test_tagging_a_post_invalidates_the_tag_pages(self):
+        self.post.tags.add('django')
+        for url in ['/tags/', '/tag/django/', self.post.get_absolute_url()]:
+            self.client.get(url)
+
+        self.post.tags.add('heroku')
+
+        self.assertContains(self.client.get('/tags/'), 'heroku')
+        self.assertContains(
+            self.client.get(self.post.get_absolute_url()), 'heroku')
+
+        self.post.published = False
+        self.post.save()
+
+        self.assertNotContains(
+            self.client.get('/tag/django/'), 'Published Post')
+
+    def test_cached_pages_still_answer_conditional_gets(self):
+        for url in ['/', self.post.get_absolute_url()]:
+            etag = self.client.get(url)['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+
+    def test_generations_of_unknown_pages_expire(self):
+        self.client.get('/post/made-up-slug/')
+        self.post.save()
+
+        cache = get_page_cache()
+        for namespace in ['post:made-up-slug', 'post:%s' % self.post.slug]:
+            key = cache.make_key(_generation_key(namespace))
+            self.assertIsNotNone(cache._expire_info[key])
+
+    def test_logged_in_users_bypass_the_cache(self):
+        User.objects.create_user('staff', password='secret')
+        self.client.login(username='staff', password='secret')
+        self.client.get('/')
+
+        with self.assertNumQueries(6):
+            # session, user, validators, posts, tags and archive months
+            self.client.get('/')
@@ -0,0 +1,55 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from blog.cache import get_page_cache
+from blog.models import EXCERPT_VERSION, Post
+from .factories import *
+from .test_cache import LOCMEM_CACHES
+
+
+class RenderPostsCommandTest(TestCase):
+
+    def test_rerenders_stored_html(self):
+        test_post = PostFactory(content='Some *emphasis*')
+        Post.objects.filter(pk=test_post.pk).update(content_html='')
+
+        out = StringIO()
+        call_command('render_posts', stdout=out)
+
+        self.assertIn(
+            '<em>emphasis</em>',
+            Post.objects.get(pk=test_post.pk).content_html)
+        self.assertIn('Rendered 1 post(s).', out.getvalue())
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_cached_pages_show_the_new_html(self):
+        get_page_cache().clear()
+        post = PublishedPostFactory(content='Some *emphasis*')
+        post.tags.add('django')
+        Post.objects.filter(pk=post.pk).update(content_html='stale html')
+        urls = ['/', post.get_absolute_url(), '/tag/django/']
+        before = dict((url, self.client.get(url)) for url in urls)
+
+        call_command('render_posts', stdout=StringIO())
+
+        after = dict((url, self.client.get(url)) for url in urls)
+        for url in urls:
+            self.assertNotEqual(after[url]['ETag'], before[url]['ETag'])
+        self.assertNotContains(before[post.get_absolute_url()], '<em>')
+        self.assertContains(
+            after[post.get_absolute_url()], '<em>emphasis</em>')
+
+    def test_stale_option_only_rebuilds_outdated_excerpts(self):
+        stale = PostFactory(content='Stale *post*')
+        fresh = PostFactory(content='Fresh *post*')
+        Post.objects.filter(pk=stale.pk).update(
+            excerpt_long='', excerpt_version=EXCERPT_VERSION - 1)
+        Post.objects.filter(pk=fresh.pk).update(excerpt_long='')
+
+        call_command('render_posts', stale=True, stdout=StringIO())
+
+        self.assertEqual(
+            Post.objects.get(pk=stale.pk).excerpt_long.strip(), 'Stale post')
+        self.assertEqual(Post.objects.get(pk=fresh.pk).excerpt_long, '')
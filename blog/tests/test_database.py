@@ -0,0 +1,193 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.utils import ConnectionHandler
+from django.test import TestCase
+
+from kevgathuku.db import pool as pools
+from kevgathuku.db.backends.sqlite3.base import DatabaseWrapper
+from kevgathuku.db.pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTest(TestCase):
+
+    def test_reuses_released_connections(self):
+        pool = ConnectionPool(connect, max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        stats = pool.stats()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+        self.assertEqual((stats['in_use'], stats['idle']), (1, 0))
+
+    def test_times_out_when_every_connection_is_in_use(self):
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+        pool.acquire()
+
+        self.assertRaises(PoolTimeout, pool.acquire)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waits_for_a_released_connection(self):
+        pool = ConnectionPool(connect, max_size=1, timeout=5)
+        first = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, [first])
+        timer.start()
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats()['waits'], 1)
+        self.assertGreater(pool.stats()['wait_ms'], 0)
+        timer.join()
+
+    def test_discarded_and_old_connections_are_closed(self):
+        pool = ConnectionPool(connect, max_size=1, max_age=0)
+        first = pool.acquire()
+        pool.release(first, discard=True)
+        second = pool.acquire()
+        pool.release(second)
+
+        self.assertIsNot(pool.acquire(), second)
+        self.assertEqual(pool.stats()['closed'], 2)
+        self.assertRaises(sqlite3.ProgrammingError, first.execute, 'SELECT 1')
+
+    def test_failed_connects_free_their_slot(self):
+        def fail():
+            raise sqlite3.OperationalError('unable to open database')
+        pool = ConnectionPool(fail, max_size=1)
+
+        self.assertRaises(sqlite3.OperationalError, pool.acquire)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class PooledBackendTest(TestCase):
+    """The pooled SQLite backend, standing in for PostgreSQL."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(pools.close_pools)
+        name = os.path.join(self.directory, 'db.sqlite3')
+        self.handler = ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.dummy'},
+            'pooled': {
+                'ENGINE': 'kevgathuku.db.backends.sqlite3',
+                'NAME': name,
+                'CONN_MAX_AGE': 60,
+                'HEALTH_CHECKS': True,
+                'POOL': {'MAX_SIZE': 1},
+            },
+            'persistent': {
+                'ENGINE': 'kevgathuku.db.backends.sqlite3',
+                'NAME': name,
+                'CONN_MAX_AGE': 60,
+                'HEALTH_CHECKS': True,
+            },
+        })
+        self.connection = self.handler['pooled']
+        self.addCleanup(self.connection.close)
+
+    def stats(self):
+        return pools.pool_stats()['pooled']
+
+    def query(self, connection=None):
+        cursor = (connection or self.connection).cursor()
+        cursor.execute('SELECT 1')
+        return cursor.fetchone()[0]
+
+    def test_test_database_uses_the_wrapper(self):
+        self.assertIsInstance(connections['default'], DatabaseWrapper)
+
+    def test_closed_connections_go_back_to_the_pool(self):
+        self.assertEqual(self.query(), 1)
+        self.connection.close()
+        self.assertEqual(self.stats()['idle'], 1)
+
+        self.assertEqual(self.query(), 1)
+        stats = self.stats()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+
+    def test_released_when_the_request_finishes(self):
+        self.query()
+        # As Django does when a request finishes, despite CONN_MAX_AGE
+        self.connection.close_if_unusable_or_obsolete()
+
+        self.assertIsNone(self.connection.connection)
+        self.assertEqual(self.stats()['idle'], 1)
+
+    def test_another_thread_reuses_the_connection(self):
+        self.query()
+        self.connection.close_if_unusable_or_obsolete()
+        results = []
+
+        def request():
+            # Connections belong to the thread that made them
+            connection = self.handler['pooled']
+            results.append(self.query(connection))
+            connection.close_if_unusable_or_obsolete()
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(results, [1])
+        stats = self.stats()
+        self.assertEqual((stats['created'], stats['reused']), (1, 1))
+        self.assertEqual(stats['timeouts'], 0)
+
+    def test_idle_connections_are_checked_when_borrowed(self):
+        self.query()
+        self.connection.close()
+        # The server went away while the connection sat in the pool
+        pools.get_pool('pooled', None, None).idle[0].close()
+
+        self.assertEqual(self.query(), 1)
+        stats = self.stats()
+        self.assertEqual((stats['created'], stats['closed']), (2, 1))
+
+    def test_broken_connections_are_replaced(self):
+        connection = self.handler['persistent']
+        self.addCleanup(connection.close)
+        self.query(connection)
+        # As Django does when a request starts
+        connection.close_if_unusable_or_obsolete()
+        raw = connection.connection
+        connection.is_usable = lambda: False
+
+        self.assertEqual(self.query(connection), 1)
+        self.assertIsNot(connection.connection, raw)
+
+    def test_checks_once_per_request(self):
+        connection = self.handler['persistent']
+        self.addCleanup(connection.close)
+        checks = []
+        self.query(connection)
+        connection.close_if_unusable_or_obsolete()
+        connection.is_usable = lambda: checks.append(1) or True
+
+        self.query(connection)
+        self.query(connection)
+        self.assertEqual(checks, [1])
+
+
+class DatabasePoolsViewTest(TestCase):
+
+    def test_requires_staff(self):
+        self.assertEqual(
+            self.client.get('/performance/database/').status_code, 302)
+
+    def test_returns_the_pool_stats(self):
+        User.objects.create_superuser('staff', 'staff@example.com', 'secret')
+        self.client.login(username='staff', password='secret')
+
+        response = self.client.get('/performance/database/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
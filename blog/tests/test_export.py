@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from .factories import *
+
+
+class ExportStaticTest(TestCase):
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        self.category = CategoryFactory()
+        self.post = PublishedPostFactory(
+            category=self.category, content='Some *emphasis*')
+        self.post.tags.add('django')
+
+    def export(self, **options):
+        options.setdefault('processes', 1)
+        options.setdefault('static', False)
+        out = StringIO()
+        call_command(
+            'export_static', self.output, host='example.com', stdout=out,
+            **options)
+        return out.getvalue()
+
+    def read(self, path):
+        with open(os.path.join(self.output, path)) as f:
+            return f.read()
+
+    def exists(self, path):
+        return os.path.exists(os.path.join(self.output, path))
+
+    def test_exports_the_public_pages(self):
+        out = self.export()
+
+        self.assertIn('Wrote', out)
+        self.assertIn('<em>emphasis</em>', self.read(
+            'post/%s/index.html' % self.post.slug))
+        for path in ['index.html', 'about/index.html',
+                     'about-this-site/index.html', 'tags/index.html',
+                     'category/%s/index.html' % self.category.slug,
+                     'tag/django/index.html', 'feed/atom.xml',
+                     'robots.txt', 'sitemap.xml', 'sitemap-posts-0.xml']:
+            self.assertTrue(self.exists(path), path)
+        self.assertFalse(self.exists('contact/index.html'))
+
+    def test_exports_the_archive(self):
+        self.export()
+
+        created = timezone.localtime(self.post.created)
+        self.assertTrue(self.exists('archive/%d/index.html' % created.year))
+        self.assertIn(self.post.title, self.read(
+            'archive/%d/%02d/index.html' % (created.year, created.month)))
+
+    def test_feeds_are_written_where_static_hosts_serve_them(self):
+        self.export()
+
+        category_feed = 'category/%s/feed/rss.xml' % self.category.slug
+        self.assertTrue(self.exists('feed/rss.xml'))
+        self.assertTrue(self.exists(category_feed))
+        self.assertIn('href="/feed/atom.xml"', self.read('index.html'))
+        self.assertIn('/%s' % category_feed, self.read(
+            'category/%s/index.html' % self.category.slug))
+        self.assertNotIn('/feed/atom/', self.read('feed/atom.xml'))
+
+    def test_absolute_urls_use_the_host(self):
+        self.export()
+
+        self.assertIn('http://example.com/post/', self.read(
+            'sitemap-posts-0.xml'))
+
+    def test_listing_pages_get_static_links(self):
+        PostFactory.create_batch(8, published=True, category=self.category)
+
+        self.export()
+
+        first = self.read('index.html')
+        second = self.read('page/2/index.html')
+        self.assertIn('href="/page/2/"', first)
+        self.assertNotIn('?before=', first)
+        self.assertIn('href="/"', second)
+        self.assertTrue(self.exists(
+            'category/%s/page/2/index.html' % self.category.slug))
+
+    def test_incremental_export_only_renders_changed_posts(self):
+        other = PublishedPostFactory(title='Other post', content='content')
+        self.export()
+        os.remove(os.path.join(
+            self.output, 'post/%s/index.html' % other.slug))
+
+        self.post.title = 'Changed title'
+        self.post.save()
+        self.export(incremental=True)
+
+        self.assertIn('Changed title', self.read(
+            'post/%s/index.html' % self.post.slug))
+        self.assertIn('Changed title', self.read('index.html'))
+        self.assertFalse(self.exists('post/%s/index.html' % other.slug))
+
+    def test_incremental_export_removes_unpublished_posts(self):
+        self.export()
+
+        self.post.published = False
+        self.post.save()
+        self.export(incremental=True)
+
+        self.assertFalse(self.exists('post/%s' % self.post.slug))
+        self.assertNotIn(self.post.title, self.read('index.html'))
+
+    def test_copies_the_static_files(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        os.makedirs(os.path.join(static_root, 'css'))
+        with open(os.path.join(static_root, 'css', 'site.css'), 'w') as f:
+            f.write('body {}')
+
+        with self.settings(STATIC_ROOT=static_root):
+            self.export(static=True)
+
+        self.assertEqual(self.read('static/css/site.css'), 'body {}')
+
+
+class ParallelExportTest(TransactionTestCase):
+    """The forked workers read the posts with their own connections."""
+
+    def test_export_with_several_processes(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        post = PublishedPostFactory(content='Some *emphasis*')
+        PostFactory.create_batch(8, published=True, content='content')
+
+        call_command(
+            'export_static', output, host='example.com', processes=2,
+            static=False, stdout=StringIO())
+
+        with open(os.path.join(
+                output, 'post', post.slug, 'index.html')) as f:
+            self.assertIn('<em>emphasis</em>', f.read())
+        for path in ['index.html', 'page/2/index.html', 'feed/rss.xml']:
+            self.assertTrue(os.path.exists(os.path.join(output, path)), path)
@@ -0,0 +1,135 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from blog import feeds
+from blog.cache import get_page_cache
+from blog.models import Post
+from .factories import *
+from .test_cache import LOCMEM_CACHES
+
+
+class FeedTest(TestCase):
+
+    def test_feeds_contain_the_rendered_posts(self):
+        PublishedPostFactory(content='Some *emphasis*')
+
+        for url in ['/feed/rss/', '/feed/atom/']:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Published Post')
+            self.assertContains(response, '&lt;em&gt;emphasis&lt;/em&gt;')
+
+    def test_feeds_use_the_stored_html(self):
+        post = PublishedPostFactory(content='Some *emphasis*')
+        Post.objects.filter(pk=post.pk).update(content='changed')
+
+        response = self.client.get('/feed/atom/')
+
+        self.assertContains(response, 'emphasis')
+
+    def test_feeds_only_show_published_posts(self):
+        UnPublishedPostFactory(content='content')
+
+        response = self.client.get('/feed/rss/')
+
+        self.assertNotContains(response, 'My Unpublished Post')
+
+    def test_number_of_entries_is_capped(self):
+        PostFactory.create_batch(
+            feeds.FEED_MAX_ITEMS + 1, published=True, content='content')
+
+        response = self.client.get('/feed/rss/')
+
+        self.assertEqual(
+            response.content.count(b'<item>'), feeds.FEED_MAX_ITEMS)
+
+    def test_category_feed_only_shows_the_category(self):
+        category = CategoryFactory()
+        PublishedPostFactory(title='In category', category=category)
+        PublishedPostFactory(title='Elsewhere')
+
+        for url in ['/category/%s/feed/rss/', '/category/%s/feed/atom/']:
+            response = self.client.get(url % category.slug)
+
+            self.assertContains(response, 'In category')
+            self.assertNotContains(response, 'Elsewhere')
+
+    def test_unknown_category_feed_is_404(self):
+        response = self.client.get('/category/does-not-exist/feed/rss/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_category_page_links_to_its_feeds(self):
+        category = CategoryFactory()
+
+        response = self.client.get(category.get_absolute_url())
+
+        self.assertContains(
+            response, '/category/%s/feed/atom/' % category.slug)
+
+    def test_matching_etag_returns_304(self):
+        PublishedPostFactory(content='content')
+        etag = self.client.get('/feed/atom/')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/feed/atom/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class FeedCacheTest(TestCase):
+
+    def setUp(self):
+        get_page_cache().clear()
+        self.post = PublishedPostFactory(content='content')
+
+    def test_feeds_are_cached(self):
+        for url in ['/feed/rss/', '/feed/atom/']:
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_rss_and_atom_are_cached_separately(self):
+        self.client.get('/feed/rss/')
+
+        response = self.client.get('/feed/atom/')
+
+        self.assertIn('atom', response['Content-Type'])
+
+    def test_saving_a_draft_keeps_the_feeds_cached(self):
+        self.client.get('/feed/rss/')
+
+        UnPublishedPostFactory(category=self.post.category, content='content')
+
+        with self.assertNumQueries(0):
+            self.client.get('/feed/rss/')
+
+    def test_publishing_a_post_regenerates_the_feeds(self):
+        category_feed = '/category/%s/feed/rss/' % self.post.category.slug
+        self.client.get('/feed/rss/')
+        self.client.get(category_feed)
+
+        self.post.title = 'New title'
+        self.post.save()
+
+        self.assertContains(self.client.get('/feed/rss/'), 'New title')
+        self.assertContains(self.client.get(category_feed), 'New title')
+
+    def test_unpublishing_a_post_removes_it(self):
+        self.client.get('/feed/rss/')
+
+        self.post.published = False
+        self.post.save()
+
+        self.assertNotContains(self.client.get('/feed/rss/'), 'Published Post')
+
+    def test_hosts_are_cached_separately(self):
+        self.client.get('/feed/rss/', HTTP_HOST='evil.example')
+
+        response = self.client.get('/feed/rss/', HTTP_HOST='good.example')
+
+        self.assertContains(response, 'http://good.example/')
+        self.assertNotContains(response, 'evil.example')
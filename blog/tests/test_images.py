@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+
+from django.core.urlresolvers import reverse
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import override_settings
+from PIL import Image
+
+from blog import images
+from blog.images import (
+    DerivativeFinder, image_widths, supported_formats)
+
+
+class ImageTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_root = images.IMAGE_CACHE_ROOT
+        images.IMAGE_CACHE_ROOT = os.path.join(self.directory, 'cache')
+        images._static_srcsets.clear()
+
+    def tearDown(self):
+        images.IMAGE_CACHE_ROOT = self.cache_root
+        images._static_srcsets.clear()
+        shutil.rmtree(self.directory)
+
+    def extensions(self):
+        return ['jpg'] + [e for e, content_type in supported_formats()]
+
+
+class DerivativeTest(ImageTestCase):
+
+    def test_images_are_never_scaled_up(self):
+        self.assertEqual(image_widths(1000), [480, 768, 1000])
+        self.assertEqual(image_widths(300), [300])
+
+    def test_finder_makes_derivatives(self):
+        finder = DerivativeFinder()
+        path = finder.find('img/home-bg.jpg.480w.jpg')
+
+        self.assertTrue(path.startswith(images.IMAGE_CACHE_ROOT))
+        self.assertEqual(Image.open(path).size[0], 480)
+        self.assertIsNone(finder.find('img/home-bg.jpg.481w.jpg'))
+        self.assertIsNone(finder.find('img/other.jpg.480w.jpg'))
+
+    def test_finder_lists_every_derivative(self):
+        finder = DerivativeFinder()
+        listed = [path for path, storage in finder.list([])]
+
+        self.assertIn('img/post-bg.jpg.768w.jpg', listed)
+        self.assertEqual(len(listed), len(set(listed)))
+        for path in listed:
+            self.assertTrue(os.path.isfile(os.path.join(finder.root, path)))
+
+    def test_derivatives_are_only_made_once(self):
+        finder = DerivativeFinder()
+        path = finder.find('img/home-bg.jpg.768w.jpg')
+        mtime = int(os.path.getmtime(path)) - 10
+        os.utime(path, (mtime, mtime))
+        finder.find('img/home-bg.jpg.768w.jpg')
+        self.assertEqual(os.path.getmtime(path), mtime)
+
+
+class MediaDerivativeTest(ImageTestCase):
+
+    def setUp(self):
+        super(MediaDerivativeTest, self).setUp()
+        self.media_root = os.path.join(self.directory, 'media')
+        os.makedirs(os.path.join(self.media_root, 'uploads'))
+        Image.new('RGB', (1000, 500)).save(
+            os.path.join(self.media_root, 'uploads', 'photo.jpg'))
+
+    def get(self, path):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            return self.client.get(reverse('media_derivative', args=[path]))
+
+    def test_serves_resized_copies(self):
+        for extension in self.extensions():
+            response = self.get('uploads/photo.jpg.768w.%s' % extension)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('max-age', response['Cache-Control'])
+            path = os.path.join(
+                images.IMAGE_CACHE_ROOT, 'media',
+                'uploads/photo.jpg.768w.%s' % extension)
+            self.assertEqual(Image.open(path).size, (768, 384))
+
+    def test_rejects_other_sizes_and_missing_images(self):
+        for path in ['uploads/photo.jpg.500w.jpg',
+                     'uploads/photo.jpg.1200w.jpg',
+                     'uploads/photo.jpg.768w.gif',
+                     'uploads/none.jpg.480w.jpg', '../photo.jpg.480w.jpg']:
+            self.assertEqual(self.get(path).status_code, 404, path)
+
+
+class ImageTagsTest(ImageTestCase):
+
+    def render(self, source):
+        return Template('{% load blog_images %}' + source).render(Context())
+
+    def test_responsive_background(self):
+        html = self.render(
+            '{% responsive_background "img/home-bg.jpg" ".intro-header" %}')
+        width = Image.open(
+            os.path.join(os.path.dirname(images.__file__),
+                         'static', 'img', 'home-bg.jpg')).size[0]
+
+        self.assertTrue(html.startswith('<style>.intro-header{'))
+        self.assertIn('/static/img/home-bg.jpg.%dw.jpg' % width, html)
+        self.assertIn(
+            '@media (max-width:480px){.intro-header{background-image:url('
+            '"/static/img/home-bg.jpg.480w.jpg")', html)
+        if 'webp' in self.extensions():
+            self.assertIn(
+                'url("/static/img/home-bg.jpg.480w.webp") type("image/webp")',
+                html)
+
+    def test_background_of_an_image_without_derivatives(self):
+        self.assertEqual(
+            self.render('{% responsive_background "img/x.jpg" ".a" %}'),
+            '<style>.a{background-image:url("/static/img/x.jpg")}</style>')
+
+    def test_picture(self):
+        html = self.render(
+            '{% picture "img/post-sample-image.jpg" alt="A sample" %}')
+
+        self.assertTrue(html.startswith('<picture>'))
+        self.assertIn('/static/img/post-sample-image.jpg.480w.jpg 480w', html)
+        self.assertIn('alt="A sample"', html)
+        self.assertEqual(
+            html.count('<source'), len(self.extensions()) - 1)
+
+    def test_media_picture(self):
+        with override_settings(MEDIA_ROOT=self.directory):
+            Image.new('RGB', (600, 300)).save(
+                os.path.join(self.directory, 'photo.png'))
+            html = self.render('{% media_picture "photo.png" %}')
+            missing = self.render('{% media_picture "missing.png" %}')
+
+        self.assertIn('src="/media/photo.png"', html)
+        self.assertIn('/media-derived/photo.png.480w.png 480w', html)
+        self.assertIn('/media-derived/photo.png.600w.png 600w', html)
+        self.assertEqual(missing, '<img src="/media/missing.png" alt="">')
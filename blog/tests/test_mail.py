@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail import BadHeaderError
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blog.mail import backoff, queue_mail, send_queued_mail
+from blog.models import OutgoingMessage
+
+
+class FailingBackend(EmailBackend):
+    """Stands in for a mail provider that is down."""
+
+    def send_messages(self, messages):
+        raise IOError('Connection refused')
+
+
+class UnreachableBackend(EmailBackend):
+    """Stands in for a mail server that cannot be connected to."""
+
+    def open(self):
+        raise IOError('Name or service not known')
+
+
+class MailQueueTest(TestCase):
+
+    def queue(self, count=1):
+        for n in range(count):
+            queue_mail(
+                'Subject %d' % n, 'Body', 'fan@example.com',
+                ['kevgathuku@gmail.com'])
+
+    def test_queue_mail_rejects_bad_headers(self):
+        self.assertRaises(
+            BadHeaderError, queue_mail, 'Subject', 'Body',
+            'fan\n@example.com', ['kevgathuku@gmail.com'])
+
+    def test_sends_due_messages(self):
+        self.queue(3)
+
+        self.assertEqual(send_queued_mail(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            OutgoingMessage.objects.filter(sent__isnull=True).count(), 0)
+
+    def test_sends_in_batches(self):
+        self.queue(3)
+
+        self.assertEqual(send_queued_mail(batch_size=2), (2, 0))
+        self.assertEqual(send_queued_mail(batch_size=2), (1, 0))
+
+    def test_sent_messages_are_not_sent_again(self):
+        self.queue()
+        send_queued_mail()
+
+        self.assertEqual(send_queued_mail(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND='blog.tests.test_mail.FailingBackend')
+    def test_failed_messages_are_retried_later(self):
+        self.queue()
+
+        self.assertEqual(send_queued_mail(), (0, 1))
+
+        message = OutgoingMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('Connection refused', message.last_error)
+        self.assertGreater(message.next_attempt, timezone.now())
+        # Not due yet
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+    @override_settings(
+        EMAIL_BACKEND='blog.tests.test_mail.UnreachableBackend')
+    def test_connection_errors_reschedule_the_batch(self):
+        self.queue(2)
+
+        self.assertEqual(send_queued_mail(), (0, 2))
+
+        for message in OutgoingMessage.objects.all():
+            self.assertEqual(message.attempts, 1)
+            self.assertIn('Name or service not known', message.last_error)
+            self.assertGreater(message.next_attempt, timezone.now())
+
+    @override_settings(EMAIL_BACKEND='blog.tests.test_mail.FailingBackend')
+    def test_gives_up_after_max_attempts(self):
+        self.queue()
+        OutgoingMessage.objects.update(attempts=4)
+
+        send_queued_mail(max_attempts=5)
+        OutgoingMessage.objects.update(next_attempt=timezone.now())
+
+        self.assertEqual(send_queued_mail(max_attempts=5), (0, 0))
+
+    def test_backoff_doubles(self):
+        self.assertEqual(backoff(1), timedelta(seconds=60))
+        self.assertEqual(backoff(3), timedelta(seconds=240))
@@ -0,0 +1,124 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog import metrics
+from .factories import *
+
+
+class PerformanceMiddlewareTest(TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.post = PublishedPostFactory(content='content')
+
+    def server_timing(self, response):
+        return dict(
+            part.strip().split(';', 1)
+            for part in response['Server-Timing'].split(','))
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.post.get_absolute_url())
+
+        timing = self.server_timing(response)
+        self.assertEqual(
+            set(timing), set(['total', 'db', 'template', 'markdown']))
+        self.assertIn('desc="3 queries"', timing['db'])
+
+    def test_queries_are_counted_without_the_debug_cursor(self):
+        response = self.client.get('/')
+
+        self.assertIn('desc="4 queries"', self.server_timing(response)['db'])
+        # The request started with an empty query log
+        self.assertEqual(connections['default'].queries, [])
+        self.assertNotIn('cursor', connections['default'].__dict__)
+
+    def test_markdown_time_is_recorded(self):
+        metrics.start_timers()
+        self.post.save()
+        timings = metrics.stop_timers()
+
+        self.assertIn('markdown', timings)
+
+    def test_requests_are_aggregated_per_url_name(self):
+        for n in range(3):
+            self.client.get('/')
+        self.client.get(self.post.get_absolute_url())
+
+        summary = metrics.summary()
+        self.assertEqual(summary['home']['count'], 3)
+        self.assertEqual(summary['blog:post']['count'], 1)
+        self.assertLessEqual(summary['home']['p50'], summary['home']['p99'])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(metrics.percentile(values, 0.50), 50)
+        self.assertEqual(metrics.percentile(values, 0.95), 95)
+        self.assertEqual(metrics.percentile(values, 0.99), 99)
+        self.assertEqual(metrics.percentile([7], 0.99), 7)
+
+
+class PerformanceViewTest(TestCase):
+
+    def test_requires_staff(self):
+        response = self.client.get('/performance/')
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_returns_summary_to_staff(self):
+        metrics.reset()
+        User.objects.create_superuser('staff', 'staff@example.com', 'secret')
+        self.client.login(username='staff', password='secret')
+        self.client.get('/')
+
+        response = self.client.get('/performance/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('home', json.loads(response.content.decode()))
+
+
+class PublicViewMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.post = PublishedPostFactory(content='content')
+        User.objects.create_superuser('staff', 'staff@example.com', 'secret')
+
+    def session_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            query for query in queries if 'django_session' in query['sql']]
+
+    def test_public_views_skip_sessions(self):
+        urls = ['/', self.post.get_absolute_url(),
+                self.post.category.get_absolute_url(), '/feed/rss/',
+                '/sitemap.xml', '/about/']
+        for url in urls:
+            response, queries = self.session_queries(url)
+
+            self.assertEqual(queries, [])
+            self.assertNotIn('Cookie', response.get('Vary', ''))
+            self.assertEqual(response.cookies, {})
+
+    def test_other_views_keep_the_full_stack(self):
+        response = self.client.get('/contact/')
+
+        self.assertIn('Cookie', response['Vary'])
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_signed_in_users_keep_the_full_stack(self):
+        self.client.login(username='staff', password='secret')
+        response, queries = self.session_queries('/')
+
+        self.assertNotEqual(queries, [])
+        self.assertEqual(self.client.get('/admin/').status_code, 200)
+
+    def test_posts_keep_the_full_stack(self):
+        response = self.client.post('/', {})
+
+        self.assertIn('Cookie', response.get('Vary', ''))
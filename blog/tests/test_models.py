@@ -1,3 +1,6 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
 from .factories import *
@@ -17,6 +20,63 @@ class BlogPostTest(TestCase):
             test_post.__unicode__(),
             '{0}'.format(test_post.title))
 
+    def test_content_html_rendered_on_save(self):
+        test_post = PostFactory(content='Some *emphasis*')
+        self.assertIn('<em>emphasis</em>', test_post.content_html)
+
+    def test_content_html_updated_when_content_changes(self):
+        test_post = PostFactory(content='Some *emphasis*')
+        test_post.content = 'Some **strong** words'
+        test_post.save()
+
+        saved = models.Post.objects.get(pk=test_post.pk)
+        self.assertIn('<strong>strong</strong>', saved.content_html)
+        self.assertNotIn('<em>', saved.content_html)
+
+    def test_updated_changes_on_save(self):
+        test_post = PostFactory()
+        previous = test_post.updated
+
+        test_post.save()
+
+        self.assertGreater(test_post.updated, previous)
+
+    def test_last_modified(self):
+        first = PostFactory()
+        second = PostFactory()
+
+        self.assertEqual(models.Post.objects.last_modified(), second.updated)
+        self.assertEqual(
+            models.Post.objects.filter(
+                category=first.category).last_modified(),
+            first.updated)
+
+    def test_last_modified_without_posts(self):
+        self.assertIsNone(models.Post.objects.last_modified())
+
+    def test_changes_count_the_posts(self):
+        first = PostFactory()
+        second = PostFactory()
+
+        self.assertEqual(
+            models.Post.objects.changes(), (second.updated, 2))
+        first.delete()
+        self.assertEqual(
+            models.Post.objects.changes(), (second.updated, 1))
+        second.delete()
+        self.assertIsNone(models.Post.objects.changes())
+
+    def test_excerpts_built_on_save(self):
+        test_post = PostFactory(content=' '.join(['word'] * 60))
+
+        self.assertEqual(len(test_post.excerpt_short.split()), 30)
+        self.assertEqual(len(test_post.excerpt_long.split()), 50)
+        self.assertEqual(test_post.excerpt_version, models.EXCERPT_VERSION)
+
+    def test_excerpts_are_plain_text(self):
+        test_post = PostFactory(content='Some *emphasis*')
+        self.assertEqual(test_post.excerpt_long.strip(), 'Some emphasis')
+
 
 class CategoryTest(TestCase):
 
@@ -31,3 +91,80 @@ class CategoryTest(TestCase):
         self.assertEqual(
             test_uni.__unicode__(),
             '{0}'.format(test_uni.name))
+
+    def test_saving_category_marks_its_posts_updated(self):
+        test_post = PostFactory()
+        test_cat = test_post.category
+
+        test_cat.save()
+
+        self.assertEqual(
+            models.Post.objects.get(pk=test_post.pk).updated,
+            test_cat.updated)
+
+
+class ListingIndexTest(TestCase):
+    """The listing queries must be answered from the listing indexes"""
+
+    def setUp(self):
+        cat = CategoryFactory()
+        PostFactory.create_batch(20, published=True, category=cat)
+        PostFactory.create_batch(20, published=False, category=cat)
+        self.category = cat
+
+    def index_columns(self):
+        """Map each index on the post table to its leading columns."""
+        table = models.Post._meta.db_table
+        indexes = {}
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT indexname, indexdef FROM pg_indexes '
+                    'WHERE tablename = %s', [table])
+                for name, definition in cursor.fetchall():
+                    columns = definition.split('(', 1)[1].split(')')[0]
+                    indexes[name] = [
+                        column.split()[0] for column in columns.split(',')]
+            else:
+                cursor.execute('PRAGMA index_list(%s)' % table)
+                for name in [row[1] for row in cursor.fetchall()]:
+                    cursor.execute('PRAGMA index_info(%s)' % name)
+                    indexes[name] = [row[2] for row in cursor.fetchall()]
+        return indexes
+
+    def listing_indexes(self):
+        return [
+            name for name, columns in self.index_columns().items()
+            if columns[:2] == ['published', 'created'] or
+            columns == ['category_id', 'published', 'created'] or
+            name == 'blog_post_published_partial'
+        ]
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny test tables are always cheapest to scan in full
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql, params)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' '.join(str(row) for row in cursor.fetchall())
+
+    def assertUsesListingIndex(self, queryset):
+        plan = self.explain(queryset)
+        self.assertTrue(
+            any(name in plan for name in self.listing_indexes()), plan)
+
+    @skipUnless(
+        connection.vendor in ('postgresql', 'sqlite'), 'Needs EXPLAIN support')
+    def test_index_listing_uses_index(self):
+        self.assertUsesListingIndex(
+            models.Post.objects.listing().order_by('-created', '-id')[:8])
+
+    @skipUnless(
+        connection.vendor in ('postgresql', 'sqlite'), 'Needs EXPLAIN support')
+    def test_category_listing_uses_index(self):
+        self.assertUsesListingIndex(
+            models.Post.objects.listing().filter(
+                category=self.category).order_by('-created', '-id')[:8])
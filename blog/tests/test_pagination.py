@@ -0,0 +1,95 @@
+from django.test import TestCase
+
+from blog.models import Post
+from blog.pagination import (
+    CursorPaginator, InvalidCursor, decode_cursor, encode_cursor)
+from .factories import *
+
+
+class CursorTest(TestCase):
+
+    def test_cursor_round_trip(self):
+        post = PublishedPostFactory()
+
+        created, pk = decode_cursor(encode_cursor(post))
+
+        self.assertEqual(created, post.created)
+        self.assertEqual(pk, post.pk)
+
+    def test_malformed_cursor_raises(self):
+        self.assertRaises(InvalidCursor, decode_cursor, 'abc')
+        self.assertRaises(InvalidCursor, decode_cursor, '1-2-3')
+
+
+class CursorPaginatorTest(TestCase):
+
+    def setUp(self):
+        PostFactory.reset_sequence()
+        self.posts = PostFactory.create_batch(12, published=True)
+        self.paginator = CursorPaginator(
+            Post.objects.all(), 5, orphans=2)
+
+    def test_walking_back_through_the_archive(self):
+        # The two leftover posts are merged into the last page
+        first = self.paginator.first_page()
+        second = self.paginator.page_before(first.next_cursor)
+
+        self.assertEqual(list(first), self.posts[:6:-1])
+        self.assertEqual(list(second), self.posts[6::-1])
+        self.assertTrue(second.has_previous())
+        self.assertFalse(second.has_next())
+
+    def test_walking_forward_returns_to_first_page(self):
+        first = self.paginator.first_page()
+        second = self.paginator.page_before(first.next_cursor)
+        back = self.paginator.page_after(second.previous_cursor)
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_posts_sharing_a_timestamp_are_not_skipped(self):
+        Post.objects.update(created=self.posts[0].created)
+
+        first = self.paginator.first_page()
+        second = self.paginator.page_before(first.next_cursor)
+
+        self.assertEqual(
+            set(first) | set(second), set(Post.objects.all()))
+
+    def test_cursor_older_than_every_post_delivers_last_page(self):
+        page = self.paginator.page_before('1-1')
+
+        self.assertEqual(list(page), list(self.paginator.last_page()))
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+        self.assertIsNone(page.next_cursor)
+
+    def test_cursor_newer_than_every_post_delivers_first_page(self):
+        page = self.paginator.page_after('99999999999999999-1')
+
+        self.assertEqual(list(page), list(self.paginator.first_page()))
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertIsNone(page.previous_cursor)
+
+    def test_stale_cursor_near_the_newest_post(self):
+        # The cursor post was deleted, leaving nothing newer than it
+        cursor = encode_cursor(self.posts[-1])
+        self.posts[-1].delete()
+
+        page = self.paginator.page_before(cursor)
+
+        self.assertEqual(list(page), self.posts[-2:-7:-1])
+        self.assertFalse(page.has_previous())
+        self.assertIsNone(page.previous_cursor)
+
+    def test_stale_cursor_near_the_oldest_post(self):
+        cursor = encode_cursor(self.posts[0])
+        self.posts[0].delete()
+
+        page = self.paginator.page_after(cursor)
+
+        self.assertEqual(list(page), self.posts[5:0:-1])
+        self.assertFalse(page.has_next())
+        self.assertIsNone(page.next_cursor)
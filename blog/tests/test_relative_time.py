@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blog import relativetime
+from blog.cache import get_page_cache
+from blog.models import Post
+from blog.relativetime import coarse_relative_time
+from .factories import *
+from .test_cache import LOCMEM_CACHES
+
+
+class CoarseRelativeTimeTest(TestCase):
+
+    def setUp(self):
+        self.tz = timezone.get_current_timezone()
+        self.now = timezone.make_aware(datetime(2015, 6, 15, 12), self.tz)
+
+    def ago(self, **kwargs):
+        text, expires = coarse_relative_time(
+            self.now - timedelta(**kwargs), self.now)
+        return text, timezone.localtime(expires).strftime('%Y-%m-%d %H:%M')
+
+    def test_buckets(self):
+        self.assertEqual(self.ago(hours=3), ('today', '2015-06-16 00:00'))
+        self.assertEqual(self.ago(days=1), ('yesterday', '2015-06-16 00:00'))
+        self.assertEqual(self.ago(days=3), ('3 days ago', '2015-06-16 00:00'))
+        self.assertEqual(self.ago(days=8), ('a week ago', '2015-06-21 00:00'))
+        self.assertEqual(
+            self.ago(days=28), ('4 weeks ago', '2015-06-17 00:00'))
+        self.assertEqual(
+            self.ago(days=70), ('2 months ago', '2015-07-05 00:00'))
+        self.assertEqual(
+            self.ago(days=800), ('2 years ago', '2016-04-05 00:00'))
+
+    def test_times_ahead_count_as_today(self):
+        self.assertEqual(self.ago(hours=-1)[0], 'today')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RelativeTimePageTest(TestCase):
+
+    def setUp(self):
+        get_page_cache().clear()
+        self.post = PublishedPostFactory(content='content')
+        three_days_ago = timezone.now() - timedelta(days=3)
+        Post.objects.filter(pk=self.post.pk).update(
+            created=three_days_ago, updated=three_days_ago)
+
+    def server_mode(self):
+        mode = relativetime.RELATIVE_TIME
+        relativetime.RELATIVE_TIME = 'server'
+
+        def restore():
+            relativetime.RELATIVE_TIME = mode
+        self.addCleanup(restore)
+
+    def test_client_mode_writes_the_date(self):
+        response = self.client.get(self.post.get_absolute_url())
+
+        self.assertContains(response, '<time class="relative-time" datetime=')
+        self.assertNotContains(response, 'ago')
+        self.assertFalse(response.has_header('Expires'))
+
+    def test_server_mode_expires_with_the_relative_time(self):
+        self.server_mode()
+        response = self.client.get(self.post.get_absolute_url())
+
+        self.assertContains(response, '3 days ago')
+        self.assertTrue(response.has_header('Expires'))
+        max_age = int(response['Cache-Control'].split('max-age=')[1])
+        self.assertTrue(0 < max_age <= 24 * 60 * 60)
+
+    def test_server_mode_max_age_counts_down_in_the_cache(self):
+        self.server_mode()
+        first = self.client.get('/')
+        cached = self.client.get('/')
+
+        self.assertEqual(first['Expires'], cached['Expires'])
+        self.assertIn('max-age=', cached['Cache-Control'])
+
+    def test_server_mode_pages_change_daily(self):
+        self.server_mode()
+        response = self.client.get(self.post.get_absolute_url())
+        midnight = relativetime.local_midnight(
+            timezone.localtime(timezone.now()).date())
+
+        self.assertEqual(
+            response['Last-Modified'],
+            midnight.astimezone(timezone.utc).strftime(
+                '%a, %d %b %Y %H:%M:%S GMT'))
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+
+from kevgathuku.db import replicas
+from kevgathuku.db.replicas import ReplicaSelector
+from blog.models import Category, Post
+
+
+class ReplicaSelectorTest(TestCase):
+
+    def selector(self, latencies, strategy='round_robin'):
+        return ReplicaSelector(
+            sorted(latencies), strategy, probe=latencies.get)
+
+    def test_round_robin(self):
+        selector = self.selector({'a': 5.0, 'b': 1.0})
+
+        chosen = [selector.choose() for n in range(4)]
+        self.assertEqual(sorted(chosen), ['a', 'a', 'b', 'b'])
+        self.assertNotEqual(chosen[0], chosen[1])
+
+    def test_least_latency(self):
+        selector = self.selector({'a': 5.0, 'b': 1.0}, 'least_latency')
+
+        self.assertEqual(selector.choose(), 'b')
+
+    def test_failing_replicas_are_left_out(self):
+        self.assertEqual(self.selector({'a': None, 'b': 2.0}).choose(), 'b')
+        self.assertIsNone(self.selector({'a': None}).choose())
+
+    def test_replicas_are_probed_once_per_interval(self):
+        probes = []
+        selector = ReplicaSelector(
+            ['a'], probe=lambda alias: probes.append(alias) or 1.0)
+        selector.choose()
+        selector.choose()
+
+        self.assertEqual(probes, ['a'])
+
+
+class ReplicaRoutingTest(TestCase):
+    """Reads of public views go to a second SQLite database."""
+
+    @classmethod
+    def setUpClass(cls):
+        super(ReplicaRoutingTest, cls).setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        connections.databases['replica'] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(cls.directory, 'replica.sqlite3'))
+        call_command(
+            'migrate', database='replica', verbosity=0, interactive=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        shutil.rmtree(cls.directory)
+        super(ReplicaRoutingTest, cls).tearDownClass()
+
+    def setUp(self):
+        saved = replicas.REPLICAS, replicas.selector, replicas.WRITES_CACHE
+        replicas.REPLICAS = ['replica']
+        replicas.selector = ReplicaSelector(['replica'])
+        replicas.WRITES_CACHE = 'default'
+
+        def restore():
+            replicas.REPLICAS, replicas.selector, replicas.WRITES_CACHE = (
+                saved)
+            replicas.reset_state()
+        self.addCleanup(restore)
+
+        # Only the replica has this post
+        author = User.objects.using('replica').create(username='author')
+        category = Category.objects.using('replica').create(
+            name='Replicated', slug='replicated')
+        self.post = Post.objects.using('replica').create(
+            title='Replicated', slug='replicated', content='content',
+            category=category, author=author, published=True)
+        for model in (Post, Category, User):
+            self.addCleanup(model.objects.using('replica').all().delete)
+
+    def test_public_views_read_from_a_replica(self):
+        response = self.client.get(self.post.get_absolute_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Replicated')
+
+    def test_signed_in_users_read_from_the_primary(self):
+        response = self.client.get(
+            self.post.get_absolute_url(), HTTP_COOKIE='sessionid=x')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_writes_keep_readers_on_the_primary(self):
+        response = self.client.post('/contact/', {
+            'name': 'A', 'email': 'a@example.com', 'message': 'Hi'})
+
+        self.assertIn(replicas.STICKY_COOKIE, response.cookies)
+        self.assertEqual(
+            self.client.get(self.post.get_absolute_url()).status_code, 404)
+
+    def test_recent_writes_keep_everyone_on_the_primary(self):
+        replicas.record_write()
+        self.client.cookies.clear()
+
+        self.assertEqual(
+            self.client.get(self.post.get_absolute_url()).status_code, 404)
+
+    def test_unavailable_replicas_fall_back_to_the_primary(self):
+        replicas.selector = ReplicaSelector(
+            ['replica'], probe=lambda alias: None)
+
+        self.assertEqual(
+            self.client.get(self.post.get_absolute_url()).status_code, 404)
@@ -0,0 +1,119 @@
+from django.test import TestCase
+
+from blog.models import SearchTerm
+from blog.search import build_terms, highlight, search, tokenize
+from .factories import *
+
+
+class TokenizeTest(TestCase):
+
+    def test_lowercases_and_drops_stop_words(self):
+        self.assertEqual(
+            tokenize('The Django ORM and a QuerySet'),
+            ['django', 'orm', 'queryset'])
+
+    def test_title_outweighs_body(self):
+        terms = build_terms('Django', '', '', [], '<p>Django python</p>')
+
+        self.assertEqual(terms['django'], 11)
+        self.assertEqual(terms['python'], 1)
+
+
+class SearchIndexTest(TestCase):
+
+    def test_post_indexed_on_save(self):
+        post = PublishedPostFactory(content='Gunicorn workers')
+
+        self.assertTrue(
+            SearchTerm.objects.filter(post=post, term='gunicorn').exists())
+
+    def test_index_updated_when_content_changes(self):
+        post = PublishedPostFactory(content='Gunicorn workers')
+        post.content = 'Celery workers'
+        post.save()
+
+        terms = SearchTerm.objects.filter(post=post).values_list(
+            'term', flat=True)
+        self.assertIn('celery', terms)
+        self.assertNotIn('gunicorn', terms)
+
+    def test_tags_are_indexed(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('heroku')
+
+        self.assertTrue(
+            SearchTerm.objects.filter(post=post, term='heroku').exists())
+
+        post.tags.remove('heroku')
+
+        self.assertFalse(
+            SearchTerm.objects.filter(post=post, term='heroku').exists())
+
+
+class SearchTest(TestCase):
+
+    def test_only_published_posts_match(self):
+        published = PublishedPostFactory(content='Deploying to Heroku')
+        UnPublishedPostFactory(content='Deploying to Heroku')
+
+        self.assertEqual(list(search('heroku')), [published])
+
+    def test_results_ranked_by_weight(self):
+        in_body = PostFactory(
+            title='First', published=True, content='All about heroku')
+        in_title = PostFactory(
+            title='Heroku tips', published=True, content='content')
+
+        self.assertEqual(list(search('heroku')), [in_title, in_body])
+
+    def test_search_is_a_single_query(self):
+        PostFactory.create_batch(3, published=True, content='heroku')
+
+        with self.assertNumQueries(2):
+            # The ranked posts, plus prefetching their tags
+            list(search('heroku'))
+
+    def test_results_are_paginated_with_a_cursor(self):
+        PostFactory.reset_sequence()
+        posts = PostFactory.create_batch(5, published=True, content='heroku')
+
+        first = search('heroku', per_page=3)
+        second = search('heroku', first.next_cursor, per_page=3)
+
+        self.assertTrue(first.has_next())
+        self.assertFalse(second.has_next())
+        self.assertEqual(set(first) | set(second), set(posts))
+
+    def test_empty_query(self):
+        self.assertEqual(list(search('the and')), [])
+
+    def test_highlight(self):
+        snippet = highlight('Deploying <Django> to Heroku.', ['heroku'])
+
+        self.assertEqual(
+            snippet, 'Deploying &lt;Django&gt; to <mark>Heroku.</mark>')
+
+
+class SearchViewTest(TestCase):
+
+    def test_search_page(self):
+        post = PublishedPostFactory(content='Deploying to Heroku')
+
+        response = self.client.get('/search/', {'q': 'heroku'})
+
+        self.assertTemplateUsed(response, 'blog/search.html')
+        self.assertContains(response, post.title)
+        self.assertContains(response, '<mark>Heroku</mark>')
+
+    def test_no_results(self):
+        response = self.client.get('/search/', {'q': 'heroku'})
+
+        self.assertContains(response, 'Nothing matched')
+
+    def test_invalid_cursor_shows_first_page(self):
+        post = PublishedPostFactory(content='Deploying to Heroku')
+
+        response = self.client.get(
+            '/search/', {'q': 'heroku', 'after': 'junk'})
+
+        self.assertContains(response, post.title)
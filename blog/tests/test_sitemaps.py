@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from blog import sitemaps
+from blog.cache import get_page_cache
+from blog.models import Category, Post
+from .factories import *
+from .test_cache import LOCMEM_CACHES
+
+
+class SitemapTest(TestCase):
+
+    def test_index_lists_the_sections(self):
+        PublishedPostFactory(content='content')
+
+        response = self.client.get('/sitemap.xml')
+
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertContains(response, '<sitemapindex')
+        self.assertContains(response, 'http://testserver/sitemap-pages.xml')
+        self.assertContains(response, 'http://testserver/sitemap-posts-0.xml')
+
+    def test_posts_are_chunked_by_id(self):
+        posts = PostFactory.create_batch(3, published=True)
+        chunk_size = sitemaps.SITEMAP_CHUNK_SIZE
+        sitemaps.SITEMAP_CHUNK_SIZE = posts[1].pk
+        try:
+            index = self.client.get('/sitemap.xml')
+            first = self.client.get('/sitemap-posts-0.xml')
+        finally:
+            sitemaps.SITEMAP_CHUNK_SIZE = chunk_size
+
+        self.assertContains(index, '/sitemap-posts-1.xml')
+        self.assertContains(first, posts[0].get_absolute_url())
+        self.assertNotContains(first, posts[1].get_absolute_url())
+
+    def test_post_section_lists_published_posts_with_lastmod(self):
+        post = PublishedPostFactory(content='content')
+        UnPublishedPostFactory(content='content')
+
+        response = self.client.get('/sitemap-posts-0.xml')
+
+        self.assertContains(
+            response, '<loc>http://testserver%s</loc><lastmod>%s</lastmod>' % (
+                post.get_absolute_url(), post.updated.strftime('%Y-%m-%d')))
+        self.assertContains(response, '<url>', count=1)
+
+    def test_empty_post_section_is_404(self):
+        response = self.client.get('/sitemap-posts-99.xml')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_section(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django')
+
+        response = self.client.get('/sitemap-pages.xml')
+
+        created = timezone.localtime(post.created)
+        for path in ['/', '/about/', '/about-this-site/', '/contact/',
+                     post.category.get_absolute_url(), '/tag/django/',
+                     '/archive/%d/' % created.year,
+                     '/archive/%d/%02d/' % (created.year, created.month)]:
+            self.assertContains(
+                response, '<loc>http://testserver%s</loc>' % path)
+
+    def test_category_lastmod_is_its_latest_published_post(self):
+        category = CategoryFactory()
+        post = PublishedPostFactory(category=category, content='content')
+        draft = UnPublishedPostFactory(category=category, content='content')
+        day = timezone.now() - timedelta(days=30)
+        Post.objects.filter(pk=post.pk).update(updated=day)
+        Category.objects.filter(pk=category.pk).update(
+            updated=day - timedelta(days=30))
+
+        response = self.client.get('/sitemap-pages.xml')
+
+        self.assertContains(
+            response, '<loc>http://testserver%s</loc><lastmod>%s</lastmod>' % (
+                category.get_absolute_url(), day.strftime('%Y-%m-%d')))
+        self.assertNotIn(draft.updated.strftime('%Y-%m-%d'), response.content)
+
+    def test_query_count_does_not_grow_with_posts(self):
+        PostFactory.create_batch(10, published=True)
+
+        with self.assertNumQueries(1):
+            self.client.get('/sitemap-posts-0.xml')
+
+    def test_robots_txt(self):
+        response = self.client.get('/robots.txt')
+
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertContains(response, 'Disallow: /admin/')
+        self.assertContains(
+            response, 'Sitemap: http://testserver/sitemap.xml')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SitemapCacheTest(TestCase):
+
+    def setUp(self):
+        get_page_cache().clear()
+        self.post = PublishedPostFactory(content='content')
+
+    def test_sitemap_is_cached_until_a_post_changes(self):
+        self.client.get('/sitemap-posts-0.xml')
+        with self.assertNumQueries(0):
+            self.client.get('/sitemap-posts-0.xml')
+
+        self.post.slug = 'new-slug'
+        self.post.save()
+
+        self.assertContains(
+            self.client.get('/sitemap-posts-0.xml'), '/post/new-slug/')
+
+    def test_hosts_get_separate_cache_entries(self):
+        for url in ['/sitemap.xml', '/sitemap-pages.xml',
+                    '/sitemap-posts-0.xml', '/robots.txt']:
+            self.client.get(url, HTTP_HOST='one.example')
+
+            response = self.client.get(url, HTTP_HOST='two.example')
+
+            self.assertContains(response, 'http://two.example/')
+            self.assertNotContains(response, 'one.example')
+            with self.assertNumQueries(0):
+                self.client.get(url, HTTP_HOST='two.example')
+
+    def test_schemes_get_separate_cache_entries(self):
+        self.client.get('/sitemap.xml', HTTP_HOST='one.example')
+
+        response = self.client.get(
+            '/sitemap.xml', HTTP_HOST='one.example', secure=True)
+
+        self.assertContains(response, 'https://one.example/')
@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.test import SimpleTestCase
+
+from kevgathuku.static import StaticFileServer, accepted_encodings
+
+
+def django_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+class StaticFileServerTest(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'css'))
+        for name in ['css/site.css', 'css/site.0123456789ab.css']:
+            self.write(name, b'body { color: red; }' * 50)
+            with gzip.open(os.path.join(self.root, name + '.gz'), 'wb') as f:
+                f.write(b'body { color: red; }' * 50)
+        self.write('staticfiles.json', json.dumps({'paths': {
+            'css/site.css': 'css/site.0123456789ab.css'}}).encode('utf-8'))
+        self.server = StaticFileServer(django_app, self.root, '/static/')
+
+    def write(self, name, content):
+        with open(os.path.join(self.root, name), 'wb') as f:
+            f.write(content)
+
+    def get(self, path, method='GET', **headers):
+        environ = {
+            'PATH_INFO': path, 'REQUEST_METHOD': method,
+            'wsgi.input': BytesIO()}
+        environ.update(headers)
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = dict(headers)
+
+        body = self.server(environ, start_response)
+        response['body'] = b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        return response
+
+    def test_other_paths_reach_django(self):
+        self.assertEqual(self.get('/')['body'], b'django')
+        self.assertEqual(self.get('/static/missing.css')['body'], b'django')
+
+    def test_variants_are_not_served_directly(self):
+        self.assertEqual(
+            self.get('/static/css/site.css.gz')['body'], b'django')
+
+    def test_serves_gzip_when_accepted(self):
+        response = self.get(
+            '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(response['headers']['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            int(response['headers']['Content-Length']), len(response['body']))
+        self.assertEqual(
+            gzip.GzipFile(fileobj=BytesIO(response['body'])).read(),
+            b'body { color: red; }' * 50)
+
+    def test_serves_the_original_otherwise(self):
+        response = self.get(
+            '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip;q=0')
+
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertEqual(response['body'], b'body { color: red; }' * 50)
+        self.assertEqual(
+            response['headers']['Content-Type'], 'text/css; charset=utf-8')
+
+    def test_hashed_files_are_immutable(self):
+        hashed = self.get('/static/css/site.0123456789ab.css')
+        plain = self.get('/static/css/site.css')
+
+        self.assertIn('immutable', hashed['headers']['Cache-Control'])
+        self.assertNotIn('immutable', plain['headers']['Cache-Control'])
+
+    def test_conditional_get(self):
+        etag = self.get('/static/css/site.css')['headers']['ETag']
+
+        response = self.get('/static/css/site.css', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response['status'], 304)
+        self.assertEqual(response['body'], b'')
+
+    def test_head_has_no_body(self):
+        response = self.get('/static/css/site.css', method='HEAD')
+
+        self.assertEqual(response['status'], 200)
+        self.assertEqual(response['body'], b'')
+
+    def test_uses_the_servers_file_wrapper(self):
+        wrapped = []
+
+        def file_wrapper(f, block_size):
+            wrapped.append(f.name)
+            return iter([f.read()])
+
+        self.get('/static/css/site.css', **{'wsgi.file_wrapper': file_wrapper})
+
+        self.assertEqual(wrapped, [os.path.join(self.root, 'css/site.css')])
+
+
+class AcceptEncodingTest(SimpleTestCase):
+
+    def test_parses_qualities(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=1.0, br; q=0, identity'),
+            set(['gzip', 'identity']))
+        self.assertIn('br', accepted_encodings('*'))
@@ -0,0 +1,87 @@
+from django.test import TestCase
+from taggit.models import Tag
+
+from blog.models import TagCount
+from blog.tags import rebuild_tag_counts, tag_cloud
+from .factories import *
+
+
+def counts():
+    return dict(TagCount.objects.values_list('slug', 'count'))
+
+
+class TagCountTest(TestCase):
+
+    def test_tagging_a_published_post_counts_it(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django', 'python')
+
+        self.assertEqual(counts(), {'django': 1, 'python': 1})
+
+    def test_unpublished_posts_are_not_counted(self):
+        post = UnPublishedPostFactory(content='content')
+        post.tags.add('django')
+
+        self.assertEqual(counts(), {'django': 0})
+
+    def test_removing_a_tag_recounts_it(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django', 'python')
+        post.tags.remove('python')
+
+        self.assertEqual(counts(), {'django': 1, 'python': 0})
+
+    def test_publishing_and_unpublishing_recounts(self):
+        post = UnPublishedPostFactory(content='content')
+        post.tags.add('django')
+
+        post.published = True
+        post.save()
+        self.assertEqual(counts(), {'django': 1})
+
+        post.published = False
+        post.save()
+        self.assertEqual(counts(), {'django': 0})
+
+    def test_deleting_a_post_recounts_its_tags(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django')
+        post.delete()
+
+        self.assertEqual(counts(), {'django': 0})
+
+    def test_renaming_a_tag_renames_its_count(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django')
+        tag = Tag.objects.get(slug='django')
+        tag.name = tag.slug = 'django-orm'
+        tag.save()
+
+        self.assertEqual(counts(), {'django-orm': 1})
+
+    def test_rebuild(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django')
+        TagCount.objects.update(count=42)
+
+        rebuild_tag_counts()
+
+        self.assertEqual(counts(), {'django': 1})
+
+
+class TagCloudTest(TestCase):
+
+    def test_sizes_scale_with_the_most_used_tag(self):
+        for n in range(5):
+            post = PublishedPostFactory(title='Post %d' % n, content='content')
+            post.tags.add('django')
+            if n == 0:
+                post.tags.add('heroku')
+        UnPublishedPostFactory(content='content').tags.add('draft')
+
+        with self.assertNumQueries(1):
+            cloud = tag_cloud()
+
+        self.assertEqual(
+            [(tag.name, tag.size) for tag in cloud],
+            [('django', 5), ('heroku', 1)])
@@ -1,10 +1,14 @@
 from django.core import mail
+from django.core.management import call_command
 from django.core.urlresolvers import resolve
 from django.template.loader import render_to_string
 from django.test import TestCase
 from django.utils.html import escape
+from django.utils.six import StringIO
 
-from blog.views import (about, about_site, category, contact, index, show_post)
+from blog.models import OutgoingMessage
+from blog.views import (
+    about, about_site, category, contact, index, show_post, tag, tags)
 from .factories import *
 
 
@@ -86,6 +90,52 @@ class PaginationTest(HomePageTest):
 
         self.assertContains(response, 'Newer Posts')
 
+    def test_older_posts_link_shows_next_page(self):
+        PostFactory.reset_sequence()
+        posts = PostFactory.create_batch(
+            10, published=True, content='some content')
+
+        first_page = self.client.get('/')
+        response = self.client.get(
+            '/', {'before': first_page.context['posts'].next_cursor})
+
+        self.assertContains(response, posts[0].title)
+        self.assertNotContains(response, posts[9].title)
+        self.assertContains(response, 'Newer Posts')
+        self.assertNotContains(response, 'Older Posts')
+
+    def test_newer_posts_link_shows_previous_page(self):
+        PostFactory.reset_sequence()
+        posts = PostFactory.create_batch(
+            10, published=True, content='some content')
+
+        last_page = self.client.get('/?page=2')
+        response = self.client.get(
+            '/', {'after': last_page.context['posts'].previous_cursor})
+
+        self.assertContains(response, posts[9].title)
+        self.assertNotContains(response, posts[0].title)
+        self.assertNotContains(response, 'Newer Posts')
+
+    def test_invalid_cursor_delivers_first_page(self):
+        published = PublishedPostFactory.create()
+
+        response = self.client.get('/?before=not-a-cursor')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Published Post")
+
+    def test_out_of_range_cursors_deliver_a_page(self):
+        PostFactory.create_batch(10, published=True, content='content')
+
+        older = self.client.get('/?before=1-1')
+        newer = self.client.get('/?after=99999999999999999-1')
+
+        self.assertContains(older, 'Newer Posts')
+        self.assertNotContains(older, 'Older Posts')
+        self.assertContains(newer, 'Older Posts')
+        self.assertNotContains(newer, 'Newer Posts')
+
 
 class CategoryTest(TestCase):
 
@@ -184,6 +234,219 @@ class CategoryPaginationTest(CategoryTest):
 
         self.assertContains(response, 'Newer Posts')
 
+    def test_pager_links_stay_in_category(self):
+        cat = CategoryFactory()
+        PostFactory.reset_sequence()
+        posts = PostFactory.create_batch(
+            10, published=True, content='some content', category=cat)
+
+        response = self.client.get(
+            '/category/{slug}/'.format(slug=cat.slug))
+
+        self.assertContains(
+            response, 'href="/category/{slug}/?before='.format(slug=cat.slug))
+
+
+class TagTest(TestCase):
+
+    def test_tag_urls_resolve_to_correct_views(self):
+        self.assertEqual(resolve('/tag/django/').func, tag)
+        self.assertEqual(resolve('/tags/').func, tags)
+
+    def test_unknown_tag_is_404(self):
+        response = self.client.get('/tag/does-not-exist/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_tag_view_displays_only_published_items(self):
+        published = PublishedPostFactory(content='content')
+        published.tags.add('django')
+        UnPublishedPostFactory(content='content').tags.add('django')
+
+        response = self.client.get('/tag/django/')
+
+        self.assertTemplateUsed(response, 'blog/tag.html')
+        self.assertContains(response, 'Published Post')
+        self.assertNotContains(response, 'My Unpublished Post')
+
+    def test_pager_links_stay_on_tag(self):
+        for post in PostFactory.create_batch(8, published=True):
+            post.tags.add('django')
+
+        response = self.client.get('/tag/django/')
+
+        self.assertContains(response, '/tag/django/?before=')
+
+    def test_out_of_range_cursor_delivers_a_page(self):
+        for post in PostFactory.create_batch(8, published=True):
+            post.tags.add('django')
+
+        response = self.client.get('/tag/django/?before=1-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/tag/django/?after=')
+
+    def test_post_links_to_its_tags(self):
+        post = PublishedPostFactory(content='content')
+        post.tags.add('django')
+
+        response = self.client.get(post.get_absolute_url())
+
+        self.assertContains(response, 'href="/tag/django/"')
+
+    def test_tag_cloud(self):
+        PublishedPostFactory(content='content').tags.add('django')
+
+        response = self.client.get('/tags/')
+
+        self.assertTemplateUsed(response, 'blog/tags.html')
+        self.assertContains(response, 'href="/tag/django/"')
+
+
+class QueryCountTest(TestCase):
+    """The number of queries must not grow with the posts on a page"""
+
+    def assertSameQueryCount(self, num, url, create_posts):
+        create_posts(1)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+
+        create_posts(4)
+        with self.assertNumQueries(num):
+            self.client.get(url)
+
+    def create_published(self, count, **kwargs):
+        for post in PostFactory.create_batch(
+                count, published=True, content='content', **kwargs):
+            post.tags.add('django', 'python')
+
+    def test_index_query_count_is_constant(self):
+        # The validators, the posts, their tags and the archive months
+        self.assertSameQueryCount(4, '/', self.create_published)
+
+    def test_category_query_count_is_constant(self):
+        cat = CategoryFactory()
+
+        def create_posts(count):
+            self.create_published(count, category=cat)
+
+        # One extra query looks up the category itself
+        self.assertSameQueryCount(4, cat.get_absolute_url(), create_posts)
+
+    def test_tag_query_count_is_constant(self):
+        # The tag, the validators, the posts and their tags
+        self.assertSameQueryCount(4, '/tag/django/', self.create_published)
+
+    def test_tag_cloud_query_count(self):
+        self.create_published(5)
+
+        with self.assertNumQueries(1):
+            self.client.get('/tags/')
+
+    def test_show_post_query_count(self):
+        post = PublishedPostFactory()
+        post.tags.add('django')
+
+        with self.assertNumQueries(3):
+            self.client.get(post.get_absolute_url())
+
+    def test_listing_defers_post_bodies(self):
+        self.create_published(1)
+
+        response = self.client.get('/')
+
+        loaded = response.context['posts'][0].__dict__
+        self.assertNotIn('content', loaded)
+        self.assertNotIn('content_html', loaded)
+
+
+class ConditionalGetTest(TestCase):
+    """Unchanged pages are answered with 304 Not Modified"""
+
+    def setUp(self):
+        self.post = PublishedPostFactory(content='content')
+        self.urls = [
+            '/', self.post.category.get_absolute_url(),
+            self.post.get_absolute_url()]
+
+    def test_pages_send_validators(self):
+        for url in self.urls:
+            response = self.client.get(url)
+
+            self.assertTrue(response.has_header('ETag'))
+            self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        for url in self.urls:
+            etag = self.client.get(url)['ETag']
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.templates, [])
+
+    def test_if_modified_since_returns_304(self):
+        for url in self.urls:
+            last_modified = self.client.get(url)['Last-Modified']
+
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+            self.assertEqual(response.status_code, 304)
+
+    def test_new_post_changes_the_etag(self):
+        etag = self.client.get('/')['ETag']
+        newer = PublishedPostFactory(title='A newer post')
+
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, newer.title)
+
+    def test_editing_a_post_changes_the_etag(self):
+        for url in self.urls:
+            etag = self.client.get(url)['ETag']
+            self.post.save()
+
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 200)
+
+    def test_unpublishing_a_post_changes_the_etag(self):
+        PublishedPostFactory(title='Another post')
+        etag = self.client.get('/')['ETag']
+
+        self.post.published = False
+        self.post.save()
+
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.post.title)
+
+    def test_deleting_an_older_post_changes_the_etag(self):
+        older = PublishedPostFactory(
+            title='An older post', category=self.post.category)
+        self.post.save()
+        urls = ['/', self.post.category.get_absolute_url(), '/feed/rss/']
+        etags = dict((url, self.client.get(url)['ETag']) for url in urls)
+
+        older.delete()
+
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotContains(response, older.title)
+
+    def test_pages_of_a_listing_have_different_etags(self):
+        self.assertNotEqual(
+            self.client.get('/')['ETag'],
+            self.client.get('/?page=2')['ETag'])
+
+    def test_empty_listing_has_no_validators(self):
+        self.post.delete()
+
+        self.assertFalse(self.client.get('/').has_header('ETag'))
+
 
 class ContactViewTest(TestCase):
     """Tests the Contact View"""
@@ -221,9 +484,17 @@ class ContactViewTest(TestCase):
 
         self.assertIn('csrfmiddlewaretoken', response.content.decode())
 
-    def test_mail_sent_on_successful_POST_request(self):
+    def test_mail_queued_on_successful_POST_request(self):
+        self.post_valid_input()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingMessage.objects.count(), 1)
+
+    def test_queued_mail_sent_by_worker(self):
         self.post_valid_input()
 
+        call_command('send_queued_mail', stdout=StringIO())
+
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn(
             '[kevgathuku] New Message', mail.outbox[0].subject)
@@ -253,6 +524,7 @@ class ContactViewTest(TestCase):
         self.assertEqual(resp.status_code, 403)
         self.assertEqual(
             resp.reason_phrase, 'Invalid header found.')
+        self.assertEqual(OutgoingMessage.objects.count(), 0)
 
 
 class ShowPostTest(TestCase):
@@ -0,0 +1,28 @@
+from django.template import loader
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from kevgathuku.warmup import warm_templates
+
+CACHED_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
+
+
+class WarmTemplatesTest(TestCase):
+
+    def test_does_nothing_without_the_cached_loader(self):
+        self.assertEqual(warm_templates(), 0)
+
+    @override_settings(TEMPLATE_LOADERS=CACHED_LOADERS)
+    def test_compiles_the_site_templates(self):
+        self.assertGreaterEqual(warm_templates(), 10)
+
+        cached = loader.template_source_loaders[0].template_cache
+        self.assertIn('blog/base.html', cached)
+        self.assertIn('blog/post.html', cached)
+        # Installed packages are left alone
+        self.assertNotIn('admin/base.html', cached)
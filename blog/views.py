@@ -1,41 +1,72 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.context_processors import csrf
-from django.core.mail import send_mail, BadHeaderError
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import JsonResponse, HttpResponseForbidden
+from django.core.mail import BadHeaderError
+from django.core.urlresolvers import reverse
+from django.http import Http404, JsonResponse, HttpResponseForbidden
 from django.shortcuts import render, get_object_or_404
 
-from .models import Post, Category
+from kevgathuku.db.pool import pool_stats
 
+from . import metrics
+from .archive import archive_years, month_range
+from .cache import cache_public_page
+from .conditional import conditional_page
+from .mail import queue_mail
+from .middleware import public_view
+from .models import ArchiveMonth, Post, Category, TagCount
+from .pagination import CursorPaginator, InvalidCursor
+from .relativetime import relative_time_page, with_relative_times
+from .search import search as search_posts
+from .tags import tag_cloud
 
-def index(request):
-    """The home page view. Returns the last five published posts."""
 
-    context = {}
-    page = request.GET.get('page', 1)
-    index_queryset = Post.objects.filter(published=True).order_by('-created')
-    paginator = Paginator(index_queryset, 5, orphans=2)
+def listing_last_modified(request, category_name_slug=None):
+    """When the posts (in a category) last changed, and how many there
+    are."""
+    posts = Post.objects.all()
+    if category_name_slug is not None:
+        posts = posts.filter(category__slug=category_name_slug)
+    return posts.changes()
 
-    try:
-        posts = paginator.page(page)
 
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        posts = paginator.page(1)
+def tag_last_modified(request, tag_slug):
+    return Post.objects.filter(tags__slug=tag_slug).changes()
+
+
+def archive_last_modified(request, year, month=None):
+    # The archive sidebar counts the posts of every month
+    return Post.objects.all().changes()
+
 
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        posts = paginator.page(paginator.num_pages)
+def post_last_modified(request, slug):
+    return Post.objects.filter(slug=slug, published=True).values_list(
+        'updated', flat=True).first()
 
-    context['posts'] = posts
+
+@public_view
+@cache_public_page('index')
+@conditional_page(with_relative_times(listing_last_modified))
+@relative_time_page
+def index(request):
+    """The home page view. Returns the last five published posts."""
+
+    context = {}
+    paginator = CursorPaginator(Post.objects.listing(), 5, orphans=2)
+
+    context['posts'] = paginator.page_for_request(request)
+    context['archive'] = archive_years()
 
     return render(request, 'blog/index.html', context)
 
 
+@public_view
+@cache_public_page('category:{category_name_slug}')
+@conditional_page(with_relative_times(listing_last_modified))
+@relative_time_page
 def category(request, category_name_slug):
     """The category view. Displays posts under a certain category"""
 
     context_dict = {}
-    page = request.GET.get('page')
 
     try:
         # Can we find a category name slug with the given name?
@@ -44,23 +75,11 @@ def category(request, category_name_slug):
 
         # Retrieve all of the associated pages.
         # Note that filter returns >= 1 model instance.
-        cat_posts = Post.objects.filter(
-            category=cat, published=True).order_by('-created')
+        cat_posts = Post.objects.listing().filter(category=cat)
 
-        paginator = Paginator(cat_posts, 5, orphans=2)
+        paginator = CursorPaginator(cat_posts, 5, orphans=2)
 
-        try:
-            posts = paginator.page(page)
-
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            posts = paginator.page(1)
-
-        except EmptyPage:
-            # If page is out of range (e.g. 999), display last page
-            posts = paginator.page(paginator.num_pages)
-
-        context_dict['posts'] = posts
+        context_dict['posts'] = paginator.page_for_request(request)
 
         # Add the category object from the database to the context dictionary.
         # We'll use this in the template to verify that the category exists.
@@ -75,8 +94,85 @@ def category(request, category_name_slug):
     return render(request, 'blog/category.html', context_dict)
 
 
+@public_view
+@cache_public_page('tag:{tag_slug}')
+@conditional_page(with_relative_times(tag_last_modified))
+@relative_time_page
+def tag(request, tag_slug):
+    """The published posts with a tag, newest first."""
+    tag = get_object_or_404(TagCount, slug=tag_slug)
+    posts = Post.objects.listing().filter(tags__id=tag.tag_id)
+    paginator = CursorPaginator(posts, 5, orphans=2)
+
+    context = {'tag': tag, 'posts': paginator.page_for_request(request)}
+
+    return render(request, 'blog/tag.html', context)
+
+
+@public_view
+@cache_public_page('archive')
+@conditional_page(with_relative_times(archive_last_modified))
+@relative_time_page
+def archive_year(request, year):
+    """The published posts of a year, newest first."""
+    year = int(year)
+    months = list(ArchiveMonth.objects.filter(
+        year=year, count__gt=0).order_by('month'))
+    if not months:
+        raise Http404
+    start, end = month_range(year)
+    posts = Post.objects.listing().filter(created__gte=start, created__lt=end)
+    paginator = CursorPaginator(posts, 5, orphans=2)
+
+    context = {
+        'year': year,
+        'months': months,
+        'count': sum(month.count for month in months),
+        'archive_url': reverse('archive_year', args=[str(year)]),
+        'archive': archive_years(),
+        'posts': paginator.page_for_request(request),
+    }
+
+    return render(request, 'blog/archive.html', context)
+
+
+@public_view
+@cache_public_page('archive')
+@conditional_page(with_relative_times(archive_last_modified))
+@relative_time_page
+def archive_month(request, year, month):
+    """The published posts of a month, newest first."""
+    archived = get_object_or_404(
+        ArchiveMonth, year=int(year), month=int(month), count__gt=0)
+    start, end = month_range(archived.year, archived.month)
+    posts = Post.objects.listing().filter(created__gte=start, created__lt=end)
+    paginator = CursorPaginator(posts, 5, orphans=2)
+
+    context = {
+        'year': archived.year,
+        'month': archived.first_day,
+        'count': archived.count,
+        'archive_url': archived.get_absolute_url(),
+        'archive': archive_years(),
+        'posts': paginator.page_for_request(request),
+    }
+
+    return render(request, 'blog/archive.html', context)
+
+
+@public_view
+@cache_public_page('tags')
+def tags(request):
+    """The tag cloud."""
+    return render(request, 'blog/tags.html', {'tags': tag_cloud()})
+
+
+@public_view
+@cache_public_page('post:{slug}')
+@conditional_page(with_relative_times(post_last_modified))
+@relative_time_page
 def show_post(request, slug):
-    query = Post.objects.filter(slug=slug, published=True)
+    query = Post.objects.published().filter(slug=slug)
     post = get_object_or_404(query)
 
     context = {'post': post}
@@ -84,10 +180,28 @@ def show_post(request, slug):
     return render(request, 'blog/post.html', context)
 
 
+@public_view
+def search(request):
+    """Full-text search over the published posts."""
+
+    query = request.GET.get('q', '').strip()
+    context = {'query': query}
+
+    if query:
+        try:
+            context['results'] = search_posts(query, request.GET.get('after'))
+        except InvalidCursor:
+            context['results'] = search_posts(query)
+
+    return render(request, 'blog/search.html', context)
+
+
+@public_view
 def about(request):
     return render(request, 'blog/about.html')
 
 
+@public_view
 def about_site(request):
     return render(request, 'blog/about-this-site.html')
 
@@ -104,12 +218,11 @@ def contact(request):
         subject = "[kevgathuku] New Message from {}".format(name)
         if name and message and from_email:
             try:
-                send_mail(
+                queue_mail(
                     subject,
                     message,
                     from_email,
-                    ['kevgathuku@gmail.com'],
-                    fail_silently=False)
+                    ['kevgathuku@gmail.com'])
             except BadHeaderError:
                 return HttpResponseForbidden(reason='Invalid header found.')
             return JsonResponse({'success': '1'})
@@ -118,3 +231,15 @@ def contact(request):
                 reason='Make sure all fields are entered and valid.')
 
     return render(request, 'blog/contact.html', context)
+
+
+@staff_member_required
+def performance(request):
+    """Recent response time percentiles per URL name, in milliseconds."""
+    return JsonResponse(metrics.summary())
+
+
+@staff_member_required
+def database_pools(request):
+    """How the database connection pools of this process are used."""
+    return JsonResponse(pool_stats())
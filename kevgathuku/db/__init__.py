@@ -0,0 +1,22 @@
+"""
+Database connection handling for the gunicorn workers.
+
+The backends in kevgathuku.db.backends wrap Django's PostgreSQL and
+SQLite backends with two additions, both configured in DATABASES:
+
+``HEALTH_CHECKS``
+    A connection kept open between requests (CONN_MAX_AGE) is checked
+    with a cheap query before the first use in each request, and
+    replaced if the server dropped it in the meantime, instead of
+    failing that request.
+
+``POOL``
+    Connections are borrowed from a per-process `pool.ConnectionPool`
+    when a request first needs one and handed back when Django closes
+    them, so threaded or async workers share a bounded set of open
+    connections. Its options are MAX_SIZE, TIMEOUT (seconds to wait for
+    a free connection) and MAX_AGE (seconds before a connection is
+    replaced). `pool.pool_stats` reports how each pool is used.
+
+Read replicas are handled by kevgathuku.db.replicas.
+"""
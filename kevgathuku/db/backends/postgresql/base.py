@@ -0,0 +1,10 @@
+"""
+PostgreSQL, with the health checks and connection pool of kevgathuku.db.
+"""
+from django.db.backends.postgresql_psycopg2 import base
+
+from kevgathuku.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,12 @@
+"""
+SQLite, with the health checks and connection pool of kevgathuku.db.
+
+Used in development and as a stand-in for PostgreSQL in the tests.
+"""
+from django.db.backends.sqlite3 import base
+
+from kevgathuku.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    pass
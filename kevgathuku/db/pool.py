@@ -0,0 +1,264 @@
+"""
+A thread-safe pool of DB-API connections, and the mixin that makes a
+Django database backend use one.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import DatabaseError
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class ConnectionPool(object):
+    """Up to `max_size` connections made by calling `connect`.
+
+    Idle connections are handed out most recently used first, so a
+    quiet site keeps few of them warm. Connections older than `max_age`
+    seconds are closed rather than reused.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=10.0, max_age=None,
+                 check=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check = check
+        self.idle = deque()
+        self.created_at = {}
+        self.size = 0
+        self.condition = threading.Condition()
+        self.counters = dict.fromkeys([
+            'created', 'reused', 'closed', 'waits', 'timeouts'], 0)
+        self.wait_ms = 0.0
+        self.peak_in_use = 0
+
+    def expired(self, connection):
+        return self.max_age is not None and (
+            time.time() - self.created_at[id(connection)] >= self.max_age)
+
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one.
+
+        Idle connections that fail `check` are closed and replaced.
+        """
+        start = time.time()
+        while True:
+            connection = self.take_idle(start)
+            if connection is None:
+                break
+            if self.check is None or self.check(connection):
+                return connection
+            self.release(connection, discard=True)
+
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.created_at[id(connection)] = time.time()
+            self.counters['created'] += 1
+        return connection
+
+    def take_idle(self, start):
+        """An idle connection, or None once there is room to connect."""
+        stale = []
+        try:
+            with self.condition:
+                while True:
+                    while self.idle:
+                        connection = self.idle.pop()
+                        if self.expired(connection):
+                            stale.append(self.forget(connection))
+                            continue
+                        self.counters['reused'] += 1
+                        self.borrowed(start)
+                        return connection
+                    if self.size < self.max_size:
+                        # Connect without holding the lock
+                        self.size += 1
+                        self.borrowed(start)
+                        return None
+                    remaining = self.timeout - (time.time() - start)
+                    if remaining <= 0:
+                        self.counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            'No database connection free after %s seconds.'
+                            % self.timeout)
+                    self.counters['waits'] += 1
+                    self.condition.wait(remaining)
+        finally:
+            for connection in stale:
+                close_quietly(connection)
+
+    def borrowed(self, start):
+        self.wait_ms += (time.time() - start) * 1000
+        self.peak_in_use = max(self.peak_in_use, self.in_use())
+
+    def forget(self, connection):
+        del self.created_at[id(connection)]
+        self.size -= 1
+        self.counters['closed'] += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """Hand a connection back, or close it if `discard` is true or it
+        is too old to reuse."""
+        with self.condition:
+            if discard or self.expired(connection):
+                self.forget(connection)
+            else:
+                self.idle.append(connection)
+                connection = None
+            self.condition.notify()
+        if connection is not None:
+            close_quietly(connection)
+
+    def close(self):
+        """Close the idle connections."""
+        with self.condition:
+            idle = [self.forget(connection) for connection in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            close_quietly(connection)
+
+    def stats(self):
+        with self.condition:
+            stats = dict(self.counters)
+            stats.update({
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use(),
+                'peak_in_use': self.peak_in_use,
+                'max_size': self.max_size,
+                'wait_ms': round(self.wait_ms, 1),
+            })
+        return stats
+
+
+def ping(connection):
+    """Whether a DB-API connection still answers a query."""
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        finally:
+            cursor.close()
+    except Exception:
+        return False
+    return True
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options, connect, check=None):
+    """The pool of the database `alias` in this process, made with
+    `options` (the POOL setting) the first time."""
+    # A forked worker must not share its parent's connections
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                connect, max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10.0),
+                max_age=options.get('MAX_AGE'), check=check)
+        return _pools[key]
+
+
+def pool_stats():
+    """``{alias: stats}`` of the pools of this process."""
+    pid = os.getpid()
+    return dict(
+        (alias, pool.stats()) for (alias, owner), pool in _pools.items()
+        if owner == pid)
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin(object):
+    """Adds the HEALTH_CHECKS and POOL settings to a DatabaseWrapper.
+
+    With POOL, a connection goes back to the pool as soon as the request
+    that borrowed it finishes, whatever CONN_MAX_AGE says: otherwise an
+    idle thread would keep it from the others. The pool's MAX_AGE decides
+    how long connections are reused, and HEALTH_CHECKS are done when an
+    idle connection is borrowed.
+    """
+
+    health_check_pending = False
+    discard_connection = False
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        parent = super(PooledDatabaseWrapperMixin, self)
+        if options is None:
+            return parent.get_new_connection(conn_params)
+        pool = get_pool(
+            self.alias, options,
+            lambda: parent.get_new_connection(conn_params),
+            ping if self.settings_dict.get('HEALTH_CHECKS') else None)
+        return pool.acquire()
+
+    def connect(self):
+        super(PooledDatabaseWrapperMixin, self).connect()
+        if self.settings_dict.get('POOL') is not None:
+            # Obsolete when the request finishes, so it is released then
+            self.close_at = time.time()
+
+    def _close(self):
+        options = self.settings_dict.get('POOL')
+        if options is None or self.connection is None:
+            return super(PooledDatabaseWrapperMixin, self)._close()
+
+        discard = self.errors_occurred or self.discard_connection
+        self.discard_connection = False
+        if not discard:
+            try:
+                # Leave no transaction open for the next borrower
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        get_pool(self.alias, options, None).release(
+            self.connection, discard)
+
+    def close_if_unusable_or_obsolete(self):
+        super(PooledDatabaseWrapperMixin, self).close_if_unusable_or_obsolete()
+        # Called as each request starts and finishes
+        if self.connection is not None and self.settings_dict.get(
+                'HEALTH_CHECKS'):
+            self.health_check_pending = True
+
+    def ensure_connection(self):
+        if self.health_check_pending:
+            self.health_check_pending = False
+            if self.connection is not None and not self.is_usable():
+                self.discard_connection = True
+                self.close()
+        super(PooledDatabaseWrapperMixin, self).ensure_connection()
@@ -0,0 +1,160 @@
+"""
+Reading from the database replicas.
+
+For the anonymous reads of public views that
+blog.middleware.PublicViewMiddleware serves without sessions,
+`ReplicaRouter` sends the queries to one of the DATABASE_REPLICAS,
+picked once per request by a `ReplicaSelector`. Everything else, and
+every write, uses the default (primary) database.
+
+Replicas lag behind the primary. A request that writes sets a short
+lived cookie that keeps its client on the primary, and records the
+time of the write in a cache shared by the workers, so for
+DATABASE_REPLICA_STICKY_SECONDS nobody reads from a replica (and fills
+the page cache) from before the write.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+REPLICAS = list(getattr(settings, 'DATABASE_REPLICAS', []))
+SELECTION = getattr(settings, 'DATABASE_REPLICA_SELECTION', 'round_robin')
+STICKY_SECONDS = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+WRITES_CACHE = getattr(settings, 'DATABASE_REPLICA_WRITES_CACHE', 'default')
+
+STICKY_COOKIE = 'use_primary'
+LAST_WRITE_KEY = 'kevgathuku:db:last-write'
+
+# Seconds between checks of each replica's health and latency
+PROBE_INTERVAL = 30
+
+_state = threading.local()
+
+
+def probe(alias):
+    """Milliseconds a trivial query on `alias` takes, or None if it fails."""
+    start = time.time()
+    try:
+        cursor = connections[alias].cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    except DatabaseError:
+        connections[alias].close()
+        return None
+    return (time.time() - start) * 1000
+
+
+class ReplicaSelector(object):
+    """Picks a working replica, in turn or by the lowest latency.
+
+    Each replica is probed at most every `interval` seconds; the latency
+    is smoothed over the probes. A replica whose probe fails is left out
+    until a later probe succeeds.
+    """
+
+    def __init__(self, aliases, strategy='round_robin', probe=probe,
+                 interval=PROBE_INTERVAL):
+        self.aliases = list(aliases)
+        self.strategy = strategy
+        self.probe = probe
+        self.interval = interval
+        self.latency = {}
+        self.checked_at = {}
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        now = time.time()
+        for alias in self.aliases:
+            if now - self.checked_at.get(alias, 0) < self.interval:
+                continue
+            self.checked_at[alias] = now
+            latency = self.probe(alias)
+            if latency is None:
+                self.latency[alias] = None
+            elif self.latency.get(alias) is None:
+                self.latency[alias] = latency
+            else:
+                self.latency[alias] = (
+                    0.7 * self.latency[alias] + 0.3 * latency)
+
+    def available(self):
+        return [
+            alias for alias in self.aliases
+            if self.latency.get(alias) is not None]
+
+    def choose(self):
+        """A replica alias, or None if none works."""
+        self.refresh()
+        available = self.available()
+        if not available:
+            return None
+        if self.strategy == 'least_latency':
+            return min(available, key=self.latency.get)
+        with self.lock:
+            self.counter += 1
+            return available[self.counter % len(available)]
+
+    def stats(self):
+        return dict(
+            (alias, {'latency_ms': self.latency.get(alias)})
+            for alias in self.aliases)
+
+
+selector = ReplicaSelector(REPLICAS, SELECTION)
+
+
+def recently_written():
+    return caches[WRITES_CACHE].get(LAST_WRITE_KEY) is not None
+
+
+def record_write():
+    caches[WRITES_CACHE].set(LAST_WRITE_KEY, time.time(), STICKY_SECONDS)
+
+
+def reset_state():
+    _state.replica = None
+    _state.wrote = False
+
+
+class ReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'replica', None)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, model):
+        if db in REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware(object):
+    """Read from a replica while serving public views. Goes after
+    PublicViewMiddleware."""
+
+    def process_request(self, request):
+        reset_state()
+        if not REPLICAS or not getattr(request, 'public_view', False):
+            return None
+        if STICKY_COOKIE in request.COOKIES or recently_written():
+            return None
+        _state.replica = selector.choose()
+
+    def process_response(self, request, response):
+        if REPLICAS and getattr(_state, 'wrote', False):
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=STICKY_SECONDS, httponly=True)
+            record_write()
+        reset_state()
+        return response
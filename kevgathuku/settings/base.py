@@ -45,13 +45,37 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Times the whole request, so it must come first
+    'blog.middleware.PerformanceMiddleware',
+    # Turns cached pages into 304s for clients that already have them
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
+    # Runs SESSION_MIDDLEWARE_CLASSES, except for anonymous readers of
+    # the public views
+    'blog.middleware.PublicViewMiddleware',
+    # Sends the reads of public views to the read replicas, if any
+    'kevgathuku.db.replicas.ReplicaMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+
+SESSION_MIDDLEWARE_CLASSES = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+
+# Django's defaults, plus the request for the relative_time tag
+TEMPLATE_CONTEXT_PROCESSORS = (
+    'django.contrib.auth.context_processors.auth',
+    'django.core.context_processors.debug',
+    'django.core.context_processors.i18n',
+    'django.core.context_processors.media',
+    'django.core.context_processors.static',
+    'django.core.context_processors.tz',
+    'django.contrib.messages.context_processors.messages',
+    'django.core.context_processors.request',
 )
 
 ROOT_URLCONF = 'kevgathuku.urls'
@@ -69,9 +93,111 @@ WSGI_APPLICATION = 'kevgathuku.wsgi.application'
 #     }
 # }
 
-# Parse database configuration from $DATABASE_URL
+# Parse database configuration from $DATABASE_URL, and that of the read
+# replicas from $DATABASE_URL_REPLICA, $DATABASE_URL_REPLICA_2 and so on
+
+# Django's backends plus health checks and an optional pool, see
+# kevgathuku/db/__init__.py
+DATABASE_ENGINES = {
+    'django.db.backends.postgresql_psycopg2':
+        'kevgathuku.db.backends.postgresql',
+    'django.db.backends.sqlite3': 'kevgathuku.db.backends.sqlite3',
+}
+
 
-DATABASES = {'default': dj_database_url.parse(os.environ['DATABASE_URL'])}
+def database_settings(url):
+    database = dj_database_url.parse(url)
+    database['ENGINE'] = DATABASE_ENGINES.get(
+        database['ENGINE'], database['ENGINE'])
+    # Seconds a connection is kept open between requests, instead of
+    # opening one per request. Each is checked before a request first
+    # uses it.
+    database['CONN_MAX_AGE'] = int(
+        os.environ.get('DATABASE_CONN_MAX_AGE', 60))
+    database['HEALTH_CHECKS'] = True
+    # For threaded or async workers: share at most DATABASE_POOL_SIZE
+    # connections between the requests of each worker process. Pooled
+    # connections go back to the pool at the end of each request, which
+    # CONN_MAX_AGE = 0 says; DATABASE_POOL_MAX_AGE bounds their reuse.
+    if os.environ.get('DATABASE_POOL_SIZE'):
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {
+            'MAX_SIZE': int(os.environ['DATABASE_POOL_SIZE']),
+            'TIMEOUT': float(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+            'MAX_AGE': int(os.environ.get('DATABASE_POOL_MAX_AGE', 60 * 30)),
+        }
+    return database
+
+
+DATABASES = {'default': database_settings(os.environ['DATABASE_URL'])}
+
+DATABASE_REPLICAS = []
+for name in sorted(os.environ):
+    if name.startswith('DATABASE_URL_REPLICA'):
+        alias = name[len('DATABASE_URL_'):].lower()
+        DATABASES[alias] = database_settings(os.environ[name])
+        # Tests read and write the default database only
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+        DATABASE_REPLICAS.append(alias)
+
+# Public views read from a replica, see kevgathuku/db/replicas.py
+DATABASE_ROUTERS = ['kevgathuku.db.replicas.ReplicaRouter']
+
+# 'round_robin' or 'least_latency'
+DATABASE_REPLICA_SELECTION = os.environ.get(
+    'DATABASE_REPLICA_SELECTION', 'round_robin')
+
+# How long after a write reads stay on the primary, a bound on how far
+# the replicas lag behind
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 10))
+
+# Where the time of the last write is shared between the workers
+DATABASE_REPLICA_WRITES_CACHE = 'pages'
+
+# Caches
+# https://docs.djangoproject.com/en/1.7/topics/cache/
+
+# The 'pages' cache holds the full-page cache of the public views
+# (see blog/cache.py). It has to be shared by all the gunicorn workers, so
+# it lives on the filesystem unless a Redis server is configured.
+#
+# The filesystem cache is only shared by the workers of one machine: when
+# the site runs on several (e.g. Heroku dynos), an admin change only
+# invalidates the pages cached on the machine that made it, and the others
+# serve stale pages for up to BLOG_PAGE_CACHE_TIMEOUT. Set REDIS_URL (the
+# Heroku Redis add-on does) to share the cache between machines.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'pages'),
+    },
+}
+
+if 'REDIS_URL' in os.environ:
+    CACHES['pages'] = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Cached pages are invalidated when posts change, the timeout only
+# bounds how long an unvisited page takes up space.
+BLOG_PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Number of posts in the RSS and Atom feeds
+BLOG_FEED_MAX_ITEMS = 20
+
+# Number of post ids covered by each part of the sitemap
+BLOG_SITEMAP_CHUNK_SIZE = 5000
+
+# 'client' writes post dates as they are and lets the browser show them
+# as "3 minutes ago", keeping pages the same for as long as their posts
+# are. 'server' writes relative times rounded to whole days, and pages
+# expire at midnight when those change.
+BLOG_RELATIVE_TIME = os.environ.get('BLOG_RELATIVE_TIME', 'client')
 
 # Internationalization
 # https://docs.djangoproject.com/en/1.7/topics/i18n/
@@ -98,6 +224,13 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'collectedstatic')
 # Additional directories to find static files
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'staticfiles'),)
 
+# The last one makes the resized copies of the header images
+STATICFILES_FINDERS = (
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'blog.images.DerivativeFinder',
+)
+
 # Location for user uploaded files
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -112,6 +245,31 @@ MARKDOWN_DEUX_STYLES = {
     }
 }
 
+# Logging
+# https://docs.djangoproject.com/en/1.7/topics/logging/
+
+# gunicorn collects stderr, which is where the per request timings from
+# blog.middleware.PerformanceMiddleware go.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'kevgathuku': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
 # Mandrill Config
 MANDRILL_API_KEY = os.environ['MANDRILL_API_KEY']
 
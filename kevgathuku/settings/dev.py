@@ -7,3 +7,8 @@ TEMPLATE_DEBUG = True
 INSTALLED_APPS += (
     'debug_toolbar',
 )
+
+# Don't cache pages, changes to templates and code should show up at once
+CACHES['pages'] = {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
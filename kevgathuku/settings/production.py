@@ -1,3 +1,5 @@
+import os
+
 from .base import *
 
 # SECURITY WARNING: don't run with debug turned on in production!
@@ -5,11 +7,24 @@ DEBUG = False
 
 TEMPLATE_DEBUG = False
 
-# Allow all host headers
-ALLOWED_HOSTS = ['*']
+# Allow all host headers unless ALLOWED_HOSTS lists the host names the
+# site answers to, comma separated, e.g.
+# ALLOWED_HOSTS=kevgathuku.me,blog.kevgathuku.com. Cached pages are keyed
+# by host, so a forged Host header never reaches other readers.
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
 
 # Honor the 'X-Forwarded-Proto' header for request.is_secure()
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
-# Whitenoise static files storage
-STATICFILES_STORAGE = 'whitenoise.django.GzipManifestStaticFilesStorage'
+# Hashed file names plus gzip (and brotli, if installed) variants, served
+# by kevgathuku.static.StaticFileServer
+STATICFILES_STORAGE = 'kevgathuku.static.CompressedManifestStaticFilesStorage'
+
+# Parse each template once per process. kevgathuku.wsgi compiles them all
+# when a worker boots.
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
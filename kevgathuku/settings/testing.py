@@ -3,3 +3,11 @@ from .base import *
 DEBUG = True
 
 TEMPLATE_DEBUG = True
+
+# Tests that exercise the page cache switch it on themselves
+CACHES['pages'] = {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Keep the per request log lines out of the test output
+LOGGING['loggers']['blog']['level'] = 'CRITICAL'
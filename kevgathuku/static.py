@@ -0,0 +1,199 @@
+"""
+Serving of the collected static files in front of Django.
+
+`StaticFileServer` indexes STATIC_ROOT once, when the WSGI application is
+created, so answering a request is a dictionary lookup: no filesystem
+checks and no trip through Django. For each file it picks the smallest
+precompressed variant (``.br``, then ``.gz``) the client accepts, and
+files whose names carry a content hash (those listed in the manifest of
+ManifestStaticFilesStorage) are cached by browsers forever.
+
+`CompressedManifestStaticFilesStorage` writes those variants during
+collectstatic. Brotli variants are only made if the optional ``brotli``
+package is installed.
+"""
+import json
+import mimetypes
+import os
+from email.utils import formatdate
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.utils.six.moves.urllib.parse import urlparse
+from whitenoise.django import GzipManifestStaticFilesStorage
+from whitenoise.gzip import GZIP_EXCLUDE_EXTENSIONS, extension_regex
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Client side cache lifetimes, in seconds
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+DEFAULT_MAX_AGE = getattr(settings, 'STATIC_MAX_AGE', 60 * 60)
+
+# Content-Encoding of each precompressed variant, best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+CHUNK_SIZE = 64 * 1024
+
+
+def compress_brotli(path):
+    """Write `path`.br, unless it would be no smaller than `path`."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressed = brotli.compress(data)
+    if len(compressed) < len(data):
+        with open(path + '.br', 'wb') as f:
+            f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(GzipManifestStaticFilesStorage):
+    """Adds brotli variants next to the gzip ones, if brotli is installed."""
+
+    def post_process(self, *args, **kwargs):
+        files = super(CompressedManifestStaticFilesStorage, self).post_process(
+            *args, **kwargs)
+        excluded_re = extension_regex(getattr(
+            settings, 'WHITENOISE_GZIP_EXCLUDE_EXTENSIONS',
+            GZIP_EXCLUDE_EXTENSIONS))
+        for name, hashed_name, processed in files:
+            if (brotli is not None and not kwargs.get('dry_run') and
+                    not excluded_re.search(name)):
+                compress_brotli(self.path(name))
+                if hashed_name is not None:
+                    compress_brotli(self.path(hashed_name))
+            yield name, hashed_name, processed
+
+
+class StaticFile(object):
+    """A file in the index, with the headers of each of its variants."""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        content_type = mimetypes.guess_type(path)[0]
+        if content_type is None:
+            content_type = 'application/octet-stream'
+        elif content_type.startswith('text/') or content_type in (
+                'application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        if immutable:
+            cache_control = 'public, max-age=%d, immutable' % IMMUTABLE_MAX_AGE
+        else:
+            cache_control = 'public, max-age=%d' % DEFAULT_MAX_AGE
+
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        # Weak, as the variants share it
+        self.etag = 'W/"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+        common = [
+            ('Content-Type', content_type),
+            ('Cache-Control', cache_control),
+            ('Last-Modified', self.last_modified),
+            ('ETag', self.etag),
+        ]
+
+        compressed = [
+            (encoding, path + suffix) for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)]
+        if compressed:
+            common.append(('Vary', 'Accept-Encoding'))
+
+        # (encoding, path, headers) of the variants, best first
+        self.variants = [
+            (encoding, variant_path, common + [
+                ('Content-Encoding', encoding),
+                ('Content-Length', str(os.path.getsize(variant_path))),
+            ])
+            for encoding, variant_path in compressed]
+        self.variants.append(
+            (None, path, common + [('Content-Length', str(stat.st_size))]))
+
+    def choose(self, accepted):
+        """The path and headers of the best variant for `accepted`."""
+        for encoding, path, headers in self.variants:
+            if encoding is None or encoding in accepted:
+                return path, headers
+
+    def not_modified(self, environ):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return if_none_match == '*' or self.etag in [
+                etag.strip() for etag in if_none_match.split(',')]
+        return environ.get('HTTP_IF_MODIFIED_SINCE') == self.last_modified
+
+
+def accepted_encodings(header):
+    """The content codings an Accept-Encoding header allows."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    if '*' in accepted:
+        accepted.update(encoding for encoding, suffix in ENCODINGS)
+    return accepted
+
+
+def load_manifest(root):
+    """The hashed names listed by ManifestStaticFilesStorage, if any."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as f:
+            return set(json.load(f).get('paths', {}).values())
+    except (IOError, ValueError):
+        return set()
+
+
+class StaticFileServer(object):
+    """WSGI middleware serving the files under `root` at `prefix`."""
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.prefix = '/%s/' % prefix.strip('/')
+        self.files = {}
+        if root and os.path.isdir(root):
+            self.add_files(root)
+
+    def add_files(self, root):
+        hashed = load_manifest(root)
+        suffixes = tuple(suffix for encoding, suffix in ENCODINGS)
+        for directory, dirs, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, root).replace(os.sep, '/')
+                # Variants are served in place of the file they compress
+                if name.endswith(suffixes) and os.path.isfile(
+                        os.path.splitext(path)[0]):
+                    continue
+                self.files[self.prefix + relative] = StaticFile(
+                    path, relative in hashed)
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.get(environ.get('PATH_INFO', ''))
+        if static_file is None or environ['REQUEST_METHOD'] not in (
+                'GET', 'HEAD'):
+            return self.application(environ, start_response)
+
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        path, headers = static_file.choose(accepted)
+
+        if static_file.not_modified(environ):
+            start_response('304 Not Modified', [
+                (name, value) for name, value in headers
+                if name not in ('Content-Length', 'Content-Type',
+                                'Content-Encoding')])
+            return []
+
+        start_response('200 OK', list(headers))
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        # The server may hand the file to sendfile() as it is
+        return file_wrapper(open(path, 'rb'), CHUNK_SIZE)
+
+
+def serve_static(application):
+    """Put a StaticFileServer for STATIC_ROOT in front of `application`."""
+    return StaticFileServer(
+        application, settings.STATIC_ROOT, urlparse(settings.STATIC_URL).path)
@@ -1,6 +1,8 @@
 from django.conf.urls import patterns, include, url
 from django.contrib import admin
 
+from blog import feeds, images, sitemaps
+
 urlpatterns = patterns(
     '',
     # Examples:
@@ -11,8 +13,40 @@ urlpatterns = patterns(
     url(r'^about/$', 'blog.views.about', name='about'),
     url(r'^about-this-site/$', 'blog.views.about_site', name='about_site'),
     url(r'^contact/$', 'blog.views.contact', name='contact'),
+    url(r'^search/$', 'blog.views.search', name='search'),
+    url(r'^performance/$', 'blog.views.performance', name='performance'),
+    url(
+        r'^performance/database/$', 'blog.views.database_pools',
+        name='database_pools'),
     url(r'^post/', include('blog.urls', namespace='blog')),
     url(
         r'^category/(?P<category_name_slug>[\w\-]+)/$',
         'blog.views.category', name='category'),
+    url(
+        r'^category/(?P<category_name_slug>[\w\-]+)/feed/rss/$',
+        feeds.category_rss, name='category_feed_rss'),
+    url(
+        r'^category/(?P<category_name_slug>[\w\-]+)/feed/atom/$',
+        feeds.category_atom, name='category_feed_atom'),
+    url(r'^feed/rss/$', feeds.latest_posts_rss, name='feed_rss'),
+    url(r'^feed/atom/$', feeds.latest_posts_atom, name='feed_atom'),
+    url(r'^robots\.txt$', sitemaps.robots_txt, name='robots_txt'),
+    url(r'^sitemap\.xml$', sitemaps.sitemap_index, name='sitemap'),
+    url(
+        r'^sitemap-pages\.xml$', sitemaps.sitemap_pages,
+        name='sitemap_pages'),
+    url(
+        r'^sitemap-posts-(?P<chunk>\d+)\.xml$', sitemaps.sitemap_posts,
+        name='sitemap_posts'),
+    url(
+        r'^archive/(?P<year>\d{4})/$', 'blog.views.archive_year',
+        name='archive_year'),
+    url(
+        r'^archive/(?P<year>\d{4})/(?P<month>0[1-9]|1[0-2])/$',
+        'blog.views.archive_month', name='archive_month'),
+    url(r'^tags/$', 'blog.views.tags', name='tags'),
+    url(r'^tag/(?P<tag_slug>[\w\-]+)/$', 'blog.views.tag', name='tag'),
+    url(
+        r'^media-derived/(?P<path>.+)$', images.media_derivative,
+        name='media_derivative'),
 )
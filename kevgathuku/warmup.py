@@ -0,0 +1,70 @@
+"""
+Compiling the site's templates before the first request.
+
+With the cached template loader (as in production) each template is
+parsed once per process and kept. `warm_templates` loads every template
+of the site's own apps and TEMPLATE_DIRS when the WSGI application is
+created, so that cost is paid while a worker boots rather than by the
+first visitor of each page. Templates included with a constant name and
+the tag libraries they load are compiled along the way.
+"""
+import logging
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def uses_cached_loader():
+    return any(
+        (loader[0] if isinstance(loader, (list, tuple)) else loader) ==
+        CACHED_LOADER for loader in settings.TEMPLATE_LOADERS)
+
+
+def template_directories():
+    """TEMPLATE_DIRS and the template directories of the apps that are
+    part of the site, rather than installed packages."""
+    directories = list(settings.TEMPLATE_DIRS)
+    for app_config in apps.get_app_configs():
+        directory = os.path.join(app_config.path, 'templates')
+        if (app_config.path.startswith(settings.BASE_DIR) and
+                os.path.isdir(directory)):
+            directories.append(directory)
+    return directories
+
+
+def template_names(directory):
+    for root, dirs, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.relpath(os.path.join(root, name), directory)
+                yield path.replace(os.sep, '/')
+
+
+def warm_templates():
+    """Compile the site's templates, returning how many were loaded.
+
+    Does nothing unless the cached loader is in use, as other loaders
+    throw the compiled templates away.
+    """
+    if not uses_cached_loader():
+        return 0
+    loaded = 0
+    for directory in template_directories():
+        for name in template_names(directory):
+            try:
+                get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+                # The request for the page will show the error
+                logger.warning('Could not compile %s: %s', name, e)
+            else:
+                loaded += 1
+    return loaded
@@ -12,8 +12,10 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kevgathuku.settings")
 
 from django.core.wsgi import get_wsgi_application
 
-from whitenoise.django import DjangoWhiteNoise
-from dj_static import Cling
+from kevgathuku.static import serve_static
+from kevgathuku.warmup import warm_templates
 
-application = Cling(get_wsgi_application())
-application = DjangoWhiteNoise(application)
+application = serve_static(get_wsgi_application())
+
+# Spare the first request of each worker from parsing the templates
+warm_templates()